@@ -166,7 +166,7 @@ class EmailOTPVerifySerializer(serializers.Serializer):
         from ...Credit.credit_models import UserCreditVault
         
         UserProfileModel.objects.create(user=user)
-        UserCreditVault.objects.create(user=user, total_credits=0, total_value=0)
+        UserCreditVault.objects.create(user=user, total_credits=0)
         
         # Send welcome email if email exists
         if user.email:
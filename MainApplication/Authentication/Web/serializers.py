@@ -132,7 +132,7 @@ class EmailOTPVerifySerializer(serializers.Serializer):
             raise serializers.ValidationError("Invalid identifier format.")
         
         UserProfileModel.objects.create(user=user)
-        UserCreditVault.objects.create(user=user, total_credits=0, total_value=0)
+        UserCreditVault.objects.create(user=user, total_credits=0)
 
         return user
 
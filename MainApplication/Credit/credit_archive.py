@@ -0,0 +1,163 @@
+# MainApplication/Credit/credit_archive.py
+"""
+Monthly archival of CreditTransactionLog.
+
+Months older than CREDIT_LEDGER_RETENTION_MONTHS are written to one gzipped
+JSON-lines file per month under CREDIT_LEDGER_ARCHIVE_DIR:
+
+    credit_transactions_2025-01.jsonl.gz
+
+then recorded in CreditLedgerArchive and deleted from the table, so the
+live table (and its indexes) only holds recent months. Before a month is
+removed every user with entries in it gets a snapshot at their last entry of
+the month, so balances never need the archive unless a point inside an
+archived month is asked for (archived_entries below).
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .credit_models import CreditBalanceSnapshot, CreditLedgerArchive, CreditTransactionLog
+
+logger = logging.getLogger(__name__)
+
+
+ARCHIVE_DIR = getattr(settings, 'CREDIT_LEDGER_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'credit_archive'))
+RETENTION_MONTHS = getattr(settings, 'CREDIT_LEDGER_RETENTION_MONTHS', 12)
+DELETE_BATCH_SIZE = 1000
+
+
+def month_start(moment):
+    return date(moment.year, moment.month, 1)
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _aware(month):
+    return timezone.make_aware(datetime(month.year, month.month, 1))
+
+
+def archivable_months(retention_months=RETENTION_MONTHS, now=None):
+    """Months with live entries that are entirely older than the retention window, oldest first"""
+    cutoff = month_start(timezone.localtime(now or timezone.now()))
+    for _ in range(retention_months):
+        cutoff = date(cutoff.year - (cutoff.month == 1), (cutoff.month - 2) % 12 + 1, 1)
+
+    oldest = CreditTransactionLog.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+    if oldest is None:
+        return []
+
+    months = []
+    month = month_start(timezone.localtime(oldest))
+    while month < cutoff:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def _serialize(entry):
+    return {
+        'id': entry.id,
+        'user': entry.user_id,
+        'sequence': entry.sequence,
+        'transaction_type': entry.transaction_type,
+        'credits_changed': entry.credits_changed,
+        'value_changed': str(entry.value_changed),
+        'balance_after': entry.balance_after,
+        'timestamp': entry.timestamp.isoformat(),
+        'description': entry.description,
+        'idempotency_key': entry.idempotency_key,
+    }
+
+
+def _snapshot_month_end(entries):
+    """Snapshot each user's last entry of the month (rows are about to leave the table)"""
+    last_sequences = entries.order_by().values('user').annotate(last=Max('sequence'))
+    for row in last_sequences.iterator():
+        last = CreditTransactionLog.objects.get(user_id=row['user'], sequence=row['last'])
+        if last.balance_after is None:
+            from .credit_ledger import balance_at
+            balance = balance_at(last.user, last.timestamp)
+        else:
+            balance = last.balance_after
+        CreditBalanceSnapshot.objects.get_or_create(
+            user_id=row['user'], sequence=row['last'],
+            defaults={'balance': balance, 'taken_at': last.timestamp}
+        )
+
+
+def archive_month(month, archive_dir=ARCHIVE_DIR):
+    """Move one month of entries to a file. Returns the CreditLedgerArchive, or None if the month was empty"""
+    entries = CreditTransactionLog.objects.filter(
+        timestamp__gte=_aware(month), timestamp__lt=_aware(next_month(month))
+    )
+    if not entries.exists():
+        return None
+
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"credit_transactions_{month:%Y-%m}.jsonl.gz")
+    partial = f"{path}.partial"
+
+    row_count = 0
+    with gzip.open(partial, 'wt', encoding='utf-8') as f:
+        for entry in entries.order_by('id').iterator(chunk_size=DELETE_BATCH_SIZE):
+            f.write(json.dumps(_serialize(entry)) + '\n')
+            row_count += 1
+
+    hasher = hashlib.sha256()
+    with open(partial, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(block)
+    os.replace(partial, path)
+
+    with transaction.atomic():
+        _snapshot_month_end(entries)
+        archive, _ = CreditLedgerArchive.objects.update_or_create(
+            month=month,
+            defaults={'path': path, 'row_count': row_count, 'sha256': hasher.hexdigest()}
+        )
+        ids = list(entries.values_list('id', flat=True))
+        for i in range(0, len(ids), DELETE_BATCH_SIZE):
+            CreditTransactionLog.objects.filter(id__in=ids[i:i + DELETE_BATCH_SIZE]).delete()
+
+    logger.info(f"🗄️ Archived {row_count} credit transactions of {month:%Y-%m} to {path}")
+    return archive
+
+
+def read_archive(archive):
+    """Yield the entries (dicts) stored in one archive file"""
+    with gzip.open(archive.path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            entry['timestamp'] = datetime.fromisoformat(entry['timestamp'])
+            yield entry
+
+
+def archived_entries(user_id, since=None, until=None):
+    """A user's archived entries with since < timestamp <= until, oldest first"""
+    archives = CreditLedgerArchive.objects.all()
+    if since is not None:
+        archives = archives.filter(month__gte=month_start(timezone.localtime(since)))
+    if until is not None:
+        archives = archives.filter(month__lte=month_start(timezone.localtime(until)))
+
+    for archive in archives.order_by('month'):
+        for entry in read_archive(archive):
+            if entry['user'] != user_id:
+                continue
+            if since is not None and entry['timestamp'] <= since:
+                continue
+            if until is not None and entry['timestamp'] > until:
+                continue
+            yield entry
@@ -0,0 +1,152 @@
+# MainApplication/Credit/credit_config.py
+"""
+In-process cache of the singleton credit configuration
+(CreditModel and CreditCostsModel).
+
+Both rows change a few times a year but are read by every like, rating and
+follow, and by every UserCreditVault.total_value (computed from the current
+price, never stored). Each process keeps its own copy and checks a Redis version key at
+most every CREDIT_CONFIG_CHECK_INTERVAL seconds; saving or deleting either
+model bumps the key (post_save / post_delete below), so every process
+reloads on its next check. Without Redis the copy is simply reloaded every
+CREDIT_CONFIG_FALLBACK_TTL seconds.
+
+The cached instances are shared: read them, never save them.
+"""
+
+import logging
+import threading
+import time
+from decimal import Decimal
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .credit_models import CreditCostsModel, CreditModel
+
+logger = logging.getLogger(__name__)
+
+
+VERSION_KEY = 'credit_config:version'
+CHECK_INTERVAL = getattr(settings, 'CREDIT_CONFIG_CHECK_INTERVAL', 1.0)
+FALLBACK_TTL = getattr(settings, 'CREDIT_CONFIG_FALLBACK_TTL', 30.0)
+
+_lock = threading.Lock()
+_cache = {
+    'config': None,         # {'credit': CreditModel|None, 'costs': CreditCostsModel|None}
+    'version': None,        # Redis version the config was loaded at
+    'loaded_at': 0.0,
+    'next_check': 0.0,
+}
+_redis = None
+
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            decode_responses=True,
+            socket_timeout=0.2,
+            socket_connect_timeout=0.2
+        )
+    return _redis
+
+
+def _remote_version():
+    """Current version from Redis, or None when Redis is unavailable"""
+    try:
+        return _get_redis().get(VERSION_KEY) or '0'
+    except redis.RedisError:
+        return None
+
+
+def _load():
+    return {
+        'credit': CreditModel.objects.first(),
+        'costs': CreditCostsModel.objects.first(),
+    }
+
+
+def get_credit_config():
+    """{'credit': CreditModel|None, 'costs': CreditCostsModel|None}, cached"""
+    now = time.monotonic()
+    with _lock:
+        config = _cache['config']
+        if config is not None and now < _cache['next_check']:
+            return config
+
+        version = _remote_version()
+        if version is None:
+            # Redis down: don't pay a connect timeout on every check
+            _cache['next_check'] = now + FALLBACK_TTL
+            stale = now - _cache['loaded_at'] >= FALLBACK_TTL
+        else:
+            _cache['next_check'] = now + CHECK_INTERVAL
+            stale = version != _cache['version']
+
+        if config is None or stale:
+            config = _cache['config'] = _load()
+            _cache['version'] = version
+            _cache['loaded_at'] = now
+            logger.info(f"💰 Credit config loaded (version {version})")
+        return config
+
+
+def get_credit_model():
+    return get_credit_config()['credit']
+
+
+def get_credit_costs():
+    return get_credit_config()['costs']
+
+
+def credit_price():
+    """CreditModel.value, the price UserCreditVault.total_value is computed at"""
+    credit_model = get_credit_model()
+    return credit_model.value if credit_model else Decimal('0')
+
+
+def with_total_value(queryset):
+    """
+    Annotate annotated_total_value (total_credits at the current credit price)
+    onto a UserCreditVault queryset, so it can be sorted or summed in SQL.
+    """
+    return queryset.annotate(annotated_total_value=ExpressionWrapper(
+        Coalesce(F('total_credits'), 0) * Value(credit_price()),
+        output_field=DecimalField(max_digits=14, decimal_places=2)
+    ))
+
+
+def credit_unit_value():
+    """Money value of one credit (CreditModel.value / CreditModel.credit)"""
+    credit_model = get_credit_model()
+    if not credit_model or not credit_model.credit:
+        return Decimal('0')
+    return credit_model.value / credit_model.credit
+
+
+def invalidate_credit_config():
+    """Drop this process's copy and bump the shared version for every other one"""
+    with _lock:
+        _cache['config'] = None
+    try:
+        _get_redis().incr(VERSION_KEY)
+    except redis.RedisError as e:
+        logger.warning(f"⚠️ Could not bump {VERSION_KEY}, other workers refresh within {FALLBACK_TTL}s: {e}")
+
+
+@receiver(post_save, sender=CreditModel)
+@receiver(post_save, sender=CreditCostsModel)
+@receiver(post_delete, sender=CreditModel)
+@receiver(post_delete, sender=CreditCostsModel)
+def _credit_config_changed(sender, **kwargs):
+    # After commit, so no worker reloads the old row in between
+    transaction.on_commit(invalidate_credit_config)
@@ -0,0 +1,152 @@
+# MainApplication/Credit/credit_grants.py
+"""
+Bulk credit grants and purchases (promotions, imports).
+
+Rows are (user, credits, reason) with an idempotency key; they are applied
+CHUNK_SIZE at a time, each chunk in one transaction: one SELECT ... FOR
+UPDATE of the vaults, one bulk_update and one bulk_create of the log
+entries (CreditLedger.grant_many). Replaying a file or request skips the
+rows whose key is already in the log, so an interrupted run is simply
+started again.
+
+Keys only live as long as their log rows: once a month is archived
+(credit_archive.py) its keys no longer block a replay.
+"""
+
+import csv
+import json
+import logging
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError
+
+from ..Authentication.models import User
+from .credit_ledger import CreditLedger
+
+logger = logging.getLogger(__name__)
+
+
+CHUNK_SIZE = 1000
+MAX_KEY_LENGTH = 150
+
+
+class GrantError(ValueError):
+    """A grant row that cannot be applied"""
+
+
+def read_grants(path):
+    """Yield grant rows (dicts) from a .csv (with a header line) or .jsonl file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def parse_grant(row, position, key_prefix=None):
+    """Validate one row -> {'user', 'credits', 'reason', 'key', 'value'}"""
+    user = str(row.get('user') or '').strip()
+    if not user:
+        raise GrantError(f"Row {position}: user is required")
+
+    try:
+        credits = int(row.get('credits'))
+    except (TypeError, ValueError):
+        raise GrantError(f"Row {position}: credits must be a whole number")
+    if credits <= 0:
+        raise GrantError(f"Row {position}: credits must be positive")
+
+    key = str(row.get('key') or '').strip()
+    if not key:
+        if not key_prefix:
+            raise GrantError(f"Row {position}: key is required (or give a batch key)")
+        key = f"{key_prefix}:{position}"
+    if len(key) > MAX_KEY_LENGTH:
+        raise GrantError(f"Row {position}: key is longer than {MAX_KEY_LENGTH} characters")
+
+    value = row.get('value')
+    if value not in (None, ''):
+        try:
+            value = Decimal(str(value))
+        except InvalidOperation:
+            raise GrantError(f"Row {position}: value must be a number")
+    else:
+        value = None
+
+    return {
+        'user': user,
+        'credits': credits,
+        'reason': str(row.get('reason') or '').strip() or 'Credit grant',
+        'key': key,
+        'value': value,
+    }
+
+
+def _resolve_users(grants):
+    """Fill in user_id for each grant (user = id or username); returns the unknown users"""
+    names = {grant['user'] for grant in grants}
+    ids = {int(name) for name in names if name.isdigit()}
+
+    by_username = dict(User.objects.filter(username__in=names).values_list('username', 'id'))
+    known_ids = set(User.objects.filter(id__in=ids).values_list('id', flat=True))
+
+    missing = []
+    for grant in grants:
+        user_id = by_username.get(grant['user'])
+        if user_id is None and grant['user'].isdigit() and int(grant['user']) in known_ids:
+            user_id = int(grant['user'])
+        grant['user_id'] = user_id
+        if user_id is None:
+            missing.append(grant['user'])
+    return missing
+
+
+def _apply_chunk(grants, transaction_type, purchased):
+    try:
+        return CreditLedger.grant_many(grants, transaction_type=transaction_type, purchased=purchased)
+    except IntegrityError:
+        # Same keys applied concurrently; the retry skips them
+        return CreditLedger.grant_many(grants, transaction_type=transaction_type, purchased=purchased)
+
+
+def apply_grants(rows, transaction_type='Gain', purchased=False, key_prefix=None,
+                 chunk_size=CHUNK_SIZE, dry_run=False):
+    """
+    Validate and apply grant rows (any iterable, read lazily).
+    Returns {'granted', 'skipped', 'credits', 'errors'}; invalid rows and
+    unknown users are reported in errors and not applied.
+    """
+    summary = {'granted': 0, 'skipped': 0, 'credits': 0, 'errors': []}
+
+    def flush(chunk):
+        for user in _resolve_users(chunk):
+            summary['errors'].append(f"Unknown user: {user}")
+        chunk = [grant for grant in chunk if grant['user_id'] is not None]
+        if not chunk:
+            return
+        if dry_run:
+            summary['granted'] += len(chunk)
+            summary['credits'] += sum(grant['credits'] for grant in chunk)
+            return
+        granted, skipped, credits = _apply_chunk(chunk, transaction_type, purchased)
+        summary['granted'] += granted
+        summary['skipped'] += skipped
+        summary['credits'] += credits
+
+    chunk = []
+    for position, row in enumerate(rows, start=1):
+        try:
+            chunk.append(parse_grant(row, position, key_prefix))
+        except GrantError as e:
+            summary['errors'].append(str(e))
+            continue
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    logger.info(f"💳 Bulk {transaction_type}: {summary['granted']} granted, {summary['skipped']} already applied, {len(summary['errors'])} error(s)")
+    return summary
@@ -0,0 +1,260 @@
+# MainApplication/Credit/credit_ledger.py
+"""
+Credit ledger: the only place that changes a UserCreditVault balance.
+
+Every spend is a single conditional statement
+
+    UPDATE vault SET total_credits = total_credits - n, ...
+    WHERE user_id = ? AND total_credits >= n
+
+so two concurrent requests can never both spend the same credits (the
+second one matches no row), and nothing is read into Python and written
+back. The CreditTransactionLog row is written in the same transaction.
+
+The log is the source of truth. The same UPDATE bumps the vault's
+last_sequence, so each user's entries are numbered 1, 2, 3... without gaps
+and every entry records balance_after. CreditBalanceSnapshot rows
+(manage.py snapshot_credit_balances) checkpoint the log, so any past
+balance is rebuilt from the nearest snapshot plus the entries after it.
+Months older than CREDIT_LEDGER_RETENTION_MONTHS are moved to files by
+manage.py archive_credit_transactions (see credit_archive.py).
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .credit_models import CreditBalanceSnapshot, CreditTransactionLog, UserCreditVault
+from .credit_config import credit_unit_value
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientCredits(Exception):
+    """Raised by CreditLedger.spend when the balance does not cover the amount"""
+
+    def __init__(self, required, available):
+        super().__init__(f'Insufficient credits. Need {required}, have {available}')
+        self.required = required
+        self.available = available
+
+
+class CreditLedger:
+    """spend() / grant() credits atomically and log them"""
+
+    @classmethod
+    def balance(cls, user):
+        return UserCreditVault.objects.filter(user=user).values_list('total_credits', flat=True).first() or 0
+
+    @classmethod
+    def spend(cls, user, amount, reason, transaction_type='Spend', value=None):
+        """
+        Take `amount` credits from the user's vault and return the new balance.
+        Raises InsufficientCredits (nothing is changed) when the balance is lower.
+        value: money value for the log (default: amount at the current credit value)
+        """
+        amount = int(amount)
+        if amount < 0:
+            raise ValueError('amount must not be negative')
+
+        with transaction.atomic():
+            updated = UserCreditVault.objects.filter(user=user, total_credits__gte=amount).update(
+                total_credits=F('total_credits') - amount,
+                spent_credits=Coalesce(F('spent_credits'), 0) + amount,
+                last_sequence=F('last_sequence') + 1,
+                updated_at=timezone.now()
+            )
+            if not updated:
+                raise InsufficientCredits(amount, cls.balance(user))
+
+            return cls._log(user, transaction_type, -amount, value, reason)
+
+    @classmethod
+    def grant(cls, user, amount, reason, transaction_type='Gain', purchased=False, value=None):
+        """Add `amount` credits (gained, or purchased) and return the new balance"""
+        amount = int(amount)
+        if amount < 0:
+            raise ValueError('amount must not be negative')
+
+        counter = 'purchased_credits' if purchased else 'gained_credits'
+
+        with transaction.atomic():
+            cls._ensure_vault(user)
+            UserCreditVault.objects.filter(user=user).update(**{
+                'total_credits': Coalesce(F('total_credits'), 0) + amount,
+                counter: Coalesce(F(counter), 0) + amount,
+                'last_sequence': F('last_sequence') + 1,
+                'updated_at': timezone.now(),
+            })
+
+            return cls._log(user, transaction_type, amount, value, reason)
+
+    @classmethod
+    def grant_many(cls, grants, transaction_type='Gain', purchased=False):
+        """
+        Apply one chunk of grants in a single transaction.
+        grants: dicts with user_id, credits, reason, key and optional value;
+        rows whose key is already in the log are skipped.
+        Returns (granted rows, skipped rows, credits granted).
+        """
+        counter = 'purchased_credits' if purchased else 'gained_credits'
+        unit_value = credit_unit_value()
+
+        with transaction.atomic():
+            seen = set(CreditTransactionLog.objects.filter(
+                idempotency_key__in=[grant['key'] for grant in grants]
+            ).values_list('idempotency_key', flat=True))
+            pending = []
+            for grant in grants:
+                if grant['key'] not in seen:
+                    seen.add(grant['key'])
+                    pending.append(grant)
+            if not pending:
+                return 0, len(grants), 0
+
+            user_ids = {grant['user_id'] for grant in pending}
+            existing = set(UserCreditVault.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+            UserCreditVault.objects.bulk_create(
+                [UserCreditVault(user_id=user_id, total_credits=0) for user_id in user_ids - existing],
+                ignore_conflicts=True
+            )
+            # Locked until commit: spend() on these users waits instead of being overwritten
+            vaults = {
+                vault.user_id: vault
+                for vault in UserCreditVault.objects.select_for_update().filter(user_id__in=user_ids)
+            }
+
+            now = timezone.now()
+            entries = []
+            for grant in pending:
+                vault = vaults[grant['user_id']]
+                credits = grant['credits']
+                vault.total_credits = (vault.total_credits or 0) + credits
+                setattr(vault, counter, (getattr(vault, counter) or 0) + credits)
+                vault.last_sequence += 1
+                vault.updated_at = now
+
+                value = grant.get('value')
+                entries.append(CreditTransactionLog(
+                    user_id=grant['user_id'],
+                    sequence=vault.last_sequence,
+                    transaction_type=transaction_type,
+                    credits_changed=credits,
+                    value_changed=value if value is not None else credits * unit_value,
+                    balance_after=vault.total_credits,
+                    description=grant['reason'],
+                    idempotency_key=grant['key']
+                ))
+
+            UserCreditVault.objects.bulk_update(
+                vaults.values(),
+                ['total_credits', counter, 'last_sequence', 'updated_at']
+            )
+            CreditTransactionLog.objects.bulk_create(entries)
+
+        logger.info(f"💳 {transaction_type}: {len(entries)} bulk grant(s) to {len(vaults)} user(s)")
+        return len(entries), len(grants) - len(entries), sum(entry.credits_changed for entry in entries)
+
+    @staticmethod
+    def _ensure_vault(user):
+        if UserCreditVault.objects.filter(user=user).exists():
+            return
+        try:
+            with transaction.atomic():
+                UserCreditVault.objects.create(user=user, total_credits=0)
+        except IntegrityError:
+            pass  # Created concurrently
+
+    @staticmethod
+    def _log(user, transaction_type, credits_changed, value, reason):
+        """Append the entry for the vault UPDATE just made (its row lock is held). Returns the balance"""
+        balance, sequence = UserCreditVault.objects.filter(user=user).values_list(
+            'total_credits', 'last_sequence'
+        ).get()
+        if value is None:
+            value = abs(credits_changed) * credit_unit_value()
+        CreditTransactionLog.objects.create(
+            user=user,
+            sequence=sequence,
+            transaction_type=transaction_type,
+            credits_changed=credits_changed,
+            value_changed=value if credits_changed >= 0 else -value,
+            balance_after=balance,
+            description=reason
+        )
+        logger.info(f"💳 {transaction_type}: {credits_changed:+d} credits for {user.pk} (#{sequence})")
+        return balance
+
+
+# ---------------------------------------------------------------------------
+# Snapshots / historical balances
+# ---------------------------------------------------------------------------
+
+SNAPSHOT_EVERY = getattr(settings, 'CREDIT_SNAPSHOT_EVERY', 500)
+
+
+def latest_snapshot(user, at=None):
+    """Newest snapshot (optionally taken at or before `at`), or None"""
+    snapshots = CreditBalanceSnapshot.objects.filter(user=user)
+    if at is not None:
+        snapshots = snapshots.filter(taken_at__lte=at)
+    return snapshots.order_by('-sequence').first()
+
+
+def balance_at(user, at=None):
+    """
+    The user's balance after every entry up to `at` (default: now), rebuilt
+    from the nearest snapshot and the entries after it, including archived ones.
+    """
+    from .credit_archive import archived_entries
+
+    snapshot = latest_snapshot(user, at)
+    balance = snapshot.balance if snapshot else 0
+    after_sequence = snapshot.sequence if snapshot else 0
+
+    entries = CreditTransactionLog.objects.filter(user=user, sequence__gt=after_sequence)
+    if at is not None:
+        entries = entries.filter(timestamp__lte=at)
+    balance += entries.aggregate(total=Sum('credits_changed'))['total'] or 0
+
+    # Entries after the snapshot that were already moved to archive files
+    since = snapshot.taken_at if snapshot else None
+    for entry in archived_entries(user.pk, since=since, until=at):
+        if entry['sequence'] > after_sequence:
+            balance += entry['credits_changed']
+    return balance
+
+
+def take_snapshot(user):
+    """
+    Checkpoint the user's log at its latest entry.
+    Returns (snapshot, vault_balance); they differ when the vault drifted from the log.
+    """
+    last = CreditTransactionLog.objects.filter(user=user).order_by('-sequence').first()
+    if last is None:
+        return None, CreditLedger.balance(user)
+
+    balance = balance_at(user, last.timestamp)
+    snapshot, _ = CreditBalanceSnapshot.objects.get_or_create(
+        user=user, sequence=last.sequence,
+        defaults={'balance': balance, 'taken_at': last.timestamp}
+    )
+
+    vault_balance, vault_sequence = UserCreditVault.objects.filter(user=user).values_list(
+        'total_credits', 'last_sequence'
+    ).first() or (0, 0)
+    if vault_sequence == snapshot.sequence and vault_balance != snapshot.balance:
+        logger.warning(f"⚠️ Credit vault of user {user.pk} drifted: vault {vault_balance}, log {snapshot.balance}")
+    return snapshot, vault_balance
+
+
+def users_due_for_snapshot(every=SNAPSHOT_EVERY):
+    """Vaults with at least `every` entries since their last snapshot"""
+    last_snapshot = CreditBalanceSnapshot.objects.filter(user=OuterRef('user')).order_by('-sequence').values('sequence')[:1]
+    return UserCreditVault.objects.annotate(
+        snapshot_sequence=Coalesce(Subquery(last_snapshot), 0)
+    ).filter(last_sequence__gte=F('snapshot_sequence') + every).select_related('user')
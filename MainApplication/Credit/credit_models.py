@@ -22,25 +22,20 @@ class CreditModel(models.Model):
 class UserCreditVault(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='credit_vault')
     total_credits = models.PositiveIntegerField(default=0,null=True, blank=True)
-    total_value = models.DecimalField(max_digits=10, decimal_places=2, default=0.00,null=True, blank=True)
     gained_credits = models.PositiveIntegerField(default=0,null=True, blank=True)
     spent_credits = models.PositiveIntegerField(default=0,null=True, blank=True)
     purchased_credits = models.PositiveIntegerField(default=0,null=True, blank=True)
+    last_sequence = models.PositiveBigIntegerField(default=0)  # sequence of the user's latest CreditTransactionLog
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
 
-    def save(self, *args, **kwargs):
-        # Fetch the single global CreditModel
-        credit_model = CreditModel.objects.first()
-        if credit_model:
-            # Automatically calculate total value
-            self.total_value = self.total_credits * credit_model.value
-        else:
-            # Fallback: no CreditModel defined
-            self.total_value = 0
-        super().save(*args, **kwargs)
+    @property
+    def total_value(self):
+        """Money value of the balance at the current credit price (not stored, see credit_config)"""
+        from .credit_config import credit_price
+        return (self.total_credits or 0) * credit_price()
 
 
     def __str__(self):
@@ -52,19 +47,77 @@ class UserCreditVault(models.Model):
         
     
 class CreditTransactionLog(models.Model):
+    """Append-only: rows are written by CreditLedger and never changed (old months are archived)"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='credit_transactions')
+    sequence = models.PositiveBigIntegerField(null=True, blank=True)  # 1, 2, 3... per user, no gaps
     transaction_type = models.CharField(max_length=50)  # e.g., Purchase, Spend, Gain
     credits_changed = models.IntegerField()  # Positive for gain/purchase, negative for spend
     value_changed = models.DecimalField(max_digits=10, decimal_places=2)  # Corresponding value change
+    balance_after = models.IntegerField(null=True, blank=True)  # User's balance once this entry applied
+    idempotency_key = models.CharField(max_length=150, null=True, blank=True)  # Client key of a bulk grant row
     timestamp = models.DateTimeField(auto_now_add=True)
     description = models.TextField(blank=True, null=True)
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError("Credit transactions are append-only.")
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.user.username} - {self.transaction_type} - Credits: {self.credits_changed}, Value: ₹ {self.value_changed} at {self.timestamp}"
     
     class Meta:
         verbose_name = 'Credit Transaction Log'
         verbose_name_plural = 'Credit Transaction Logs'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'sequence'], name='credit_log_user_sequence_uniq'),
+            models.UniqueConstraint(fields=['idempotency_key'], name='credit_log_idempotency_key_uniq'),
+        ]
+        indexes = [
+            # Statements: newest first per user
+            models.Index(fields=['user', '-timestamp', '-id'], name='credit_log_user_time_idx'),
+            # Archival by month
+            models.Index(fields=['timestamp'], name='credit_log_time_idx'),
+        ]
+
+
+class CreditBalanceSnapshot(models.Model):
+    """A user's balance right after their entry number `sequence`, rebuilt from the log"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='credit_snapshots')
+    sequence = models.PositiveBigIntegerField()
+    balance = models.IntegerField()
+    taken_at = models.DateTimeField()  # timestamp of the entry at `sequence`
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user.username} - #{self.sequence}: {self.balance} credits"
+
+    class Meta:
+        verbose_name = 'Credit Balance Snapshot'
+        verbose_name_plural = 'Credit Balance Snapshots'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'sequence'], name='credit_snapshot_user_sequence_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-taken_at'], name='credit_snapshot_user_time_idx'),
+        ]
+
+
+class CreditLedgerArchive(models.Model):
+    """One month of CreditTransactionLog moved to a gzipped JSON-lines file"""
+    month = models.DateField(unique=True)  # first day of the month
+    path = models.CharField(max_length=500)
+    row_count = models.PositiveIntegerField(default=0)
+    sha256 = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.month:%Y-%m}: {self.row_count} transactions"
+
+    class Meta:
+        verbose_name = 'Credit Ledger Archive'
+        verbose_name_plural = 'Credit Ledger Archives'
+        ordering = ['month']
     
 
 
@@ -0,0 +1,9 @@
+from rest_framework import serializers
+
+from .credit_models import CreditTransactionLog
+
+
+class CreditTransactionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CreditTransactionLog
+        fields = ['sequence', 'transaction_type', 'credits_changed', 'value_changed', 'balance_after', 'timestamp', 'description']
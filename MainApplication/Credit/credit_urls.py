@@ -0,0 +1,11 @@
+# credits/credit_urls.py
+from django.urls import path
+from . import credit_views
+
+
+app_name = 'credits'
+
+urlpatterns = [
+    path('statement/', credit_views.CreditStatementView.as_view(), name='credit-statement'),
+    path('grants/', credit_views.CreditGrantView.as_view(), name='credit-grants'),
+]
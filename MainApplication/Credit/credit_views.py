@@ -0,0 +1,110 @@
+# credits/credit_views.py
+from datetime import datetime
+
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from ..Authentication.models import User
+from ..pagination import KeysetPaginator, InvalidCursor
+from .credit_grants import apply_grants
+from .credit_ledger import CreditLedger
+from .credit_models import CreditLedgerArchive, CreditTransactionLog
+from .credit_serializers import CreditTransactionSerializer
+
+
+def _parse_date(value):
+    moment = datetime.fromisoformat(value)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+class CreditStatementView(APIView):
+    """
+    GET: A user's credit transactions, newest first (cursor paginated).
+    ?from=&to= (ISO dates) limit the range; staff may pass ?user_id=.
+    Walks the (user, -timestamp, -id) index; no COUNT query.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        user_id = request.query_params.get('user_id')
+        if user_id and request.user.is_staff:
+            user = get_object_or_404(User, pk=user_id)
+
+        entries = CreditTransactionLog.objects.filter(user=user)
+        try:
+            if request.query_params.get('from'):
+                entries = entries.filter(timestamp__gte=_parse_date(request.query_params['from']))
+            if request.query_params.get('to'):
+                entries = entries.filter(timestamp__lt=_parse_date(request.query_params['to']))
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'from / to must be ISO dates'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = KeysetPaginator(request, created_field='timestamp')
+        try:
+            page = paginator.paginate_queryset(entries)
+        except InvalidCursor as e:
+            return Response({
+                'success': False,
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        archived = CreditLedgerArchive.objects.values_list('month', flat=True)
+        return Response({
+            'success': True,
+            'balance': CreditLedger.balance(user),
+            'count': len(page),
+            'transactions': CreditTransactionSerializer(page, many=True).data,
+            'next_cursor': paginator.next_cursor,
+            'has_more': paginator.has_more,
+            # Months no longer in the live table (kept in archive files)
+            'archived_months': [f"{month:%Y-%m}" for month in archived],
+        }, status=status.HTTP_200_OK)
+
+
+class CreditGrantView(APIView):
+    """
+    POST: Grant (or sell) credits to many users at once - admin only.
+    {"grants": [{"user", "credits", "reason", "key"}], "purchased": false,
+     "transaction_type": "Gain", "idempotency_key": "<batch key>"}
+    Rows without their own key use "<batch key>:<row number>"; resending the
+    same request skips rows that were already applied.
+    Use manage.py grant_credits for files larger than MAX_GRANTS_PER_REQUEST.
+    """
+    permission_classes = [IsAdminUser]
+    MAX_GRANTS_PER_REQUEST = 10000
+
+    def post(self, request):
+        grants = request.data.get('grants')
+        if not isinstance(grants, list) or not grants:
+            return Response({
+                'success': False,
+                'error': 'grants must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(grants) > self.MAX_GRANTS_PER_REQUEST:
+            return Response({
+                'success': False,
+                'error': f'At most {self.MAX_GRANTS_PER_REQUEST} grants per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        purchased = bool(request.data.get('purchased', False))
+        summary = apply_grants(
+            [grant if isinstance(grant, dict) else {} for grant in grants],
+            transaction_type=request.data.get('transaction_type') or ('Purchase' if purchased else 'Gain'),
+            purchased=purchased,
+            key_prefix=request.data.get('idempotency_key')
+        )
+
+        return Response({
+            'success': not summary['errors'],
+            **summary
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,546 @@
+# MainApplication/Post/chunked_upload.py
+"""
+Resumable chunked uploads for media posts.
+
+Protocol (tus-like, offsets in bytes):
+
+    POST   /api/posts/uploads/                 {media_type, filename, size, content_type}
+                                               -> upload_id, offset=0, max_chunk_size
+    PATCH  /api/posts/uploads/<upload_id>/     raw bytes, header Upload-Offset: <offset>
+                                               -> new offset (409 + current offset on mismatch)
+    GET    /api/posts/uploads/<upload_id>/     -> current offset, to resume after a dropped connection
+    DELETE /api/posts/uploads/<upload_id>/     -> abort
+    POST   /api/posts/uploads/commit/          {post_type, caption, upload_ids: [...]}
+                                               -> the created post
+
+Chunks are streamed from the request into a spool file under
+CHUNKED_UPLOAD_DIR (never buffered whole) while a SHA-256 is updated, then
+copied into the part file under a brief row lock, so a dropped connection
+keeps every byte that arrived and the hash is ready when the last chunk
+lands. The running hash lives in this process; a chunk that
+lands on another process re-hashes the part already on disk once.
+
+As soon as one file is complete it is checked in the background while
+the rest of the post is still uploading: the full NudeNet check in
+synchronous mode (the verdict cache makes the check at commit a lookup), the
+validation stage only with CONTENT_MODERATION_ASYNC (NudeNet stays in the
+worker). A rejection is reported by GET and makes the commit fail early.
+A video is also scanned while it is still arriving: every
+CHUNKED_UPLOAD_PREFIX_CHECK_BYTES the frames received so far go through
+NudeNet (synchronous mode only). A rejection there stops the upload, later
+chunks are refused; a pass is not stored, the whole file is checked once
+complete.
+
+On commit the sessions are claimed first (complete -> committing, a
+conditional UPDATE), so a retried commit cannot create a second post; the
+files are then handed to PostCreateSerializer as uploads with a
+temporary_file_path(), so storage moves them into MEDIA_ROOT instead of
+copying them through memory. A commit retried after success gets the post
+back (UploadSession.post).
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .post_models import Post, UploadSession
+from .post_content_moderator import (
+    ImageModerationService, SimpleImageValidator, validate_image_upload
+)
+from .video_content_moderator import (
+    NudeNetVideoModerator, VideoModerationService, VideoValidator, validate_video_upload
+)
+from .post_moderation import is_async_moderation_enabled
+
+logger = logging.getLogger(__name__)
+
+
+CHUNKED_UPLOAD_DIR = getattr(
+    settings, 'CHUNKED_UPLOAD_DIR', os.path.join(settings.BASE_DIR, 'upload_sessions')
+)
+MAX_CHUNK_SIZE = getattr(settings, 'CHUNKED_UPLOAD_MAX_CHUNK_SIZE', 5 * 1024 * 1024)
+UPLOAD_SESSION_TTL = timedelta(hours=getattr(settings, 'CHUNKED_UPLOAD_TTL_HOURS', 24))
+COMMIT_CLAIM_TTL = timedelta(minutes=10)
+MODERATE_ON_UPLOAD = getattr(settings, 'CONTENT_MODERATION_ON_UPLOAD', True)
+EARLY_CHECK_THREADS = getattr(settings, 'CHUNKED_UPLOAD_CHECK_THREADS', 2)
+PREFIX_CHECK_BYTES = getattr(settings, 'CHUNKED_UPLOAD_PREFIX_CHECK_BYTES', 4 * 1024 * 1024)
+MAX_IMAGES_PER_POST = 5
+
+READ_SIZE = 64 * 1024
+MAX_CACHED_HASHERS = 256
+
+_hashers = OrderedDict()    # upload_id -> (offset, sha256 object)
+_hashers_lock = threading.Lock()
+_early_checks = {}          # upload_id -> Future of the early moderation check
+_prefix_checks = {}         # upload_id -> Future of the scan of a video still arriving
+_early_checks_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """Rejected upload request; status is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+VALIDATORS = {
+    'image': SimpleImageValidator,
+    'video': VideoValidator,
+}
+
+
+def session_path(session):
+    return os.path.join(CHUNKED_UPLOAD_DIR, f"{session.upload_id}.part")
+
+
+def describe_session(session):
+    """Client view of an upload session"""
+    early = session.moderation_result or {}
+    return {
+        'upload_id': str(session.upload_id),
+        'media_type': session.media_type,
+        'filename': session.filename,
+        'size': session.size,
+        'offset': session.offset,
+        'status': session.status,
+        'max_chunk_size': MAX_CHUNK_SIZE,
+        'moderation': {'is_safe': early['is_safe'], 'message': early['message']} if early else None,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Session lifecycle
+# ---------------------------------------------------------------------------
+
+def create_session(user, media_type, filename, size, content_type=''):
+    """Start an upload; format and size are checked before any byte is sent"""
+    validator = VALIDATORS.get(media_type)
+    if validator is None:
+        raise UploadError("media_type must be 'image' or 'video'")
+
+    filename = os.path.basename(filename or '')
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in validator.ALLOWED_EXTENSIONS:
+        raise UploadError(f'Invalid format: {ext}. Allowed: {", ".join(validator.ALLOWED_EXTENSIONS)}')
+    if content_type and content_type not in validator.ALLOWED_MIME_TYPES:
+        raise UploadError(f'Invalid content type: {content_type}')
+
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('size must be the file size in bytes')
+    if size <= 0:
+        raise UploadError('size must be the file size in bytes')
+    if size > validator.MAX_SIZE:
+        raise UploadError(f'File too large: {round(size / (1024 * 1024), 2)}MB (max {validator.MAX_SIZE // (1024 * 1024)}MB)')
+
+    session = UploadSession.objects.create(
+        user=user,
+        media_type=media_type,
+        filename=filename,
+        content_type=content_type or '',
+        size=size
+    )
+
+    os.makedirs(CHUNKED_UPLOAD_DIR, exist_ok=True)
+    open(session_path(session), 'wb').close()
+
+    logger.info(f"📤 Upload {session.upload_id} started: {filename} ({size} bytes)")
+    return session
+
+
+def get_session(user, upload_id):
+    try:
+        return UploadSession.objects.get(upload_id=upload_id, user=user)
+    except UploadSession.DoesNotExist:
+        raise UploadError('Upload not found', status=404)
+
+
+def abort_session(session):
+    session.status = 'aborted'
+    session.save(update_fields=['status', 'updated_at'])
+    _discard(session)
+
+
+def _discard(session):
+    with _hashers_lock:
+        _hashers.pop(session.upload_id, None)
+    with _early_checks_lock:
+        _early_checks.pop(session.upload_id, None)
+        _prefix_checks.pop(session.upload_id, None)
+    try:
+        os.remove(session_path(session))
+    except FileNotFoundError:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Appending chunks
+# ---------------------------------------------------------------------------
+
+def _resume_hasher(session, path):
+    """SHA-256 state at session.offset: cached in this process, else rebuilt from disk"""
+    with _hashers_lock:
+        cached = _hashers.get(session.upload_id)
+    if cached is not None and cached[0] == session.offset:
+        return cached[1].copy()
+
+    hasher = hashlib.sha256()
+    remaining = session.offset
+    with open(path, 'rb') as f:
+        while remaining > 0:
+            block = f.read(min(READ_SIZE, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def _remember_hasher(session, hasher):
+    with _hashers_lock:
+        _hashers[session.upload_id] = (session.offset, hasher)
+        _hashers.move_to_end(session.upload_id)
+        while len(_hashers) > MAX_CACHED_HASHERS:
+            _hashers.popitem(last=False)
+
+
+def append_chunk(user, upload_id, offset, stream, length):
+    """
+    Write `length` bytes from `stream` at `offset`.
+    Whatever arrives before a dropped connection is kept; the client resumes
+    from the returned offset.
+
+    The body is read into a spool file with no transaction open. Only copying
+    it into the part file and advancing the offset (UPDATE ... WHERE
+    offset = <expected>) run under the row lock, so a slow client never holds
+    it and of two chunks sent for the same offset only one lands.
+    """
+    try:
+        offset = int(offset)
+        length = int(length)
+    except (TypeError, ValueError):
+        raise UploadError('Upload-Offset and Content-Length headers are required')
+
+    session = UploadSession.objects.filter(upload_id=upload_id, user=user).first()
+    _check_chunk(session, offset, length)
+
+    path = session_path(session)
+    if not os.path.exists(path):
+        raise UploadError('Upload expired', status=410)
+
+    hasher = _resume_hasher(session, path)
+    spool_path = f"{path}.{uuid.uuid4().hex}.chunk"
+    received = 0
+    try:
+        with open(spool_path, 'wb') as spool:
+            try:
+                while received < length:
+                    block = stream.read(min(READ_SIZE, length - received))
+                    if not block:
+                        break
+                    spool.write(block)
+                    hasher.update(block)
+                    received += len(block)
+            except OSError as e:
+                logger.warning(f"⚠️ Upload {upload_id} interrupted after {received} bytes: {e}")
+        if not received:
+            return session
+
+        new_offset = offset + received
+        changes = {'offset': new_offset, 'updated_at': timezone.now()}
+        if new_offset == session.size:
+            changes.update(sha256=hasher.hexdigest(), status='complete')
+
+        with transaction.atomic():
+            advanced = UploadSession.objects.filter(
+                pk=session.pk, status='uploading', offset=offset
+            ).update(**changes)
+            if not advanced:
+                # Another chunk for this offset won (or the upload was aborted meanwhile)
+                _check_chunk(UploadSession.objects.filter(pk=session.pk).first(), offset, length)
+                raise UploadError('Offset mismatch', status=409, offset=session.offset)
+
+            with open(spool_path, 'rb') as spool, open(path, 'r+b') as f:
+                f.seek(offset)
+                shutil.copyfileobj(spool, f, READ_SIZE)
+                f.truncate(new_offset)
+    finally:
+        try:
+            os.remove(spool_path)
+        except FileNotFoundError:
+            pass
+
+    for field, value in changes.items():
+        setattr(session, field, value)
+    _remember_hasher(session, hasher)
+
+    if session.status == 'complete':
+        logger.info(f"📦 Upload {session.upload_id} complete ({session.size} bytes)")
+        transaction.on_commit(lambda: start_early_check(session))
+    elif offset // PREFIX_CHECK_BYTES != session.offset // PREFIX_CHECK_BYTES:
+        transaction.on_commit(lambda: start_prefix_check(session))
+
+    return session
+
+
+def _check_chunk(session, offset, length):
+    """Raise UploadError unless a chunk of `length` bytes may be written at `offset`"""
+    if session is None:
+        raise UploadError('Upload not found', status=404)
+    if session.status != 'uploading':
+        raise UploadError(f'Upload is {session.status}', status=409, offset=session.offset)
+    if offset != session.offset:
+        raise UploadError('Offset mismatch', status=409, offset=session.offset)
+    if length <= 0 or length > MAX_CHUNK_SIZE:
+        raise UploadError(f'Chunk size must be 1..{MAX_CHUNK_SIZE} bytes', offset=session.offset)
+    if offset + length > session.size:
+        raise UploadError('Chunk goes past the declared size', offset=session.offset)
+    early = session.moderation_result
+    if early and not early['is_safe']:
+        raise UploadError(f"{session.filename}: {early['message']}", offset=session.offset)
+
+
+# ---------------------------------------------------------------------------
+# Files and early moderation
+# ---------------------------------------------------------------------------
+
+class SessionFile(UploadedFile):
+    """A complete upload session, shaped like a TemporaryUploadedFile"""
+
+    def __init__(self, session):
+        self._path = session_path(session)
+        self.sha256 = session.sha256  # Computed while the chunks arrived (see file_sha256)
+        super().__init__(
+            open(self._path, 'rb'), session.filename, session.content_type or None, session.size, None
+        )
+
+    def temporary_file_path(self):
+        return self._path
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            # Storage moved the file into MEDIA_ROOT
+            pass
+
+
+def get_early_check_executor():
+    """
+    Pool for early checks, recreated after fork. Separate from the moderation
+    pool: check_images() itself waits on tasks submitted to that one.
+    """
+    global _executor, _executor_pid
+    
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=EARLY_CHECK_THREADS, thread_name_prefix='upload-check')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _early_check(session):
+    if session.media_type == 'image':
+        if is_async_moderation_enabled():
+            return validate_image_upload
+        return lambda f: ImageModerationService().check_images([f])[0]
+    if is_async_moderation_enabled():
+        return validate_video_upload
+    return VideoModerationService().check_video
+
+
+def start_early_check(session):
+    """Check a complete upload on the moderation pool while the rest of the post arrives"""
+    if not MODERATE_ON_UPLOAD:
+        return None
+    future = get_early_check_executor().submit(_run_early_check, session.pk)
+    with _early_checks_lock:
+        _early_checks[session.upload_id] = future
+    return future
+
+
+def _run_early_check(session_pk):
+    try:
+        close_old_connections()
+        session = UploadSession.objects.get(pk=session_pk)
+        media_file = SessionFile(session)
+        try:
+            result = _early_check(session)(media_file)
+        finally:
+            media_file.close()
+
+        early = {'is_safe': result['is_safe'], 'message': result['message'], 'stage': result.get('stage')}
+        UploadSession.objects.filter(pk=session_pk).update(moderation_result=early)
+        logger.info(f"{'✅' if early['is_safe'] else '❌'} Early check of upload {session.upload_id}: {early['message']}")
+        return early
+    except Exception as e:
+        # Not a verdict: the post is checked again at commit / by the worker
+        logger.error(f"❌ Early check of upload {session_pk} failed: {e}")
+        return None
+    finally:
+        connection.close()
+
+
+def start_prefix_check(session):
+    """Scan the frames of a video received so far; one scan per upload at a time"""
+    if not MODERATE_ON_UPLOAD or session.media_type != 'video' or is_async_moderation_enabled():
+        return None
+    with _early_checks_lock:
+        running = _prefix_checks.get(session.upload_id)
+        if running is not None and not running.done():
+            return None  # The next step scans the bytes that arrive meanwhile
+        future = get_early_check_executor().submit(_run_prefix_check, session.pk, session.offset)
+        _prefix_checks[session.upload_id] = future
+    return future
+
+
+def _run_prefix_check(session_pk, received):
+    try:
+        close_old_connections()
+        session = UploadSession.objects.get(pk=session_pk)
+        media_file = SessionFile(session)
+        try:
+            result = NudeNetVideoModerator().check_video(media_file)
+        finally:
+            media_file.close()
+
+        # Only a decided rejection counts: a truncated file often fails to decode
+        if result.get('details', {}).get('decision') != 'rejected':
+            return None
+        early = {'is_safe': False, 'message': result['message'], 'stage': 'moderation', 'prefix': received}
+        UploadSession.objects.filter(pk=session_pk, status='uploading').update(moderation_result=early)
+        logger.info(f"❌ Prefix check of upload {session.upload_id} ({received} bytes): {early['message']}")
+        return early
+    except Exception as e:
+        logger.error(f"❌ Prefix check of upload {session_pk} failed: {e}")
+        return None
+    finally:
+        connection.close()
+
+
+def wait_for_early_check(session, timeout=None):
+    """Early result of a session, waiting for a check still running in this process"""
+    with _early_checks_lock:
+        future = _early_checks.pop(session.upload_id, None)
+    if future is not None:
+        try:
+            future.result(timeout=timeout)
+        except Exception:
+            pass
+        session.refresh_from_db(fields=['moderation_result'])
+    return session.moderation_result
+
+
+# ---------------------------------------------------------------------------
+# Commit
+# ---------------------------------------------------------------------------
+
+def committed_post(user, upload_ids):
+    """The post these uploads were already committed to (a retried commit), or None"""
+    upload_ids = set(str(u) for u in upload_ids)
+    post_ids = list(UploadSession.objects.filter(
+        user=user, upload_id__in=upload_ids, status='committed'
+    ).values_list('post_id', flat=True))
+    if len(post_ids) != len(upload_ids) or len(set(post_ids)) != 1 or post_ids[0] is None:
+        return None
+    return Post.objects.filter(pk=post_ids[0], is_deleted=False).first()
+
+
+def commit_sessions(user, post_type, upload_ids, timeout=None):
+    """
+    Claim complete sessions for one post, in upload_ids order.
+    Returns (sessions, files, rejection message or None). The sessions stay
+    'committing' until finish_sessions(); they are released here on a
+    rejection, on any later failure the caller must release_sessions().
+    """
+    if post_type not in VALIDATORS:
+        raise UploadError("post_type must be 'image' or 'video'")
+    if not upload_ids:
+        raise UploadError('upload_ids is required')
+    if post_type == 'video' and len(upload_ids) != 1:
+        raise UploadError('A video post takes exactly one upload')
+    if post_type == 'image' and len(upload_ids) > MAX_IMAGES_PER_POST:
+        raise UploadError(f'Maximum {MAX_IMAGES_PER_POST} images allowed')
+
+    sessions = []
+    for upload_id in dict.fromkeys(str(u) for u in upload_ids):
+        session = get_session(user, upload_id)
+        if session.media_type != post_type:
+            raise UploadError(f'Upload {upload_id} is not a {post_type}')
+        sessions.append(session)
+
+    # Conditional UPDATE: of two concurrent commits of the same upload only one goes on
+    with transaction.atomic():
+        for session in sessions:
+            claimed = UploadSession.objects.filter(pk=session.pk, status='complete').update(
+                status='committing', updated_at=timezone.now()
+            )
+            if not claimed:
+                session.refresh_from_db(fields=['status', 'offset'])
+                raise UploadError(f'Upload {session.upload_id} is {session.status}', status=409, offset=session.offset)
+            session.status = 'committing'
+
+    try:
+        for session in sessions:
+            early = wait_for_early_check(session, timeout)
+            if early and not early['is_safe']:
+                release_sessions(sessions)
+                return sessions, [], f"{session.filename}: {early['message']}"
+
+        return sessions, [SessionFile(session) for session in sessions], None
+    except Exception:
+        release_sessions(sessions)
+        raise
+
+
+def finish_sessions(sessions, post):
+    """Mark claimed sessions committed to `post`; call inside the post's transaction"""
+    UploadSession.objects.filter(pk__in=[session.pk for session in sessions]).update(
+        status='committed', post=post, updated_at=timezone.now()
+    )
+    for session in sessions:
+        session.status = 'committed'
+        # The part files were moved by storage; drop what is left once the post is saved
+        transaction.on_commit(lambda session=session: _discard(session))
+
+
+def release_sessions(sessions):
+    """Give up a commit claim; a session whose file storage already moved cannot be committed again"""
+    for session in sessions:
+        still_there = os.path.exists(session_path(session))
+        UploadSession.objects.filter(pk=session.pk, status='committing').update(
+            status='complete' if still_there else 'aborted', updated_at=timezone.now()
+        )
+        session.status = 'complete' if still_there else 'aborted'
+
+
+def prune_stale_uploads():
+    """Release commit claims of dead requests; delete sessions (and part files) untouched for UPLOAD_SESSION_TTL"""
+    release_sessions(UploadSession.objects.filter(
+        status='committing', updated_at__lt=timezone.now() - COMMIT_CLAIM_TTL
+    ))
+
+    stale = UploadSession.objects.filter(updated_at__lt=timezone.now() - UPLOAD_SESSION_TTL)
+    count = 0
+    for session in stale.iterator():
+        _discard(session)
+        count += 1
+    stale.delete()
+    return count
@@ -0,0 +1,104 @@
+# MainApplication/Post/detector_registry.py
+"""
+Process-wide NudeNet detector registry.
+
+Loading the ONNX model is the slowest part of moderation, so the
+NudeDetector session is created once per process and shared by every
+moderator instance (onnxruntime sessions are safe to call from several
+threads). The registry remembers the pid it loaded in, so a session
+inherited through fork() is replaced by a fresh one in the child.
+
+Warm-up options:
+    - settings.CONTENT_MODERATION_PRELOAD = True  -> loaded from AppConfig.ready()
+    - gunicorn.conf.py:
+          from MainApplication.Post.detector_registry import post_fork
+"""
+
+import os
+import time
+import logging
+import threading
+
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+_lock = threading.Lock()
+_detector = None
+_detector_pid = None
+
+_metrics = {
+    'loads': 0,
+    'load_failures': 0,
+    'last_load_seconds': None,
+    'total_load_seconds': 0.0,
+    'loaded_at': None,
+    'reuses': 0,
+}
+
+
+def get_detector():
+    """Return the shared NudeDetector, loading it on first use in this process"""
+    global _detector, _detector_pid
+
+    if _detector is not None and _detector_pid == os.getpid():
+        with _lock:
+            _metrics['reuses'] += 1
+        return _detector
+
+    with _lock:
+        # Another thread may have loaded it while we waited
+        if _detector is not None and _detector_pid == os.getpid():
+            _metrics['reuses'] += 1
+            return _detector
+
+        logger.info("⏳ Loading NudeNet detector...")
+        started = time.perf_counter()
+        try:
+            from nudenet import NudeDetector
+            detector = NudeDetector()
+        except Exception:
+            _metrics['load_failures'] += 1
+            raise
+
+        elapsed = time.perf_counter() - started
+        _detector = detector
+        _detector_pid = os.getpid()
+
+        _metrics['loads'] += 1
+        _metrics['last_load_seconds'] = round(elapsed, 4)
+        _metrics['total_load_seconds'] = round(_metrics['total_load_seconds'] + elapsed, 4)
+        _metrics['loaded_at'] = timezone.now().isoformat()
+
+        logger.info(f"✓ NudeNet detector loaded in {elapsed:.2f}s (pid {_detector_pid})")
+        return _detector
+
+
+def warm_up():
+    """Load the detector now instead of on the first upload"""
+    try:
+        get_detector()
+    except Exception as e:
+        logger.error(f"❌ NudeNet warm-up failed: {e}")
+
+
+def warm_up_in_background():
+    """Start warm_up() without blocking process startup"""
+    thread = threading.Thread(target=warm_up, name='nudenet-warm-up', daemon=True)
+    thread.start()
+    return thread
+
+
+def post_fork(server, worker):
+    """gunicorn hook: give every worker its own warm session"""
+    warm_up()
+
+
+def get_detector_metrics():
+    """Load-time and session-reuse counters for this process"""
+    with _lock:
+        metrics = dict(_metrics)
+    metrics['loaded'] = _detector is not None and _detector_pid == os.getpid()
+    metrics['pid'] = os.getpid()
+    return metrics
@@ -0,0 +1,232 @@
+# MainApplication/Post/image_derivatives.py
+"""
+Responsive image derivatives for post images.
+
+Once a post is approved every PostImage gets WebP (and AVIF, when Pillow
+was built with it) variants at a few widths, stored next to the original
+under posts/images/derived/<image_id>/, plus a BlurHash placeholder.
+PostImageSerializer exposes them as a srcset map so feed clients never have
+to download the full-resolution original.
+
+    PostImage.derivatives = {
+        'width': 4032, 'height': 3024,
+        'variants': {
+            'thumb':  {'width': 320,  'height': 240,  'webp': '<name>', 'avif': '<name>'},
+            'medium': {'width': 1080, 'height': 810,  ...},
+            'full':   {'width': 2048, 'height': 1536, ...},
+        },
+    }
+"""
+
+import io
+import logging
+import math
+
+import numpy as np
+from PIL import Image, ImageOps, features
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+
+# Longest side of each variant; an image is never upscaled
+DERIVATIVE_SIZES = getattr(settings, 'IMAGE_DERIVATIVE_SIZES', {
+    'thumb': 320,
+    'medium': 1080,
+    'full': 2048,
+})
+
+DERIVATIVE_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'avif': {'format': 'AVIF', 'quality': 60, 'speed': 8},
+}
+
+DERIVED_DIR = 'posts/images/derived'
+
+BLURHASH_COMPONENTS = (4, 3)
+BLURHASH_SAMPLE_SIZE = 32
+
+
+def available_formats():
+    """Derivative formats this Pillow build can encode, in preference order"""
+    wanted = getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', ['avif', 'webp'])
+    return [fmt for fmt in wanted if fmt in DERIVATIVE_FORMATS and features.check(fmt)]
+
+
+# ---------------------------------------------------------------------------
+# BlurHash (https://blurha.sh)
+# ---------------------------------------------------------------------------
+
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _encode83(value, length):
+    return ''.join(_BASE83[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1))
+
+
+def _srgb_to_linear(values):
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+def _linear_to_srgb(value):
+    value = min(1.0, max(0.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value, exponent):
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def blurhash_encode(image, x_components=BLURHASH_COMPONENTS[0], y_components=BLURHASH_COMPONENTS[1]):
+    """BlurHash string for a PIL image (computed on a small copy)"""
+    small = image.convert('RGB')
+    small.thumbnail((BLURHASH_SAMPLE_SIZE, BLURHASH_SAMPLE_SIZE))
+    linear = _srgb_to_linear(np.asarray(small, dtype=np.float64) / 255)
+    height, width = linear.shape[:2]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            basis = np.outer(
+                np.cos(np.pi * j * np.arange(height) / height),
+                np.cos(np.pi * i * np.arange(width) / width)
+            )
+            factor = normalisation * (linear * basis[:, :, None]).sum(axis=(0, 1)) / (width * height)
+            factors.append(factor)
+
+    dc, ac = factors[0], factors[1:]
+
+    result = _encode83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(value) for factor in ac for value in factor)
+        quantised_max = int(max(0, min(82, math.floor(actual_max * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+    else:
+        quantised_max, max_value = 0, 1
+    result += _encode83(quantised_max, 1)
+
+    r, g, b = (_linear_to_srgb(c) for c in dc)
+    result += _encode83((r << 16) + (g << 8) + b, 4)
+
+    for factor in ac:
+        qr, qg, qb = (
+            int(max(0, min(18, math.floor(_sign_pow(c / max_value, 0.5) * 9 + 9.5))))
+            for c in factor
+        )
+        result += _encode83(qr * 19 * 19 + qg * 19 + qb, 2)
+
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Derivatives
+# ---------------------------------------------------------------------------
+
+def _variant_dimensions(width, height, longest):
+    scale = min(1.0, longest / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _encode(image, fmt):
+    options = dict(DERIVATIVE_FORMATS[fmt])
+    pil_format = options.pop('format')
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def _store(storage, name, data):
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(data))
+
+
+def generate_derivatives(post_image):
+    """Create and store the variants and BlurHash of one PostImage"""
+    storage = post_image.image.storage
+    formats = available_formats()
+
+    post_image.image.open('rb')
+    try:
+        with Image.open(post_image.image) as original:
+            original = ImageOps.exif_transpose(original)
+            mode = 'RGBA' if 'A' in original.getbands() else 'RGB'
+            source = original.convert(mode)
+    finally:
+        post_image.image.close()
+
+    width, height = source.size
+    variants = {}
+    seen_dimensions = set()
+
+    for size_name, longest in sorted(DERIVATIVE_SIZES.items(), key=lambda item: item[1]):
+        dimensions = _variant_dimensions(width, height, longest)
+        if dimensions in seen_dimensions:
+            continue  # Small originals: no identical larger variants
+        seen_dimensions.add(dimensions)
+
+        resized = source if dimensions == source.size else source.resize(dimensions, Image.LANCZOS)
+        variant = {'width': dimensions[0], 'height': dimensions[1]}
+        for fmt in formats:
+            name = f"{DERIVED_DIR}/{post_image.image_id}/{size_name}.{fmt}"
+            variant[fmt] = _store(storage, name, _encode(resized, fmt))
+        variants[size_name] = variant
+
+    post_image.derivatives = {'width': width, 'height': height, 'variants': variants}
+    post_image.blurhash = blurhash_encode(source)
+    post_image.save(update_fields=['derivatives', 'blurhash'])
+
+    logger.info(f"🖼️ Derivatives for image {post_image.image_id}: {', '.join(variants)} ({', '.join(formats)})")
+    return post_image.derivatives
+
+
+def generate_post_derivatives(post):
+    """Derivatives for every image of a post; failures are logged, not raised"""
+    generated = 0
+    for post_image in post.images.all():
+        try:
+            generate_derivatives(post_image)
+            generated += 1
+        except Exception as e:
+            logger.error(f"❌ Derivatives failed for image {post_image.image_id}: {e}")
+    return generated
+
+
+def derivative_srcset(post_image, build_url):
+    """
+    {'avif': 'url 320w, url 1080w', 'webp': ...} for a PostImage, or None.
+    build_url turns a storage URL into what the client should see.
+    """
+    derivatives = post_image.derivatives or {}
+    variants = derivatives.get('variants') or {}
+    if not variants:
+        return None
+
+    storage = post_image.image.storage
+    srcset = {}
+    for variant in sorted(variants.values(), key=lambda v: v['width']):
+        for fmt in DERIVATIVE_FORMATS:
+            if fmt in variant:
+                srcset.setdefault(fmt, []).append(f"{build_url(storage.url(variant[fmt]))} {variant['width']}w")
+    return {fmt: ', '.join(entries) for fmt, entries in srcset.items()}
+
+
+def derivative_urls(post_image, build_url):
+    """{'thumb': {'width', 'height', 'webp': url, 'avif': url}, ...} for a PostImage, or None"""
+    variants = (post_image.derivatives or {}).get('variants') or {}
+    if not variants:
+        return None
+
+    storage = post_image.image.storage
+    return {
+        size_name: {
+            key: build_url(storage.url(value)) if key in DERIVATIVE_FORMATS else value
+            for key, value in variant.items()
+        }
+        for size_name, variant in variants.items()
+    }
@@ -4,16 +4,176 @@ FIXED: Updated for actual NudeNet 3.x label names and detection logic
 """
 
 import os
-import tempfile
+import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+import cv2
+import numpy as np
 from PIL import Image
 from django.conf import settings
-from django.core.files.uploadedfile import InMemoryUploadedFile
+from .detector_registry import get_detector
+from .verdict_cache import (
+    VERDICT_CACHE_ENABLED, dhash, file_sha256, lookup_similar_rejection, lookup_verdict,
+    record_verdict, verdict_version
+)
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
 
+# FIXED: Correct NudeNet v3.x label names
+# These are the actual labels returned by NudeNet v3.x
+IMAGE_UNSAFE_LABELS = {
+    # Primary NSFW labels (NudeNet v3.x)
+    'FEMALE_GENITALIA_EXPOSED',
+    'MALE_GENITALIA_EXPOSED',
+    'FEMALE_BREAST_EXPOSED',
+    'BUTTOCKS_EXPOSED',
+    'ANUS_EXPOSED',
+    
+    # Alternative label formats (some versions use these)
+    'EXPOSED_GENITALIA_F',
+    'EXPOSED_GENITALIA_M',
+    'EXPOSED_BREAST_F',
+    'EXPOSED_BUTTOCKS',
+    'EXPOSED_ANUS',
+    
+    # Additional exposed body parts
+    'MALE_BREAST_EXPOSED',
+    'BELLY_EXPOSED',
+    'ARMPITS_EXPOSED',
+    
+    # Underwear/lingerie (optional - uncomment to block)
+    # 'FACE_F',
+    # 'FACE_M',
+}
+
+# Max inputs stacked into one ONNX call (bounds tensor memory: 32 x 3x320x320 floats ~ 39MB)
+DETECTOR_BATCH_SIZE = getattr(settings, 'CONTENT_MODERATION_BATCH_SIZE', 32)
+
+# Threads shared by all requests for per-image validation / hashing / detection
+MODERATION_THREADS = getattr(settings, 'CONTENT_MODERATION_THREADS', 4)
+# Seconds an upload request may spend moderating the images of one post
+POST_MODERATION_DEADLINE = getattr(settings, 'CONTENT_MODERATION_POST_DEADLINE', 30)
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_moderation_executor():
+    """Process-wide bounded thread pool (recreated after fork)"""
+    global _executor, _executor_pid
+    
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=MODERATION_THREADS, thread_name_prefix='moderation')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _remaining(ends_at):
+    """Seconds left until ends_at (None = no deadline)"""
+    if ends_at is None:
+        return None
+    return max(0.0, ends_at - time.monotonic())
+
+
+def detect_batch(detector, images, batch_size=DETECTOR_BATCH_SIZE):
+    """
+    Run NudeNet on several images at once.
+    `images` may be file paths or decoded BGR numpy arrays; they are
+    preprocessed into one (N, 3, 320, 320) tensor per batch and sent through a
+    single ONNX session call. Returns one detection list per input, in order.
+    """
+    images = list(images)
+    if not images:
+        return []
+    
+    if hasattr(detector, 'detect_batch'):
+        return detector.detect_batch(images, batch_size=batch_size)
+    
+    # Older NudeNet releases without batch support
+    return [detector.detect(image) for image in images]
+
+
+def analyze_detections(detections, unsafe_labels, threshold):
+    """
+    Pick the unsafe detections out of a NudeNet result.
+    Returns (unsafe_detections, max_unsafe_score, all_labels).
+    """
+    unsafe_detections = []
+    max_unsafe_score = 0.0
+    all_labels = set()
+    
+    for detection in detections:
+        # Get label (handle both 'class' and 'label' keys)
+        label = detection.get('class') or detection.get('label', '')
+        score = detection.get('score', 0.0)
+        all_labels.add(label)
+        
+        logger.info(f"   - Detected: {label} (score: {score:.4f})")
+        
+        # Check if label is unsafe
+        if label in unsafe_labels and score >= threshold:
+            unsafe_detections.append({
+                'label': label,
+                'score': score,
+                'box': detection.get('box', [])
+            })
+            max_unsafe_score = max(max_unsafe_score, score)
+    
+    return unsafe_detections, max_unsafe_score, all_labels
+
+
+def image_file_path(image_file):
+    """
+    Path of an upload that is already on disk, or None.
+    Covers TemporaryUploadedFile (large uploads) and stored FieldFiles.
+    """
+    if hasattr(image_file, 'temporary_file_path'):
+        return image_file.temporary_file_path()
+    try:
+        path = image_file.path
+    except (AttributeError, NotImplementedError, ValueError):
+        return None
+    return path if path and os.path.exists(path) else None
+
+
+def decode_image_file(image_file):
+    """
+    Decode an upload or stored image into a BGR numpy array, in one pass.
+    Reads from disk when the file is already there, otherwise straight from
+    the in-memory buffer (no copy for BytesIO).
+    """
+    path = image_file_path(image_file)
+    if path:
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+    else:
+        if hasattr(image_file, 'seek'):
+            image_file.seek(0)
+        
+        buffer = getattr(image_file, 'file', None)
+        if hasattr(buffer, 'getbuffer'):
+            data = buffer.getbuffer()  # BytesIO: no copy
+        elif hasattr(image_file, 'read'):
+            data = image_file.read()
+        else:
+            raise ValueError(f"Unsupported file type: {type(image_file)}")
+        
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        
+        if hasattr(image_file, 'seek'):
+            image_file.seek(0)
+    
+    if image is None:
+        raise ValueError(f"Could not decode image: {getattr(image_file, 'name', 'unknown')}")
+    return image
+
+
 class NudeNetContentModerator:
     """
     Content moderation service using NudeNet v3.x
@@ -32,19 +192,12 @@ class NudeNetContentModerator:
             self._init_models()
     
     def _init_models(self):
-        """Initialize NudeNet v3.x detector"""
+        """Attach the process-wide NudeNet v3.x detector (loaded once per process)"""
         try:
-            logger.info("=" * 60)
-            logger.info("Initializing NudeNet v3.x...")
-            
-            from nudenet import NudeDetector
-            
-            # Initialize detector
-            self.detector = NudeDetector()
+            # Shared session, see detector_registry
+            self.detector = get_detector()
             
-            logger.info("✓ NudeNet v3.x detector initialized")
-            logger.info(f"✓ Unsafe threshold: {self.unsafe_threshold}")
-            logger.info("=" * 60)
+            logger.debug(f"✓ NudeNet detector attached, unsafe threshold: {self.unsafe_threshold}")
             
         except ImportError as e:
             logger.error(f"NudeNet not installed: {e}")
@@ -61,144 +214,45 @@ class NudeNetContentModerator:
         Check image for NSFW content using NudeNet v3.x
         FIXED: Proper label detection and file handling
         """
+        return self.check_images([image_file])[0]
+    
+    def check_images(self, image_files):
+        """
+        Check several images with one batched NudeNet inference.
+        Returns one result per input, in order, shaped like check_image().
+        """
         if not self.enabled:
             logger.warning("⚠️  Content moderation DISABLED - approving by default")
-            return {
+            return [{
                 'is_safe': True,
                 'message': 'Content moderation disabled',
                 'confidence': None,
                 'details': {'reason': 'moderation_disabled'}
-            }
+            } for _ in image_files]
         
         if self.detector is None:
             logger.error("❌ NudeNet detector not initialized")
             # SECURITY: Reject if detector fails
-            return {
+            return [{
                 'is_safe': False,
                 'message': 'Content moderation not available',
                 'confidence': None,
                 'details': {'reason': 'detector_not_initialized'}
-            }
-        
-        temp_file_path = None
+            } for _ in image_files]
         
         try:
-            # Reset file pointer
-            if hasattr(image_file, 'seek'):
-                image_file.seek(0)
-            
-            filename = getattr(image_file, 'name', 'unknown')
-            logger.info("=" * 60)
-            logger.info(f"🔍 Checking image: {filename}")
-            
-            # Save to temp file
-            temp_file_path = self._save_temp_file(image_file)
-            logger.info(f"💾 Temp file: {temp_file_path}")
-            
-            # Reset file pointer after saving
-            if hasattr(image_file, 'seek'):
-                image_file.seek(0)
-            
-            # Run NudeNet detection
-            logger.info("🤖 Running NudeNet detection...")
-            detections = self.detector.detect(temp_file_path)
-            
-            logger.info(f"📦 Detections found: {len(detections)}")
-            logger.info(f"📦 Raw output: {detections}")
-            
-            # FIXED: Correct NudeNet v3.x label names
-            # These are the actual labels returned by NudeNet v3.x
-            UNSAFE_LABELS = {
-                # Primary NSFW labels (NudeNet v3.x)
-                'FEMALE_GENITALIA_EXPOSED',
-                'MALE_GENITALIA_EXPOSED',
-                'FEMALE_BREAST_EXPOSED',
-                'BUTTOCKS_EXPOSED',
-                'ANUS_EXPOSED',
-                
-                # Alternative label formats (some versions use these)
-                'EXPOSED_GENITALIA_F',
-                'EXPOSED_GENITALIA_M',
-                'EXPOSED_BREAST_F',
-                'EXPOSED_BUTTOCKS',
-                'EXPOSED_ANUS',
-                
-                # Additional exposed body parts
-                'MALE_BREAST_EXPOSED',
-                'BELLY_EXPOSED',
-                'ARMPITS_EXPOSED',
-                
-                # Underwear/lingerie (optional - uncomment to block)
-                # 'FACE_F',
-                # 'FACE_M',
-            }
-            
-            # Analyze detections
-            unsafe_detections = []
-            max_unsafe_score = 0.0
-            all_labels = set()
-            
-            for detection in detections:
-                # Get label (handle both 'class' and 'label' keys)
-                label = detection.get('class') or detection.get('label', '')
-                score = detection.get('score', 0.0)
-                all_labels.add(label)
-                
-                logger.info(f"   - Detected: {label} (score: {score:.4f})")
+            detector_inputs = []
+            for image_file in image_files:
+                logger.info(f"🔍 Checking image: {getattr(image_file, 'name', 'unknown')}")
                 
-                # Check if label is unsafe
-                if label in UNSAFE_LABELS and score >= self.unsafe_threshold:
-                    unsafe_detections.append({
-                        'label': label,
-                        'score': score,
-                        'box': detection.get('box', [])
-                    })
-                    max_unsafe_score = max(max_unsafe_score, score)
-            
-            # Calculate safety
-            is_unsafe = len(unsafe_detections) > 0
-            safe_score = 1.0 - max_unsafe_score if unsafe_detections else 1.0
-            unsafe_score = max_unsafe_score
-            
-            # Log results
-            logger.info("📊 Analysis Results:")
-            logger.info(f"   Total detections:  {len(detections)}")
-            logger.info(f"   All labels found:  {all_labels}")
-            logger.info(f"   Unsafe detections: {len(unsafe_detections)}")
-            logger.info(f"   Max unsafe score:  {unsafe_score:.4f} ({unsafe_score*100:.2f}%)")
-            logger.info(f"   Threshold:         {self.unsafe_threshold:.4f}")
-            
-            if unsafe_detections:
-                logger.info("   ⚠️  Unsafe content detected:")
-                for det in unsafe_detections:
-                    logger.info(f"      - {det['label']}: {det['score']:.4f}")
-            
-            is_safe = not is_unsafe
+                # Decoded in memory, or read from where the upload already is on disk
+                detector_inputs.append(self._load_image(image_file))
             
-            if is_safe:
-                logger.info(f"✅ APPROVED: Image passed moderation")
-            else:
-                logger.warning(f"❌ REJECTED: Unsafe content detected")
+            # Run NudeNet detection, one ONNX call for the whole batch
+            logger.info(f"🤖 Running NudeNet detection on {len(detector_inputs)} image(s)...")
+            batch_detections = detect_batch(self.detector, detector_inputs)
             
-            logger.info("=" * 60)
-            
-            return {
-                'is_safe': is_safe,
-                'message': 'Content checked successfully',
-                'confidence': {
-                    'safe': round(safe_score, 4),
-                    'unsafe': round(unsafe_score, 4)
-                },
-                'details': {
-                    'total_detections': len(detections),
-                    'all_labels': list(all_labels),
-                    'unsafe_detections': len(unsafe_detections),
-                    'unsafe_parts': [{'label': d['label'], 'score': d['score']} for d in unsafe_detections],
-                    'threshold': self.unsafe_threshold,
-                    'decision': 'approved' if is_safe else 'rejected',
-                    'reason': f"Max unsafe score {unsafe_score:.4f} {'<' if is_safe else '>='} threshold {self.unsafe_threshold:.4f}"
-                }
-            }
+            return [self._build_result(detections) for detections in batch_detections]
             
         except Exception as e:
             logger.error(f"❌ Content moderation error: {e}")
@@ -206,77 +260,137 @@ class NudeNetContentModerator:
             logger.error(traceback.format_exc())
             
             # SECURITY: Reject on error for safety
-            return {
+            return [{
                 'is_safe': False,
                 'message': f'Moderation check failed: {str(e)}',
                 'confidence': None,
                 'details': {'error': str(e)}
-            }
+            } for _ in image_files]
         
         finally:
-            # Reset file pointer
-            if hasattr(image_file, 'seek'):
-                try:
-                    image_file.seek(0)
-                except:
-                    pass
-            
-            # Clean up temp file
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.remove(temp_file_path)
-                    logger.debug(f"🗑️  Cleaned up: {temp_file_path}")
-                except Exception as e:
-                    logger.warning(f"⚠️  Cleanup failed: {e}")
+            for image_file in image_files:
+                # Reset file pointer
+                if hasattr(image_file, 'seek'):
+                    try:
+                        image_file.seek(0)
+                    except:
+                        pass
     
-    def _save_temp_file(self, image_file):
-        """Save uploaded file to temporary location"""
-        if hasattr(image_file, 'seek'):
-            image_file.seek(0)
+    def _build_result(self, detections):
+        """Turn raw NudeNet detections for one image into a moderation result"""
+        logger.info(f"📦 Detections found: {len(detections)}")
+        logger.info(f"📦 Raw output: {detections}")
         
-        suffix = self._get_file_extension(image_file)
-        temp_fd, temp_path = tempfile.mkstemp(suffix=suffix)
+        unsafe_detections, max_unsafe_score, all_labels = analyze_detections(
+            detections, IMAGE_UNSAFE_LABELS, self.unsafe_threshold
+        )
         
-        try:
-            with os.fdopen(temp_fd, 'wb') as temp_file:
-                if isinstance(image_file, InMemoryUploadedFile):
-                    for chunk in image_file.chunks():
-                        temp_file.write(chunk)
-                elif hasattr(image_file, 'read'):
-                    content = image_file.read()
-                    temp_file.write(content)
-                else:
-                    raise ValueError(f"Unsupported file type: {type(image_file)}")
-            
-            # Reset file pointer
-            if hasattr(image_file, 'seek'):
-                image_file.seek(0)
-            
-            return temp_path
-            
-        except Exception as e:
-            logger.error(f"❌ Error saving temp file: {e}")
-            raise
-    
-    def _get_file_extension(self, image_file):
-        """Get file extension"""
-        if hasattr(image_file, 'name'):
-            ext = os.path.splitext(image_file.name)[1]
-            return ext if ext else '.jpg'
-        return '.jpg'
+        # Calculate safety
+        is_unsafe = len(unsafe_detections) > 0
+        safe_score = 1.0 - max_unsafe_score if unsafe_detections else 1.0
+        unsafe_score = max_unsafe_score
+        
+        # Log results
+        logger.info("📊 Analysis Results:")
+        logger.info(f"   Total detections:  {len(detections)}")
+        logger.info(f"   All labels found:  {all_labels}")
+        logger.info(f"   Unsafe detections: {len(unsafe_detections)}")
+        logger.info(f"   Max unsafe score:  {unsafe_score:.4f} ({unsafe_score*100:.2f}%)")
+        logger.info(f"   Threshold:         {self.unsafe_threshold:.4f}")
+        
+        if unsafe_detections:
+            logger.info("   ⚠️  Unsafe content detected:")
+            for det in unsafe_detections:
+                logger.info(f"      - {det['label']}: {det['score']:.4f}")
+        
+        is_safe = not is_unsafe
+        
+        if is_safe:
+            logger.info(f"✅ APPROVED: Image passed moderation")
+        else:
+            logger.warning(f"❌ REJECTED: Unsafe content detected")
+        
+        return {
+            'is_safe': is_safe,
+            'message': 'Content checked successfully',
+            'confidence': {
+                'safe': round(safe_score, 4),
+                'unsafe': round(unsafe_score, 4)
+            },
+            'details': {
+                'total_detections': len(detections),
+                'all_labels': list(all_labels),
+                'unsafe_detections': len(unsafe_detections),
+                'unsafe_parts': [{'label': d['label'], 'score': d['score']} for d in unsafe_detections],
+                'threshold': self.unsafe_threshold,
+                'decision': 'approved' if is_safe else 'rejected',
+                'reason': f"Max unsafe score {unsafe_score:.4f} {'<' if is_safe else '>='} threshold {self.unsafe_threshold:.4f}"
+            }
+        }
+    
+    def _load_image(self, image_file):
+        """
+        Input for the detector without copying the upload to a temp file.
+        Uploads spooled to disk by TemporaryFileUploadHandler (and stored
+        FieldFiles) are passed by path; in-memory uploads are decoded straight
+        from their buffer into a BGR numpy array.
+        """
+        if isinstance(image_file, np.ndarray):
+            return image_file
+        return image_file_path(image_file) or decode_image_file(image_file)
+    
+    def decode_image(self, image_file):
+        """Like _load_image, but always a decoded BGR array"""
+        if isinstance(image_file, np.ndarray):
+            return image_file
+        return decode_image_file(image_file)
+    
+    def verdict_version(self):
+        """Verdict cache version for this model / threshold / label set"""
+        return verdict_version(self.unsafe_threshold, IMAGE_UNSAFE_LABELS)
+    
+    @property
+    def is_active(self):
+        """NudeNet will actually run (enabled and loaded)"""
+        return self.enabled and self.detector is not None
+    
+    @property
+    def is_cacheable(self):
+        """Only real NudeNet verdicts are cached (not disabled / failed detector)"""
+        return VERDICT_CACHE_ENABLED and self.is_active
 
 
 class SimpleImageValidator:
-    """Basic image validation"""
+    """
+    Basic image validation.
+    Format and dimensions come from the file header (PIL only parses the
+    header on open), so oversized images and decompression bombs are
+    rejected before any pixels are decoded.
+    """
     
     ALLOWED_EXTENSIONS = ['.jpg', '.jpeg', '.png']
     ALLOWED_MIME_TYPES = ['image/jpeg', 'image/png', 'image/jpg']
+    ALLOWED_FORMATS = ['JPEG', 'PNG']
     MAX_SIZE = 20 * 1024 * 1024  # 20MB
     MAX_DIMENSION = 10000
+    MAX_PIXELS = 50 * 1000 * 1000  # Decompression bomb guard (~150MB decoded)
     
     @classmethod
     def validate_image(cls, image_file):
-        """Validate image file"""
+        """Validate image file (header checks + structure verify, no pixel decode)"""
+        validation_result, _ = cls._validate(image_file, decode=False)
+        return validation_result
+    
+    @classmethod
+    def validate_and_decode(cls, image_file):
+        """
+        Validate from the header, then decode the pixels once for the detector.
+        Returns (validation_result, BGR numpy array or None).
+        """
+        return cls._validate(image_file, decode=True)
+    
+    @classmethod
+    def _validate(cls, image_file, decode):
         try:
             if hasattr(image_file, 'seek'):
                 image_file.seek(0)
@@ -288,7 +402,7 @@ class SimpleImageValidator:
                     'is_safe': False,
                     'message': f'Invalid file format: {ext}. Only JPG and PNG allowed.',
                     'details': {}
-                }
+                }, None
             
             # Check content type
             content_type = getattr(image_file, 'content_type', None)
@@ -297,7 +411,7 @@ class SimpleImageValidator:
                     'is_safe': False,
                     'message': f'Invalid content type: {content_type}',
                     'details': {}
-                }
+                }, None
             
             # Check size
             if image_file.size > cls.MAX_SIZE:
@@ -306,26 +420,34 @@ class SimpleImageValidator:
                     'is_safe': False,
                     'message': f'File too large: {size_mb}MB (max 20MB)',
                     'details': {}
-                }
+                }, None
             
-            # Validate with PIL
+            # Header only: format and dimensions
             try:
-                image = Image.open(image_file)
-                image.verify()
-                
-                if hasattr(image_file, 'seek'):
-                    image_file.seek(0)
-                
                 image = Image.open(image_file)
                 width, height = image.size
                 image_format = image.format
                 
-                if width > cls.MAX_DIMENSION or height > cls.MAX_DIMENSION:
+                if image_format not in cls.ALLOWED_FORMATS:
+                    return {
+                        'is_safe': False,
+                        'message': f'Invalid file format: {image_format}. Only JPG and PNG allowed.',
+                        'details': {}
+                    }, None
+                
+                if width > cls.MAX_DIMENSION or height > cls.MAX_DIMENSION or width * height > cls.MAX_PIXELS:
                     return {
                         'is_safe': False,
                         'message': f'Image too large: {width}x{height}',
                         'details': {}
-                    }
+                    }, None
+                
+                # The one full decode (or a structure check when pixels aren't needed)
+                pixels = None
+                if decode:
+                    pixels = decode_image_file(image_file)
+                else:
+                    image.verify()
                 
                 logger.info(f"✅ Image valid: {width}x{height} {image_format}")
                 
@@ -337,14 +459,14 @@ class SimpleImageValidator:
                         'height': height,
                         'format': image_format
                     }
-                }
+                }, pixels
                 
             except Exception as e:
                 return {
                     'is_safe': False,
                     'message': f'Invalid image: {str(e)}',
                     'details': {}
-                }
+                }, None
             
         finally:
             if hasattr(image_file, 'seek'):
@@ -354,6 +476,23 @@ class SimpleImageValidator:
                     pass
 
 
+def validate_image_upload(image_file):
+    """
+    Validation stage only (no NSFW detection), shaped like
+    ImageModerationService.check_image. Used at upload time when NudeNet
+    runs later in the moderation worker.
+    """
+    validation_result = SimpleImageValidator.validate_image(image_file)
+    
+    return {
+        'is_safe': validation_result['is_safe'],
+        'message': validation_result['message'],
+        'stage': 'validation' if not validation_result['is_safe'] else 'completed',
+        'validation': validation_result,
+        'moderation': None
+    }
+
+
 class ImageModerationService:
     """Combined validation and moderation service"""
     
@@ -362,18 +501,99 @@ class ImageModerationService:
         self.moderator = NudeNetContentModerator()
         logger.info("🚀 ImageModerationService initialized")
     
-    def check_image(self, image_file):
-        """Complete image check"""
-        if hasattr(image_file, 'seek'):
-            image_file.seek(0)
+    def check_images(self, image_files, deadline=None):
+        """
+        Complete check of several images (e.g. one post).
+        Validation, hashing and decoding run concurrently on the shared
+        moderation pool; NSFW detection runs as one batch over the images that
+        passed validation and had no cached verdict. Returns one result per
+        input, in order.
+        
+        deadline: seconds for the whole check; unfinished images are
+                  rejected with 'Moderation timed out'
+        """
+        results = [None] * len(image_files)
+        ends_at = time.monotonic() + deadline if deadline else None
+        executor = get_moderation_executor()
+        
+        futures = {executor.submit(self._prepare, image_file): idx for idx, image_file in enumerate(image_files)}
+        to_detect = []
         
-        logger.info("=" * 70)
-        logger.info(f"🔍 STARTING MODERATION: {getattr(image_file, 'name', 'unknown')}")
-        logger.info("=" * 70)
+        try:
+            for future in as_completed(futures, timeout=_remaining(ends_at)):
+                idx = futures[future]
+                results[idx], pending = self._screen(future)
+                if pending is not None:
+                    to_detect.append((idx,) + pending)
+        except FuturesTimeoutError:
+            logger.warning(f"⏱️ Image moderation deadline ({deadline}s) exceeded")
+            return self._time_out(results)
+        finally:
+            for future in futures:
+                future.cancel()
+        
+        if not to_detect:
+            return results
         
-        # Step 1: Validation
-        logger.info("📋 Step 1: Basic Validation")
-        validation_result = self.validator.validate_image(image_file)
+        # One batched NudeNet pass, bounded by what is left of the deadline
+        detection = executor.submit(
+            self.moderator.check_images, [detector_input for _, detector_input, _, _ in to_detect]
+        )
+        try:
+            moderation_results = detection.result(timeout=_remaining(ends_at))
+        except FuturesTimeoutError:
+            logger.warning(f"⏱️ Image moderation deadline ({deadline}s) exceeded")
+            return self._time_out(results)
+        
+        for (idx, _, validation_result, cache_key), moderation_result in zip(to_detect, moderation_results):
+            results[idx] = self._combine(validation_result, moderation_result)
+            
+            # Errors are not verdicts, only store decided results
+            if cache_key and moderation_result.get('details', {}).get('decision'):
+                sha256, phash = cache_key
+                record_verdict(
+                    'image', sha256, self.moderator.verdict_version(),
+                    moderation_result['is_safe'], moderation_result, phash=phash
+                )
+        
+        return results
+    
+    def _prepare(self, image_file):
+        """
+        Per-image work that runs on the moderation pool: validation with the
+        single pixel decode, then the content hashes for the verdict cache.
+        Returns (validation_result, detector_input, (sha256, phash) or None).
+        """
+        if not self.moderator.is_active:
+            return self.validator.validate_image(image_file), image_file, None
+        
+        validation_result, pixels = self.validator.validate_and_decode(image_file)
+        if not validation_result['is_safe']:
+            return validation_result, image_file, None
+        
+        if not self.moderator.is_cacheable:
+            return validation_result, pixels, None
+        
+        return validation_result, pixels, (file_sha256(image_file), dhash(pixels))
+    
+    def _screen(self, future):
+        """
+        Result of a finished _prepare() plus the verdict cache lookups.
+        Returns (result, None) when the image is decided, or
+        (None, (detector_input, validation_result, cache_key)) when it still
+        needs NudeNet.
+        """
+        try:
+            validation_result, detector_input, cache_key = future.result()
+        except Exception as e:
+            logger.error(f"❌ Image check error: {e}")
+            return {
+                'is_safe': False,
+                'message': f'Moderation check failed: {str(e)}',
+                'stage': 'moderation',
+                'validation': None,
+                'moderation': None
+            }, None
         
         if not validation_result['is_safe']:
             logger.warning(f"❌ Validation failed: {validation_result['message']}")
@@ -383,14 +603,46 @@ class ImageModerationService:
                 'stage': 'validation',
                 'validation': validation_result,
                 'moderation': None
-            }
+            }, None
         
-        logger.info("✅ Validation passed\n")
+        cached = self._cached_verdict(cache_key)
+        if cached is not None:
+            # The verdict row decides (admins may flip is_safe on it)
+            moderation_result = dict(cached['result'], is_safe=cached['is_safe'], cache={
+                'match': cached['match'],
+                'distance': cached['distance']
+            })
+            return self._combine(validation_result, moderation_result), None
         
-        # Step 2: NSFW Detection
-        logger.info("🤖 Step 2: NSFW Detection")
-        moderation_result = self.moderator.check_image(image_file)
+        return None, (detector_input, validation_result, cache_key)
+    
+    def _cached_verdict(self, cache_key):
+        """Exact SHA-256 match first, then dHash against rejected images"""
+        if cache_key is None:
+            return None
         
+        sha256, phash = cache_key
+        version = self.moderator.verdict_version()
+        cached = lookup_verdict('image', sha256, version)
+        if cached is None and phash is not None:
+            cached = lookup_similar_rejection(phash, version)
+        return cached
+    
+    def _time_out(self, results):
+        """Reject every image that has no result yet (fail closed)"""
+        return [
+            result if result is not None else {
+                'is_safe': False,
+                'message': 'Moderation timed out',
+                'stage': 'moderation',
+                'validation': None,
+                'moderation': None
+            }
+            for result in results
+        ]
+    
+    def _combine(self, validation_result, moderation_result):
+        """Service result from the validation and moderation stages"""
         if not moderation_result['is_safe']:
             logger.warning(f"❌ Moderation failed: {moderation_result['message']}")
             return {
@@ -400,18 +652,14 @@ class ImageModerationService:
                 'validation': validation_result,
                 'moderation': moderation_result
             }
-        
-        logger.info("=" * 70)
-        logger.info("✅ IMAGE APPROVED")
-        logger.info("=" * 70)
-        
-        if hasattr(image_file, 'seek'):
-            image_file.seek(0)
-        
         return {
             'is_safe': True,
             'message': 'Image passed all checks',
             'stage': 'completed',
             'validation': validation_result,
             'moderation': moderation_result
-        }
\ No newline at end of file
+        }
+    
+    def check_image(self, image_file):
+        """Complete image check: validation, then NSFW detection (or a cached verdict)"""
+        return self.check_images([image_file])[0]
\ No newline at end of file
@@ -0,0 +1,265 @@
+# MainApplication/Post/post_counters.py
+"""
+Engagement counters on Post (likes, comments, shares, saves).
+
+Counters are only ever changed with a single-column
+UPDATE ... SET likes_count = MAX(likes_count + delta, 0), so concurrent
+likes never lose increments and never rewrite the rest of the row.
+
+With ENGAGEMENT_COUNTERS_WRITE_BEHIND the deltas are first added up in Redis
+(one hash per post, HINCRBY) and applied to the database in one UPDATE per
+post by manage.py flush_engagement_counters; a burst of likes on a hot post
+becomes a single write. If Redis is unreachable the delta goes straight to
+the database.
+
+manage.py reconcile_post_counters recomputes every counter from the
+PostLike / PostComment / PostShare / PostSave rows.
+
+Ratings keep a running rating_sum, rating_count and a 1-5 star histogram
+(rating_<n>_count), changed with F() expressions; average_rating is
+derived from them right after, so a new or changed rating never rescans the
+post's ratings.
+manage.py reconcile_post_ratings recomputes them from PostRating.
+"""
+
+import logging
+from decimal import Decimal, ROUND_HALF_UP
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Greatest
+
+from .post_models import Post, PostComment, PostLike, PostRating, PostSave, PostShare
+
+logger = logging.getLogger(__name__)
+
+
+COUNTER_FIELDS = ['likes_count', 'comments_count', 'shares_count', 'saves_count']
+
+# Rows each counter is derived from (reconciliation)
+COUNTER_SOURCES = {
+    'likes_count': PostLike,
+    'comments_count': PostComment,
+    'shares_count': PostShare,
+    'saves_count': PostSave,
+}
+
+WRITE_BEHIND = getattr(settings, 'ENGAGEMENT_COUNTERS_WRITE_BEHIND', False)
+FLUSH_BATCH_SIZE = 500
+
+RATING_VALUES = range(1, 6)
+RATING_HISTOGRAM_FIELDS = {stars: f'rating_{stars}_count' for stars in RATING_VALUES}
+RATING_FIELDS = ['rating_count', 'rating_sum', *RATING_HISTOGRAM_FIELDS.values(), 'average_rating']
+
+PENDING_KEY = 'post_counters:{pk}'      # hash: counter field -> pending delta
+DIRTY_KEY = 'post_counters:dirty'       # set of post pks with pending deltas
+
+_redis = None
+
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            decode_responses=True,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5
+        )
+    return _redis
+
+
+def apply_counter_deltas(post_pk, deltas):
+    """One UPDATE for several counters of a post; counters never go below zero"""
+    changes = {
+        field: Greatest(F(field) + delta, Value(0))
+        for field, delta in deltas.items() if delta
+    }
+    if changes:
+        Post.objects.filter(pk=post_pk).update(**changes)
+
+
+def change_counter(post, field, delta):
+    """
+    Add delta to one counter of a post and return the count to show the
+    client (database value plus any delta still waiting in Redis).
+    """
+    if field not in COUNTER_FIELDS:
+        raise ValueError(f"Unknown counter: {field}")
+
+    if WRITE_BEHIND:
+        try:
+            pipe = get_redis().pipeline()
+            pipe.hincrby(PENDING_KEY.format(pk=post.pk), field, delta)
+            pipe.sadd(DIRTY_KEY, post.pk)
+            pending, _ = pipe.execute()
+            current = Post.objects.filter(pk=post.pk).values_list(field, flat=True).first() or 0
+            value = max(0, current + int(pending))
+            setattr(post, field, value)
+            return value
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Counter write-behind unavailable, writing {field} directly: {e}")
+
+    apply_counter_deltas(post.pk, {field: delta})
+    post.refresh_from_db(fields=[field])
+    return getattr(post, field)
+
+
+def flush_pending_counters(batch_size=FLUSH_BATCH_SIZE):
+    """Apply the deltas buffered in Redis. Returns the number of posts updated"""
+    client = get_redis()
+    flushed = 0
+
+    while True:
+        post_pks = client.spop(DIRTY_KEY, batch_size)
+        if not post_pks:
+            break
+
+        for post_pk in post_pks:
+            key = PENDING_KEY.format(pk=post_pk)
+            # Read and clear atomically; increments after this land in a new hash
+            pipe = client.pipeline(transaction=True)
+            pipe.hgetall(key)
+            pipe.delete(key)
+            pending, _ = pipe.execute()
+
+            deltas = {field: int(delta) for field, delta in pending.items() if field in COUNTER_FIELDS}
+            try:
+                apply_counter_deltas(int(post_pk), deltas)
+            except Exception:
+                # Put the deltas back so the next flush retries them
+                restore = client.pipeline()
+                for field, delta in deltas.items():
+                    restore.hincrby(key, field, delta)
+                restore.sadd(DIRTY_KEY, post_pk)
+                restore.execute()
+                raise
+            flushed += 1
+
+    return flushed
+
+
+def reconcile_counters(queryset=None, dry_run=False):
+    """
+    Recompute the counters from the engagement rows.
+    Returns a list of (post_pk, {field: (stored, actual)}) for posts that were off.
+    """
+    queryset = queryset if queryset is not None else Post.objects.all()
+
+    annotations = {
+        f'actual_{field}': Coalesce(
+            Subquery(
+                model.objects.filter(post=OuterRef('pk'))
+                .order_by().values('post').annotate(n=Count('pk')).values('n')
+            ),
+            0
+        )
+        for field, model in COUNTER_SOURCES.items()
+    }
+
+    drift = []
+    rows = queryset.annotate(**annotations).values('pk', *COUNTER_FIELDS, *annotations)
+    for row in rows.iterator():
+        wrong = {
+            field: (row[field], row[f'actual_{field}'])
+            for field in COUNTER_FIELDS
+            if row[field] != row[f'actual_{field}']
+        }
+        if not wrong:
+            continue
+        drift.append((row['pk'], wrong))
+        if not dry_run:
+            Post.objects.filter(pk=row['pk']).update(**{field: actual for field, (_, actual) in wrong.items()})
+
+    return drift
+
+
+# ---------------------------------------------------------------------------
+# Ratings
+# ---------------------------------------------------------------------------
+
+def _average(rating_sum, rating_count):
+    if not rating_count:
+        return Decimal('0.00')
+    return (Decimal(rating_sum) / Decimal(rating_count)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def record_rating(post, rating, previous=None):
+    """
+    Apply a new rating (previous=None) or a changed one to the post's running
+    totals in one UPDATE, and load the new totals onto `post`.
+    """
+    sum_delta = rating - (previous or 0)
+    count_delta = 0 if previous else 1
+
+    changes = {
+        'rating_sum': F('rating_sum') + sum_delta,
+        'rating_count': F('rating_count') + count_delta,
+    }
+    if previous != rating:
+        changes[RATING_HISTOGRAM_FIELDS[rating]] = F(RATING_HISTOGRAM_FIELDS[rating]) + 1
+        if previous:
+            changes[RATING_HISTOGRAM_FIELDS[previous]] = Greatest(F(RATING_HISTOGRAM_FIELDS[previous]) - 1, Value(0))
+
+    rows = Post.objects.filter(pk=post.pk)
+    with transaction.atomic():
+        rows.update(**changes)
+        # Second statement: the row is locked by the first one
+        rows.update(average_rating=Cast(
+            F('rating_sum') * Value(1.0) / Greatest(F('rating_count'), Value(1)),
+            DecimalField(max_digits=3, decimal_places=2)
+        ))
+    post.refresh_from_db(fields=RATING_FIELDS)
+    return post
+
+
+def rating_histogram(post):
+    """{'1': n, ..., '5': n} from the stored histogram"""
+    return {str(stars): getattr(post, field) for stars, field in RATING_HISTOGRAM_FIELDS.items()}
+
+
+def reconcile_ratings(queryset=None, dry_run=False):
+    """
+    Recompute rating totals from PostRating.
+    Returns a list of (post_pk, {field: (stored, actual)}) for posts that were off.
+    """
+    queryset = queryset if queryset is not None else Post.objects.all()
+
+    def total(aggregate):
+        return Coalesce(
+            Subquery(
+                PostRating.objects.filter(post=OuterRef('pk'))
+                .order_by().values('post').annotate(n=aggregate).values('n')
+            ),
+            0
+        )
+
+    annotations = {
+        'actual_rating_count': total(Count('pk')),
+        'actual_rating_sum': total(Sum('rating')),
+    }
+    for stars, field in RATING_HISTOGRAM_FIELDS.items():
+        annotations[f'actual_{field}'] = total(Count('pk', filter=Q(rating=stars)))
+
+    drift = []
+    rows = queryset.annotate(**annotations).values('pk', *RATING_FIELDS, *annotations)
+    for row in rows.iterator():
+        actual = {field: row[f'actual_{field}'] for field in RATING_FIELDS if field != 'average_rating'}
+        actual['average_rating'] = _average(actual['rating_sum'], actual['rating_count'])
+
+        wrong = {
+            field: (row[field], value)
+            for field, value in actual.items()
+            if row[field] != value
+        }
+        if not wrong:
+            continue
+        drift.append((row['pk'], wrong))
+        if not dry_run:
+            Post.objects.filter(pk=row['pk']).update(**actual)
+
+    return drift
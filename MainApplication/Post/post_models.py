@@ -40,9 +40,24 @@ class Post(models.Model):
         ('pending', 'Pending Review'),
         ('approved', 'Approved'),
         ('rejected', 'Rejected'),
+        ('review', 'Needs Manual Review'),  # Automatic moderation gave up
+    ]
+    
+    STREAM_STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
     ]
     rating_count = models.IntegerField(default=0)
-    average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
+    average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)  # rating_sum / rating_count
+    # Running rating totals, updated with F() (see post_counters.record_rating)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
     saves_count = models.IntegerField(default=0)
     post_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
@@ -61,6 +76,17 @@ class Post(models.Model):
         ]
     )
     
+    # Poster frame and HLS renditions (see Post/video_transcoder.py)
+    video_poster = models.ImageField(upload_to='posts/videos/posters/%Y/%m/%d/', blank=True, null=True)
+    video_stream_status = models.CharField(
+        max_length=12,
+        choices=STREAM_STATUS_CHOICES,
+        blank=True,
+        null=True,
+        db_index=True
+    )
+    video_stream = models.JSONField(blank=True, null=True)  # manifest name + renditions
+    
     # Content moderation
     content_status = models.CharField(
         max_length=20, 
@@ -115,6 +141,10 @@ class PostImage(models.Model):
     is_safe = models.BooleanField(default=True)
     moderation_result = models.JSONField(blank=True, null=True)  # Store API response
     
+    # Responsive variants (see Post/image_derivatives.py)
+    derivatives = models.JSONField(blank=True, null=True)
+    blurhash = models.CharField(max_length=64, blank=True, null=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -152,6 +182,9 @@ class PostComment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['post', '-created_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} commented on {self.post.post_id}"
@@ -202,4 +235,156 @@ class PostRating(models.Model):
         verbose_name_plural = 'Post Ratings'
     
     def __str__(self):
-        return f"{self.user.username} rated {self.post.post_id} - {self.rating}⭐"    
\ No newline at end of file
+        return f"{self.user.username} rated {self.post.post_id} - {self.rating}⭐"    
+
+
+class TimelineEntry(models.Model):
+    """
+    Precomputed home-timeline row (fan-out-on-write inbox).
+    One row per (follower, post); reads are a range scan on (owner, -post_created_at).
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    post_created_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ('owner', 'post')
+        indexes = [
+            models.Index(fields=['owner', '-post_created_at', '-post']),
+            models.Index(fields=['owner', 'author']),
+        ]
+        verbose_name = 'Timeline Entry'
+        verbose_name_plural = 'Timeline Entries'
+    
+    def __str__(self):
+        return f"{self.post.post_id} in {self.owner.username}'s timeline"
+
+
+class ModerationJob(models.Model):
+    """
+    DB-backed moderation queue entry.
+    Posts are stored as 'pending' and a worker (manage.py run_moderation_worker)
+    runs NudeNet on them, then flips the post to approved/rejected.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='moderation_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        verbose_name = 'Moderation Job'
+        verbose_name_plural = 'Moderation Jobs'
+    
+    def __str__(self):
+        return f"Moderation of {self.post.post_id} - {self.status}"
+
+
+class ModerationVerdict(models.Model):
+    """
+    Cached moderation verdict for a piece of media, keyed by content hash and
+    the model/threshold version that produced it (see Post/verdict_cache.py).
+    Approved verdicts expire; rejected ones have no expiry and stay blocked.
+
+    The 64-bit perceptual hash is also stored as four 16-bit chunks, each
+    indexed, for multi-index Hamming search: two hashes within distance 3
+    share at least one chunk exactly.
+    """
+    MEDIA_TYPE_CHOICES = [
+        ('image', 'Image'),
+        ('video', 'Video'),
+    ]
+    
+    media_type = models.CharField(max_length=10, choices=MEDIA_TYPE_CHOICES)
+    sha256 = models.CharField(max_length=64)
+    model_version = models.CharField(max_length=100)
+    
+    phash = models.BigIntegerField(blank=True, null=True)
+    phash_0 = models.PositiveIntegerField(blank=True, null=True)
+    phash_1 = models.PositiveIntegerField(blank=True, null=True)
+    phash_2 = models.PositiveIntegerField(blank=True, null=True)
+    phash_3 = models.PositiveIntegerField(blank=True, null=True)
+    
+    is_safe = models.BooleanField()
+    result = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(blank=True, null=True)  # None = never (rejected)
+    
+    class Meta:
+        unique_together = ['media_type', 'sha256', 'model_version']
+        indexes = [
+            models.Index(fields=['model_version', 'phash_0']),
+            models.Index(fields=['model_version', 'phash_1']),
+            models.Index(fields=['model_version', 'phash_2']),
+            models.Index(fields=['model_version', 'phash_3']),
+        ]
+        verbose_name = 'Moderation Verdict'
+        verbose_name_plural = 'Moderation Verdicts'
+    
+    def __str__(self):
+        return f"{self.media_type} {self.sha256[:12]} - {'safe' if self.is_safe else 'blocked'}"
+
+
+class UploadSession(models.Model):
+    """
+    Resumable chunked upload of one media file (see Post/chunked_upload.py).
+    Chunks are appended to a file under CHUNKED_UPLOAD_DIR at `offset`;
+    a commit turns one or more complete sessions into a post.
+    """
+    MEDIA_TYPE_CHOICES = [
+        ('image', 'Image'),
+        ('video', 'Video'),
+    ]
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+        ('committing', 'Committing'),  # Claimed by a commit request
+        ('committed', 'Committed'),
+        ('aborted', 'Aborted'),
+    ]
+    
+    upload_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    media_type = models.CharField(max_length=10, choices=MEDIA_TYPE_CHOICES)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True, default='')
+    
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)  # Bytes received so far
+    sha256 = models.CharField(max_length=64, blank=True, null=True)  # Set when complete
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='uploading')
+    moderation_result = models.JSONField(blank=True, null=True)  # Early check, see chunked_upload
+    post = models.ForeignKey(
+        Post, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions'
+    )  # Set when committed: a retried commit gets this post back
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+        verbose_name = 'Upload Session'
+        verbose_name_plural = 'Upload Sessions'
+    
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size}) - {self.status}"
@@ -0,0 +1,356 @@
+# MainApplication/Post/post_moderation.py
+"""
+Asynchronous moderation pipeline.
+
+Uploads are stored straight away with content_status='pending' and a
+ModerationJob row is queued. Workers (manage.py run_moderation_worker) claim
+jobs with a conditional UPDATE, run NudeNet on the stored media, write the
+results to PostImage.moderation_result / Post.flagged_reason, flip the post to
+approved or rejected, build the image derivatives (or, for videos, the
+poster and transcode queue entry) of approved posts and notify the author.
+A post whose job fails MAX_ATTEMPTS times goes to content_status='review'
+for a moderator (the author is told); retry_jobs() puts it back in the queue
+and approve_post() publishes it by hand.
+
+The rejection helpers are shared with the synchronous path in
+PostCreateSerializer so both produce the same error messages.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from MainApplication.notifications import send_push_notification
+from .post_models import ModerationJob, Post
+from .post_content_moderator import ImageModerationService
+from .video_content_moderator import VideoModerationService
+from .post_timeline import fan_out_post
+from .image_derivatives import generate_post_derivatives
+from .video_transcoder import prepare_video_post
+
+logger = logging.getLogger(__name__)
+
+
+MAX_ATTEMPTS = 3
+STALE_JOB_AFTER = timedelta(minutes=10)
+
+
+def is_async_moderation_enabled():
+    """Uploads are moderated by the worker instead of inside the request"""
+    return getattr(settings, 'CONTENT_MODERATION_ASYNC', True)
+
+
+# ---------------------------------------------------------------------------
+# Result aggregation (shared with PostCreateSerializer)
+# ---------------------------------------------------------------------------
+
+def collect_image_rejections(images, check_results):
+    """Pair every image with its check result and return the rejected ones"""
+    rejected_images = []
+
+    for idx, (image_file, check_result) in enumerate(zip(images, check_results)):
+        logger.info(f"📷 Checked image {idx + 1}/{len(images)}: {image_file.name}")
+
+        if not check_result['is_safe']:
+            logger.warning(f"❌ Image {idx + 1} REJECTED: {check_result['message']}")
+            rejected_images.append(image_rejection(idx, image_file, check_result))
+        else:
+            logger.info(f"✅ Image {idx + 1} APPROVED")
+
+    return rejected_images
+
+
+def image_rejection(idx, image_file, check_result):
+    """Describe one rejected image"""
+    moderation_data = check_result.get('moderation') or {}
+    confidence = moderation_data.get('confidence', {})
+
+    return {
+        'index': idx + 1,
+        'filename': image_file.name,
+        'reason': check_result['message'],
+        'stage': check_result['stage'],
+        'unsafe_score': confidence.get('unsafe', 0) if confidence else 0,
+        'details': moderation_data.get('details', {})
+    }
+
+
+def image_rejection_message(rejected_images):
+    """Human readable summary of rejected images"""
+    error_details = []
+    for r in rejected_images:
+        unsafe_parts = r.get('details', {}).get('unsafe_parts', [])
+        if unsafe_parts:
+            parts_str = ', '.join([f"{p['label']} ({p['score']:.2f})" for p in unsafe_parts])
+            error_details.append(f"{r['filename']}: {parts_str}")
+        else:
+            error_details.append(f"{r['filename']}: {r['reason']}")
+
+    return f"Content moderation failed for {len(rejected_images)} image(s): " + "; ".join(error_details)
+
+
+def video_rejection_message(result):
+    """Human readable summary of a rejected video"""
+    moderation_data = result.get('moderation', {})
+    details = moderation_data.get('details', {}) if moderation_data else {}
+    unsafe_count = details.get('unsafe_frames_count', 0)
+    unsafe_frames = details.get('unsafe_frames', [])
+
+    if unsafe_frames:
+        timestamps = [f"{uf['timestamp']}s" for uf in unsafe_frames[:3]]
+        return (
+            f"Video contains inappropriate content. "
+            f"{unsafe_count} unsafe frame(s) detected at: {', '.join(timestamps)}"
+            f"{' ...' if len(unsafe_frames) > 3 else ''}"
+        )
+    return result['message']
+
+
+# ---------------------------------------------------------------------------
+# Queue
+# ---------------------------------------------------------------------------
+
+def enqueue_moderation(post):
+    """Queue a pending post for the moderation worker"""
+    job = ModerationJob.objects.create(post=post)
+    logger.info(f"📥 Moderation queued for post {post.post_id} (job {job.id})")
+    return job
+
+
+def claim_next_job():
+    """
+    Atomically take the oldest queued job.
+    The conditional UPDATE makes concurrent workers skip each other's jobs.
+    """
+    candidates = ModerationJob.objects.filter(status='queued').order_by('created_at').values_list('id', flat=True)[:10]
+
+    for job_id in candidates:
+        claimed = ModerationJob.objects.filter(id=job_id, status='queued').update(
+            status='running',
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1
+        )
+        if claimed:
+            return ModerationJob.objects.select_related('post', 'post__user').get(id=job_id)
+
+    return None
+
+
+def requeue_stale_jobs():
+    """Put back jobs whose worker died while running them (out of attempts: give up)"""
+    stale = ModerationJob.objects.filter(
+        status='running',
+        started_at__lt=timezone.now() - STALE_JOB_AFTER
+    )
+
+    for job in stale.filter(attempts__gte=MAX_ATTEMPTS).select_related('post', 'post__user'):
+        _give_up(job, job.last_error or 'Worker stopped while running the job')
+
+    return stale.filter(attempts__lt=MAX_ATTEMPTS).update(status='queued')
+
+
+def retry_jobs(jobs):
+    """Queue failed jobs again with fresh attempts; their posts go back to pending"""
+    jobs = jobs.filter(status='failed')
+    post_ids = list(jobs.values_list('post_id', flat=True))
+
+    with transaction.atomic():
+        Post.objects.filter(pk__in=post_ids, content_status='review').update(content_status='pending')
+        count = jobs.update(status='queued', attempts=0, last_error=None, started_at=None, finished_at=None)
+
+    logger.info(f"♻️ Requeued {count} failed moderation job(s)")
+    return count
+
+
+def moderate_post(post, frame_sink=None):
+    """
+    Run moderation on a stored post.
+    Returns (is_safe, flagged_reason).
+    frame_sink collects the safe video frames that were decoded (poster candidates).
+    """
+    if post.post_type == 'image':
+        return _moderate_post_images(post)
+    if post.post_type == 'video' and post.video:
+        return _moderate_post_video(post, frame_sink)
+    return True, None
+
+
+def _moderate_post_images(post):
+    moderation_service = ImageModerationService()
+    post_images = list(post.images.all())
+    image_files = [post_image.image for post_image in post_images]
+
+    for image_file in image_files:
+        image_file.open('rb')
+    try:
+        # One batched NudeNet pass for all images of the post
+        results = moderation_service.check_images(image_files)
+    finally:
+        for image_file in image_files:
+            image_file.close()
+
+    rejected_images = collect_image_rejections(image_files, results)
+
+    for post_image, result in zip(post_images, results):
+        post_image.is_safe = result['is_safe']
+        post_image.moderation_result = result
+        post_image.save(update_fields=['is_safe', 'moderation_result'])
+
+    if rejected_images:
+        return False, image_rejection_message(rejected_images)
+    return True, None
+
+
+def _moderate_post_video(post, frame_sink=None):
+    video_service = VideoModerationService()
+    post.video.open('rb')
+    try:
+        result = video_service.check_video(post.video, frame_sink=frame_sink)
+    finally:
+        post.video.close()
+
+    if not result['is_safe']:
+        return False, video_rejection_message(result)
+    return True, None
+
+
+def process_job(job):
+    """Moderate the job's post and publish the verdict"""
+    post = job.post
+    video_frames = []
+
+    try:
+        is_safe, flagged_reason = moderate_post(post, frame_sink=video_frames)
+    except Exception as e:
+        logger.error(f"❌ Moderation job {job.id} failed: {e}")
+        return _retry_or_give_up(job, str(e))
+
+    if is_safe:
+        try:
+            publish_post(post, video_frames)
+        except Exception as e:
+            # Nothing was approved: the job runs again (the verdict cache makes that cheap)
+            logger.error(f"❌ Publishing post {post.post_id} failed: {e}")
+            post.content_status = 'pending'
+            return _retry_or_give_up(job, f"Publishing failed: {e}")
+
+    with transaction.atomic():
+        if not is_safe:
+            post.content_status = 'rejected'
+            post.flagged_reason = flagged_reason
+            post.save(update_fields=['content_status', 'flagged_reason'])
+
+        job.status = 'done'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'finished_at'])
+
+    logger.info(f"{'✅' if is_safe else '❌'} Post {post.post_id} {post.content_status} by moderation worker")
+
+    _notify_author(post)
+    return post.content_status
+
+
+def publish_post(post, video_frames=None):
+    """
+    Approve a post and run the publish steps: image derivatives, video poster
+    and transcode queue entry, timeline fan-out. The approval and the fan-out
+    commit together, so on an error the post is not published and the whole
+    call can be repeated (every step is idempotent).
+    """
+    # File work outside the transaction; failures are logged, not raised
+    generate_post_derivatives(post)
+    # The transcode worker only claims approved posts
+    prepare_video_post(post, video_frames)
+
+    with transaction.atomic():
+        post.content_status = 'approved'
+        post.flagged_reason = None
+        post.save(update_fields=['content_status', 'flagged_reason'])
+        fan_out_post(post)
+
+
+def approve_post(post):
+    """A moderator's approval: publish like the worker does, close its open jobs, tell the author"""
+    publish_post(post)
+    # A queued job must not re-check (and maybe reject) an approved post
+    ModerationJob.objects.filter(post=post, status__in=['queued', 'failed']).update(
+        status='done', finished_at=timezone.now()
+    )
+    logger.info(f"✅ Post {post.post_id} approved by a moderator")
+    _notify_author(post)
+
+
+def _retry_or_give_up(job, error):
+    if job.attempts >= MAX_ATTEMPTS:
+        return _give_up(job, error)
+    job.last_error = error
+    job.status = 'queued'
+    job.save(update_fields=['status', 'last_error'])
+    return None
+
+
+def _give_up(job, error):
+    """Out of attempts: the post waits for a moderator instead of staying pending"""
+    post = job.post
+
+    with transaction.atomic():
+        job.status = 'failed'
+        job.last_error = error
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'last_error', 'finished_at'])
+
+        # A moderator may have decided already
+        moved = Post.objects.filter(pk=post.pk, content_status='pending').update(content_status='review')
+
+    if not moved:
+        return None
+
+    post.content_status = 'review'
+    logger.warning(f"⚠️ Post {post.post_id} needs manual review: moderation failed {job.attempts} time(s)")
+    _notify_author(post)
+    return post.content_status
+
+
+def _notify_author(post):
+    """Tell the author their post has been reviewed"""
+    user = post.user
+    fcm_token = getattr(user, 'fcm_token', None)
+    if not fcm_token or not getattr(user, 'notifications_enabled', True):
+        return
+
+    if post.content_status == 'approved':
+        title = "Your post is live"
+        body = "Your post passed review and is now visible."
+    elif post.content_status == 'review':
+        title = "Your post is being reviewed"
+        body = "We could not check your post automatically. A moderator will review it shortly."
+    else:
+        title = "Your post was not published"
+        body = post.flagged_reason or "Your post did not pass content review."
+
+    send_push_notification(
+        fcm_token=fcm_token,
+        title=title,
+        body=body,
+        data={
+            'type': 'moderation',
+            'post_id': str(post.post_id),
+            'content_status': post.content_status
+        }
+    )
+
+
+def run_pending_jobs(max_jobs=None):
+    """Process queued jobs in this thread until the queue is empty (or max_jobs)"""
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = claim_next_job()
+        if job is None:
+            break
+        process_job(job)
+        processed += 1
+    return processed
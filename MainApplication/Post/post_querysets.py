@@ -0,0 +1,51 @@
+# MainApplication/Post/post_querysets.py
+"""
+Queryset helpers shared by the post listing views.
+"""
+
+from django.db.models import Exists, OuterRef, Prefetch, Subquery
+
+from .post_models import PostComment, PostLike, PostRating, PostSave
+
+
+# Number of latest comments embedded in each post of a listing
+COMMENT_PREVIEW_LIMIT = 3
+
+
+def with_viewer_state(queryset, user):
+    """
+    Annotate is_liked / is_saved / user_rating for `user` onto every post.
+
+    The three values are resolved by correlated EXISTS / subqueries inside the
+    page query itself, so a page costs the same number of round trips no
+    matter how many posts it holds. PostSerializer reads the annotations
+    (viewer_is_liked, viewer_is_saved, viewer_rating) when they are present.
+    """
+    if user is None or not user.is_authenticated:
+        return queryset
+
+    return queryset.annotate(
+        viewer_is_liked=Exists(
+            PostLike.objects.filter(post=OuterRef('pk'), user=user)
+        ),
+        viewer_is_saved=Exists(
+            PostSave.objects.filter(post=OuterRef('pk'), user=user)
+        ),
+        viewer_rating=Subquery(
+            PostRating.objects.filter(post=OuterRef('pk'), user=user).values('rating')[:1]
+        ),
+    )
+
+
+def with_comment_preview(queryset, limit=COMMENT_PREVIEW_LIMIT):
+    """
+    Prefetch only the `limit` newest comments of each post into
+    `post.preview_comments`.
+
+    A sliced Prefetch is executed as one ROW_NUMBER() OVER (PARTITION BY post)
+    query, so viral posts no longer pull their whole comment history.
+    """
+    preview = PostComment.objects.select_related('user').order_by('-created_at', '-id')[:limit]
+    return queryset.prefetch_related(
+        Prefetch('comments', queryset=preview, to_attr='preview_comments')
+    )
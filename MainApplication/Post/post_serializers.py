@@ -3,8 +3,20 @@ from django.core.files.uploadedfile import InMemoryUploadedFile
 from PIL import Image
 import io
 import logging
-from .post_content_moderator import ImageModerationService
-from .video_content_moderator import VideoModerationService  # NEW IMPORT
+from .post_content_moderator import ImageModerationService, POST_MODERATION_DEADLINE, validate_image_upload
+from .video_content_moderator import VideoModerationService, validate_video_upload  # NEW IMPORT
+from .post_timeline import fan_out_post
+from .image_derivatives import derivative_srcset, derivative_urls, generate_post_derivatives
+from .video_transcoder import prepare_video_post
+from .post_counters import rating_histogram
+from .post_moderation import (
+    collect_image_rejections,
+    enqueue_moderation,
+    image_rejection_message,
+    is_async_moderation_enabled,
+    video_rejection_message,
+)
+from django.db import transaction
 
 from .post_models import Post, PostComment, PostImage, PostLike, PostRating, PostSave, PostShare
 
@@ -14,19 +26,39 @@ logger = logging.getLogger(__name__)
 class PostImageSerializer(serializers.ModelSerializer):
     """Serializer for post images"""
     image_url = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+    width = serializers.SerializerMethodField()
+    height = serializers.SerializerMethodField()
     
     class Meta:
         model = PostImage
-        fields = ['image_id', 'image_url', 'alt_text', 'order', 'created_at']  # Added alt_text
+        fields = ['image_id', 'image_url', 'variants', 'srcset', 'blurhash', 'width', 'height',
+                  'alt_text', 'order', 'created_at']  # Added alt_text
         read_only_fields = ['image_id', 'created_at']
     
-    def get_image_url(self, obj):
+    def _build_url(self, url):
         request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+    
+    def get_image_url(self, obj):
         if obj.image and hasattr(obj.image, 'url'):
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
+            return self._build_url(obj.image.url)
         return None
+    
+    def get_variants(self, obj):
+        """{'thumb': {'width', 'height', 'webp', 'avif'}, 'medium': ..., 'full': ...} or None"""
+        return derivative_urls(obj, self._build_url)
+    
+    def get_srcset(self, obj):
+        """{'avif': 'url 320w, url 1080w, ...', 'webp': ...} or None until generated"""
+        return derivative_srcset(obj, self._build_url)
+    
+    def get_width(self, obj):
+        return (obj.derivatives or {}).get('width')
+    
+    def get_height(self, obj):
+        return (obj.derivatives or {}).get('height')
 
 class PostCommentSerializer(serializers.ModelSerializer):
     """Serializer for post comments"""
@@ -49,21 +81,28 @@ class PostSerializer(serializers.ModelSerializer):
     user_username = serializers.CharField(source='user.username', read_only=True)
     is_liked = serializers.SerializerMethodField()
     video_url = serializers.SerializerMethodField()
+    video_stream_url = serializers.SerializerMethodField()
+    video_poster_url = serializers.SerializerMethodField()
     is_saved = serializers.SerializerMethodField()
     user_rating = serializers.SerializerMethodField()
+    rating_histogram = serializers.SerializerMethodField()
     class Meta:
         model = Post
         fields = [
             'post_id', 'user', 'user_email', 'user_username',
             'post_type', 'caption', 'images', 'video_url',
+            'video_stream_url', 'video_poster_url',
             'likes_count', 'comments_count', 'shares_count', 'saves_count',
-            'rating_count', 'average_rating',
+            'rating_count', 'average_rating', 'rating_histogram',
             'is_liked', 'is_saved', 'user_rating', 'comments', 
             'content_status', 'created_at', 'updated_at'
         ]
         read_only_fields = ['post_id', 'user', 'created_at', 'updated_at']
     
     def get_is_liked(self, obj):
+        # Listing views resolve viewer state for the whole page (see post_querysets)
+        if hasattr(obj, 'viewer_is_liked'):
+            return obj.viewer_is_liked
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return PostLike.objects.filter(post=obj, user=request.user).exists()
@@ -76,21 +115,58 @@ class PostSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.video.url)
             return obj.video.url
         return None
-
+    
+    def get_video_stream_url(self, obj):
+        """HLS master playlist once the transcode stage is done, else None (use video_url)"""
+        if obj.video_stream_status != 'ready' or not obj.video_stream or not obj.video:
+            return None
+        url = obj.video.storage.url(obj.video_stream['manifest'])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+    
+    def get_video_poster_url(self, obj):
+        if obj.video_poster and hasattr(obj.video_poster, 'url'):
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(obj.video_poster.url)
+            return obj.video_poster.url
+        return None
 
     def get_is_saved(self, obj):
+        if hasattr(obj, 'viewer_is_saved'):
+            return obj.viewer_is_saved
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return PostSave.objects.filter(post=obj, user=request.user).exists()
         return False
 
+    def get_rating_histogram(self, obj):
+        """{'1': n, ..., '5': n} from the post's running totals"""
+        return rating_histogram(obj)
+
     def get_user_rating(self, obj):
+        if hasattr(obj, 'viewer_rating'):
+            return obj.viewer_rating
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             rating = PostRating.objects.filter(post=obj, user=request.user).first()
             return rating.rating if rating else None
         return None
 
+
+class PostListSerializer(PostSerializer):
+    """
+    Compact post representation for listings.
+    Carries a few preview comments (see post_querysets.with_comment_preview)
+    instead of every comment; the full list is paginated via the comments API.
+    """
+    comments = None
+    preview_comments = PostCommentSerializer(many=True, read_only=True)
+
+    class Meta(PostSerializer.Meta):
+        fields = [f for f in PostSerializer.Meta.fields if f != 'comments'] + ['preview_comments']
+
+
 class PostCreateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating posts
@@ -112,7 +188,8 @@ class PostCreateSerializer(serializers.ModelSerializer):
     def validate_images(self, images):
         """
         Validate images with moderation service
-        This runs BEFORE post creation
+        This runs BEFORE post creation. With CONTENT_MODERATION_ASYNC only the
+        basic checks run here; NudeNet runs in the moderation worker.
         """
         if not images:
             return images
@@ -122,89 +199,46 @@ class PostCreateSerializer(serializers.ModelSerializer):
         
         logger.info(f"🔍 Starting moderation for {len(images)} image(s)")
         
-        # Initialize moderation service
-        moderation_service = ImageModerationService()
-        rejected_images = []
+        if is_async_moderation_enabled():
+            check_results = [validate_image_upload(image_file) for image_file in images]
+        else:
+            # Images are checked concurrently with one batched NudeNet pass;
+            # every image is checked so the message lists all rejections
+            check_results = ImageModerationService().check_images(
+                images, deadline=POST_MODERATION_DEADLINE
+            )
         
-        for idx, image_file in enumerate(images):
-            # Reset file pointer
-            if hasattr(image_file, 'seek'):
-                image_file.seek(0)
-            
-            logger.info(f"📷 Checking image {idx + 1}/{len(images)}: {image_file.name}")
-            
-            # Check the image
-            check_result = moderation_service.check_image(image_file)
-            
-            if not check_result['is_safe']:
-                moderation_data = check_result.get('moderation', {})
-                confidence = moderation_data.get('confidence', {})
-                
-                logger.warning(f"❌ Image {idx + 1} REJECTED: {check_result['message']}")
-                
-                rejected_images.append({
-                    'index': idx + 1,
-                    'filename': image_file.name,
-                    'reason': check_result['message'],
-                    'stage': check_result['stage'],
-                    'unsafe_score': confidence.get('unsafe', 0) if confidence else 0,
-                    'details': moderation_data.get('details', {})
-                })
-            else:
-                logger.info(f"✅ Image {idx + 1} APPROVED")
+        rejected_images = collect_image_rejections(images, check_results)
         
         # If any images failed, raise validation error
         if rejected_images:
             logger.error(f"🚫 {len(rejected_images)} image(s) failed moderation")
-            
-            # Create detailed error message
-            error_details = []
-            for r in rejected_images:
-                unsafe_parts = r.get('details', {}).get('unsafe_parts', [])
-                if unsafe_parts:
-                    parts_str = ', '.join([f"{p['label']} ({p['score']:.2f})" for p in unsafe_parts])
-                    error_details.append(f"{r['filename']}: {parts_str}")
-                else:
-                    error_details.append(f"{r['filename']}: {r['reason']}")
-            
-            error_msg = f"Content moderation failed for {len(rejected_images)} image(s): " + "; ".join(error_details)
-            raise serializers.ValidationError(error_msg)
+            raise serializers.ValidationError(image_rejection_message(rejected_images))
         
         logger.info(f"✅ All {len(images)} image(s) passed moderation")
         return images
+    
     def validate_video(self, video):
         """
         Validate video with moderation service
         Extracts frames and checks them for NSFW content
+        (basic checks only with CONTENT_MODERATION_ASYNC)
         """
         if not video:
             return video
         
         logger.info(f"🎬 Starting video moderation for: {video.name}")
         
-        # Initialize video moderation service
-        video_service = VideoModerationService()
-        
-        # Check video (extracts frames and analyzes them)
-        result = video_service.check_video(video)
+        if is_async_moderation_enabled():
+            result = validate_video_upload(video)
+        else:
+            # Check video (extracts frames and analyzes them); the safe frames
+            # are kept as poster candidates for create()
+            self._video_frames = []
+            result = VideoModerationService().check_video(video, frame_sink=self._video_frames)
         
         if not result['is_safe']:
-            moderation_data = result.get('moderation', {})
-            details = moderation_data.get('details', {}) if moderation_data else {}
-            unsafe_count = details.get('unsafe_frames_count', 0)
-            unsafe_frames = details.get('unsafe_frames', [])
-            
-            # Create detailed error message
-            if unsafe_frames:
-                timestamps = [f"{uf['timestamp']}s" for uf in unsafe_frames[:3]]
-                error_msg = (
-                    f"Video contains inappropriate content. "
-                    f"{unsafe_count} unsafe frame(s) detected at: {', '.join(timestamps)}"
-                    f"{' ...' if len(unsafe_frames) > 3 else ''}"
-                )
-            else:
-                error_msg = result['message']
-            
+            error_msg = video_rejection_message(result)
             logger.warning(f"❌ Video rejected: {error_msg}")
             raise serializers.ValidationError(error_msg)
         
@@ -246,12 +280,16 @@ class PostCreateSerializer(serializers.ModelSerializer):
         # Extract user (passed from view)
         user = validated_data.pop('user', None)
         
+        # Media posts wait for the moderation worker before going live
+        moderate_later = is_async_moderation_enabled() and bool(images or video)
+        
         # Create post with only the fields that belong to Post model
         post = Post.objects.create(
             user=user,
             post_type=validated_data.get('post_type'),
             caption=validated_data.get('caption', ''),
-            video=video  # This is handled by Post model's video field
+            video=video,  # This is handled by Post model's video field
+            content_status='pending' if moderate_later else 'approved'
         )
         
         # Create PostImage instances for each image
@@ -262,6 +300,20 @@ class PostCreateSerializer(serializers.ModelSerializer):
                 order=idx
             )
         
+        if moderate_later:
+            # Worker approves/rejects and fans out afterwards
+            transaction.on_commit(lambda: enqueue_moderation(post))
+        else:
+            if images:
+                # Feed-sized WebP/AVIF variants (the worker does this in async mode)
+                transaction.on_commit(lambda: generate_post_derivatives(post))
+            if video:
+                # Poster from the moderation frames, then queue the HLS transcode
+                video_frames = getattr(self, '_video_frames', None)
+                transaction.on_commit(lambda: prepare_video_post(post, video_frames))
+            # Push into followers' home timelines once the post is committed
+            transaction.on_commit(lambda: fan_out_post(post))
+        
         logger.info(f"✅ Post created: ID={post.post_id}, Images={len(images)}")
         return post
     
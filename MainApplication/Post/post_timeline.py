@@ -0,0 +1,169 @@
+# MainApplication/Post/post_timeline.py
+"""
+Home timeline built from the follow graph.
+
+Fan-out-on-write: when a post is approved its id is pushed into the
+TimelineEntry inbox of the author and of every follower, so reading a
+timeline is one range scan on (owner, -post_created_at).
+
+Accounts with more than TIMELINE_FANOUT_FOLLOWER_LIMIT followers are not
+fanned out; their posts are merged in at read time (fan-out-on-read).
+"""
+
+import logging
+
+from django.conf import settings
+
+from .post_models import Post, TimelineEntry
+from ..User.models import UserFollowingModel, UserProfileModel
+from ..pagination import KeysetPaginator, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+
+FANOUT_FOLLOWER_LIMIT = getattr(settings, 'TIMELINE_FANOUT_FOLLOWER_LIMIT', 5000)
+BACKFILL_POSTS_PER_AUTHOR = getattr(settings, 'TIMELINE_BACKFILL_POSTS_PER_AUTHOR', 200)
+FANOUT_BATCH_SIZE = 1000
+
+
+def _visible_posts():
+    """Posts that may appear in a timeline"""
+    return Post.objects.filter(is_deleted=False, is_active=True, content_status='approved')
+
+
+def follower_user_ids(author):
+    """User ids currently following `author`"""
+    return UserFollowingModel.objects.filter(
+        following__user=author,
+        followed=True
+    ).values_list('user_profile__user_id', flat=True)
+
+
+def followed_user_ids(user):
+    """User ids `user` currently follows"""
+    return UserFollowingModel.objects.filter(
+        user_profile__user=user,
+        followed=True
+    ).values_list('following__user_id', flat=True)
+
+
+def uses_fanout_on_read(author):
+    """True for high-follower accounts whose posts are merged in at read time"""
+    followers = UserProfileModel.objects.filter(user=author).values_list('followers_count', flat=True).first()
+    return (followers or 0) > FANOUT_FOLLOWER_LIMIT
+
+
+def _fanout_on_read_author_ids(user):
+    """Followed authors that are above the fan-out limit"""
+    return list(
+        UserProfileModel.objects.filter(
+            user_id__in=followed_user_ids(user),
+            followers_count__gt=FANOUT_FOLLOWER_LIMIT
+        ).values_list('user_id', flat=True)
+    )
+
+
+def _push(post, owner_ids):
+    """Insert `post` into the inbox of every owner id, in batches"""
+    batch = []
+    for owner_id in owner_ids:
+        batch.append(TimelineEntry(
+            owner_id=owner_id,
+            post=post,
+            author_id=post.user_id,
+            post_created_at=post.created_at
+        ))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out_post(post):
+    """Push an approved post into its author's and followers' timelines"""
+    if post.content_status != 'approved' or post.is_deleted or not post.is_active:
+        return
+
+    # The author always sees their own posts
+    _push(post, [post.user_id])
+
+    if uses_fanout_on_read(post.user):
+        logger.info(f"📣 Post {post.post_id}: high-follower author, fan-out-on-read")
+        return
+
+    _push(post, follower_user_ids(post.user).iterator())
+    logger.info(f"📣 Post {post.post_id} fanned out to followers of {post.user_id}")
+
+
+def _posts_as_entries(owner, posts):
+    return [
+        TimelineEntry(
+            owner=owner,
+            post_id=post_id,
+            author_id=author_id,
+            post_created_at=created_at
+        )
+        for post_id, author_id, created_at in posts.values_list('id', 'user_id', 'created_at')
+    ]
+
+
+def add_author_to_timeline(user, author):
+    """On follow: copy the author's recent posts into the follower's timeline"""
+    if uses_fanout_on_read(author):
+        return
+    recent = _visible_posts().filter(user=author).order_by('-created_at', '-id')[:BACKFILL_POSTS_PER_AUTHOR]
+    TimelineEntry.objects.bulk_create(_posts_as_entries(user, recent), ignore_conflicts=True)
+
+
+def remove_author_from_timeline(user, author):
+    """On unfollow: drop the author's posts from the follower's timeline"""
+    TimelineEntry.objects.filter(owner=user, author=author).delete()
+
+
+def rebuild_timeline(user):
+    """Recreate a user's inbox from their own posts and the accounts they follow"""
+    TimelineEntry.objects.filter(owner=user).delete()
+
+    author_ids = set(followed_user_ids(user))
+    author_ids -= set(_fanout_on_read_author_ids(user))
+    author_ids.add(user.id)
+
+    for author_id in author_ids:
+        recent = _visible_posts().filter(user_id=author_id).order_by('-created_at', '-id')[:BACKFILL_POSTS_PER_AUTHOR]
+        TimelineEntry.objects.bulk_create(_posts_as_entries(user, recent), ignore_conflicts=True)
+
+
+def get_timeline_page(request, user):
+    """
+    One page of the user's home timeline.
+    Returns (post_ids newest first, next_cursor, has_more).
+    """
+    paginator = KeysetPaginator(request, created_field='post_created_at', id_field='post_id')
+    page_size = paginator.get_page_size()
+    position = paginator.get_position()
+
+    # Inbox range scan
+    entries = TimelineEntry.objects.filter(owner=user)
+    if position is not None:
+        entries = paginator.filter_after(entries, position)
+    candidates = list(
+        entries.order_by('-post_created_at', '-post_id').values_list('post_created_at', 'post_id')[:page_size + 1]
+    )
+
+    # Fan-out-on-read merge for high-follower accounts
+    celebrity_ids = _fanout_on_read_author_ids(user)
+    if celebrity_ids:
+        posts = _visible_posts().filter(user_id__in=celebrity_ids)
+        if position is not None:
+            posts = KeysetPaginator(request).filter_after(posts, position)
+        candidates += list(
+            posts.order_by('-created_at', '-id').values_list('created_at', 'id')[:page_size + 1]
+        )
+        candidates = sorted(set(candidates), reverse=True)
+
+    has_more = len(candidates) > page_size
+    candidates = candidates[:page_size]
+    next_cursor = encode_cursor(*candidates[-1]) if has_more and candidates else None
+
+    return [post_id for _, post_id in candidates], next_cursor, has_more
@@ -10,6 +10,9 @@ urlpatterns = [
 
     path('create/image/', post_views.PostImageCreateView.as_view(), name='post-create-image'),
     path('create/video/', post_views.PostVideoCreateView.as_view(), name='post-create-video'),
+    path('uploads/', post_views.UploadSessionCreateView.as_view(), name='upload-create'),
+    path('uploads/commit/', post_views.UploadSessionCommitView.as_view(), name='upload-commit'),
+    path('uploads/<uuid:upload_id>/', post_views.UploadSessionDetailView.as_view(), name='upload-detail'),
     path('<int:pk>/like/', post_views.PostLikeView.as_view(), name='post-like'),
     path('<int:pk>/save/', post_views.PostSaveView.as_view(), name='post-save'),
     path('<int:pk>/share/', post_views.PostShareView.as_view(), name='post-share'),
@@ -20,6 +23,7 @@ urlpatterns = [
     path('<int:pk>/', post_views.PostDetailView.as_view(), name='post-detail'),
     
     path('device-token/', post_views.update_device_token, name='update-device-token'),
+    path('moderation/metrics/', post_views.moderation_metrics, name='moderation-metrics'),
 
     
     
@@ -2,7 +2,7 @@
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework import status
 from django.shortcuts import get_object_or_404
@@ -13,28 +13,75 @@ import logging
 from .post_models import Post, PostLike, PostComment, PostImage, PostSave, PostShare, PostRating
 from .post_serializers import (
     PostSerializer, 
+    PostListSerializer,
     PostCreateSerializer, 
     PostCommentSerializer,
     PostImageSerializer
 )
-from .post_content_moderator import ImageModerationService
+from .post_content_moderator import ImageModerationService, POST_MODERATION_DEADLINE
+from .chunked_upload import (
+    UploadError, abort_session, append_chunk, commit_sessions, committed_post, create_session,
+    describe_session, finish_sessions, get_session, release_sessions
+)
 from django.db import transaction
 from django.db import models
-from ..Credit.credit_models import CreditTransactionLog, UserCreditVault, CreditModel, CreditCostsModel
+from ..Credit.credit_ledger import CreditLedger, InsufficientCredits
+from ..Credit.credit_config import get_credit_costs
+from .post_querysets import with_viewer_state, with_comment_preview
+from .post_counters import change_counter, rating_histogram, record_rating
+from .post_timeline import get_timeline_page
+from .detector_registry import get_detector_metrics
+from ..pagination import KeysetPaginator, InvalidCursor
+from ..idempotency import idempotent
 # Setup logging
 logger = logging.getLogger(__name__)
 
 
+def _paginated_posts_response(request, queryset):
+    """
+    Serialize one keyset page of posts (newest first) with the viewer's
+    like/save/rating state resolved for the whole page.
+    Walks the (-created_at) / (user, -created_at) indexes; no COUNT query.
+    """
+    paginator = KeysetPaginator(request)
+    queryset = with_comment_preview(with_viewer_state(queryset, request.user))
+    try:
+        posts = paginator.paginate_queryset(queryset)
+    except InvalidCursor as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = PostListSerializer(posts, many=True, context={'request': request})
+    return Response({
+        'success': True,
+        'count': len(posts),
+        'posts': serializer.data,
+        'next_cursor': paginator.next_cursor,
+        'has_more': paginator.has_more
+    }, status=status.HTTP_200_OK)
+
+
+def _insufficient_credits_response(error):
+    return Response({
+        'success': False,
+        'error': str(error),
+        'required_credits': error.required,
+        'available_credits': error.available
+    }, status=status.HTTP_402_PAYMENT_REQUIRED)
+
+
 class PostListCreateView(APIView):
     """
-    GET: List all posts
+    GET: List posts, newest first (cursor paginated)
     POST: Create a new post (image/video/text)
     """
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     
     def get(self, request):
-        """Get all posts or filter by user_id"""
+        """Get a page of posts, optionally filtered by user_id (?cursor=&page_size=)"""
         user_id = request.query_params.get('user_id', None)
         
         queryset = Post.objects.filter(
@@ -46,16 +93,9 @@ class PostListCreateView(APIView):
         if user_id:
             queryset = queryset.filter(user__id=user_id)
         
-        queryset = queryset.select_related('user').prefetch_related(
-            'images', 'comments', 'likes'
-        ).order_by('-created_at')
+        queryset = queryset.select_related('user').prefetch_related('images')
         
-        serializer = PostSerializer(queryset, many=True, context={'request': request})
-        return Response({
-            'success': True,
-            'count': queryset.count(),
-            'posts': serializer.data
-        }, status=status.HTTP_200_OK)
+        return _paginated_posts_response(request, queryset)
     
     def post(self, request):
         """
@@ -119,7 +159,7 @@ class PostDetailView(APIView):
         caption = request.data.get('caption')
         if caption is not None:
             post.caption = caption
-            post.save()
+            post.save(update_fields=['caption', 'updated_at'])
         
         output_serializer = PostSerializer(post, context={'request': request})
         return Response({
@@ -141,7 +181,7 @@ class PostDetailView(APIView):
         
         post.is_deleted = True
         post.deleted_at = timezone.now()
-        post.save()
+        post.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
         
         return Response({
             'success': True,
@@ -249,24 +289,195 @@ class PostVideoCreateView(APIView):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _upload_error_response(error):
+    body = {'success': False, 'error': str(error)}
+    if error.offset is not None:
+        body['offset'] = error.offset
+    return Response(body, status=error.status)
+
+
+class UploadSessionCreateView(APIView):
+    """
+    POST: Start a resumable chunked upload (see Post/chunked_upload.py)
+    {media_type: 'image'|'video', filename, size, content_type}
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, FormParser]
+    
+    def post(self, request):
+        try:
+            session = create_session(
+                request.user,
+                request.data.get('media_type'),
+                request.data.get('filename'),
+                request.data.get('size'),
+                request.data.get('content_type', '')
+            )
+        except UploadError as e:
+            return _upload_error_response(e)
+        
+        return Response({
+            'success': True,
+            'upload': describe_session(session)
+        }, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailView(APIView):
+    """
+    GET: Current offset (resume point) and early moderation result
+    PATCH: Append a chunk; raw body, Upload-Offset header
+    DELETE: Abort the upload
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, upload_id):
+        try:
+            session = get_session(request.user, upload_id)
+        except UploadError as e:
+            return _upload_error_response(e)
+        
+        return Response({
+            'success': True,
+            'upload': describe_session(session)
+        }, status=status.HTTP_200_OK)
+    
+    def patch(self, request, upload_id):
+        # The body is streamed to disk, never parsed (request.data is not touched)
+        try:
+            session = append_chunk(
+                request.user,
+                upload_id,
+                request.META.get('HTTP_UPLOAD_OFFSET'),
+                request.stream,
+                request.META.get('CONTENT_LENGTH')
+            )
+        except UploadError as e:
+            return _upload_error_response(e)
+        
+        return Response({
+            'success': True,
+            'upload': describe_session(session)
+        }, status=status.HTTP_200_OK)
+    
+    def delete(self, request, upload_id):
+        try:
+            session = get_session(request.user, upload_id)
+        except UploadError as e:
+            return _upload_error_response(e)
+        
+        abort_session(session)
+        return Response({
+            'success': True,
+            'message': 'Upload aborted'
+        }, status=status.HTTP_200_OK)
+
+
+class UploadSessionCommitView(APIView):
+    """
+    POST: Create a post from complete uploads
+    {post_type: 'image'|'video', caption, upload_ids: [...]}
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser]
+    
+    def post(self, request):
+        post_type = request.data.get('post_type')
+        upload_ids = request.data.get('upload_ids') or []
+        
+        # A retry of a commit that already succeeded gets the same post back
+        existing = committed_post(request.user, upload_ids) if upload_ids else None
+        if existing:
+            output_serializer = PostSerializer(existing, context={'request': request})
+            return Response({
+                'success': True,
+                'message': 'Post already created',
+                'post': output_serializer.data
+            }, status=status.HTTP_200_OK)
+        
+        try:
+            sessions, files, rejection = commit_sessions(
+                request.user, post_type, upload_ids,
+                timeout=POST_MODERATION_DEADLINE
+            )
+        except UploadError as e:
+            return _upload_error_response(e)
+        
+        if rejection:
+            logger.warning(f"❌ Upload commit rejected early: {rejection}")
+            return Response({
+                'success': False,
+                'error': 'Failed to create post',
+                'errors': {'images' if post_type == 'image' else 'video': [rejection]}
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = {
+            'caption': request.data.get('caption', ''),
+            'post_type': post_type,
+        }
+        if post_type == 'image':
+            data['images'] = files
+        else:
+            data['video'] = files[0]
+        
+        serializer = PostCreateSerializer(data=data)
+        post = None
+        try:
+            if serializer.is_valid():
+                # The post and the committed sessions are saved together
+                with transaction.atomic():
+                    created = serializer.save(user=request.user)
+                    finish_sessions(sessions, created)
+                post = created
+        finally:
+            for media_file in files:
+                media_file.close()
+            if post is None:
+                release_sessions(sessions)
+        
+        if post is None:
+            logger.warning(f"❌ Post creation failed: {serializer.errors}")
+            return Response({
+                'success': False,
+                'error': 'Failed to create post',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        output_serializer = PostSerializer(post, context={'request': request})
+        return Response({
+            'success': True,
+            'message': 'Post created successfully',
+            'post': output_serializer.data
+        }, status=status.HTTP_201_CREATED)
 
 
 class PostCommentListCreateView(APIView):
     """
-    GET: Get all comments for a post
+    GET: Get a page of comments for a post, newest first (cursor paginated)
     POST: Add a comment to a post
     """
     permission_classes = [IsAuthenticated]
     
     def get(self, request, pk):
-        """Get all comments for a post"""
+        """Get comments for a post (?cursor=&page_size=), walks the (post, -created_at) index"""
         post = get_object_or_404(Post, pk=pk, is_deleted=False, is_active=True)
-        comments = post.comments.all().order_by('-created_at')
-        serializer = PostCommentSerializer(comments, many=True)
+        comments = post.comments.select_related('user')
+        
+        paginator = KeysetPaginator(request)
+        try:
+            page = paginator.paginate_queryset(comments)
+        except InvalidCursor as e:
+            return Response({
+                'success': False,
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = PostCommentSerializer(page, many=True)
         return Response({
             'success': True,
-            'count': comments.count(),
-            'comments': serializer.data
+            'count': len(page),
+            'comments': serializer.data,
+            'next_cursor': paginator.next_cursor,
+            'has_more': paginator.has_more
         }, status=status.HTTP_200_OK)
     
     def post(self, request, pk):
@@ -278,9 +489,8 @@ class PostCommentListCreateView(APIView):
         if serializer.is_valid():
             comment = serializer.save(user=request.user, post=post)
             
-            # Increment comment count
-            post.comments_count += 1
-            post.save()
+            # Increment comment count (single-column UPDATE, see post_counters)
+            change_counter(post, 'comments_count', 1)
             
             return Response({
                 'success': True,
@@ -347,8 +557,7 @@ class PostCommentDetailView(APIView):
         comment.delete()
         
         # Decrement comment count
-        post.comments_count = max(0, post.comments_count - 1)
-        post.save()
+        change_counter(post, 'comments_count', -1)
         
         return Response({
             'success': True,
@@ -359,62 +568,65 @@ class PostCommentDetailView(APIView):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_posts(request):
-    """Get all posts by the current user"""
+    """Get the current user's posts, one page at a time"""
     posts = Post.objects.filter(
         user=request.user,
         is_deleted=False,
         is_active=True
-    ).select_related('user').prefetch_related(
-        'images', 'comments', 'likes'
-    ).order_by('-created_at')
+    ).select_related('user').prefetch_related('images')
     
-    serializer = PostSerializer(posts, many=True, context={'request': request})
-    return Response({
-        'success': True,
-        'count': posts.count(),
-        'posts': serializer.data
-    }, status=status.HTTP_200_OK)
+    return _paginated_posts_response(request, posts)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def feed(request):
-    """Get feed of posts (all posts or following users)"""
+    """
+    Home timeline: the user's own posts and posts from accounts they follow.
+    Read from the precomputed inbox (see post_timeline), cursor paginated.
+    """
+    try:
+        post_ids, next_cursor, has_more = get_timeline_page(request, request.user)
+    except InvalidCursor as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
     posts = Post.objects.filter(
+        id__in=post_ids,
         is_deleted=False,
         is_active=True,
         content_status='approved'
-    ).select_related('user').prefetch_related(
-        'images', 'comments', 'likes'
-    ).order_by('-created_at')[:50]
+    ).select_related('user').prefetch_related('images')
+    posts = with_comment_preview(with_viewer_state(posts, request.user))
+    
+    # Keep timeline order
+    posts_by_id = {post.id: post for post in posts}
+    posts = [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id]
     
-    serializer = PostSerializer(posts, many=True, context={'request': request})
+    serializer = PostListSerializer(posts, many=True, context={'request': request})
     return Response({
         'success': True,
-        'count': posts.count(),
-        'posts': serializer.data
+        'count': len(posts),
+        'posts': serializer.data,
+        'next_cursor': next_cursor,
+        'has_more': has_more
     }, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_posts(request, user_id):
-    """Get all posts by a specific user"""
+    """Get posts by a specific user, one page at a time"""
     posts = Post.objects.filter(
         user__id=user_id,
         is_deleted=False,
         is_active=True,
         content_status='approved'
-    ).select_related('user').prefetch_related(
-        'images', 'comments', 'likes'
-    ).order_by('-created_at')
+    ).select_related('user').prefetch_related('images')
     
-    serializer = PostSerializer(posts, many=True, context={'request': request})
-    return Response({
-        'success': True,
-        'count': posts.count(),
-        'posts': serializer.data
-    }, status=status.HTTP_200_OK)
+    return _paginated_posts_response(request, posts)
 
 
 class PostSaveView(APIView):
@@ -429,23 +641,21 @@ class PostSaveView(APIView):
         if not created:
             # Unsave
             save.delete()
-            post.saves_count = max(0, post.saves_count - 1)
-            post.save()
+            saves_count = change_counter(post, 'saves_count', -1)
             return Response({
                 'success': True,
                 'message': 'Post unsaved',
                 'saved': False,
-                'saves_count': post.saves_count
+                'saves_count': saves_count
             }, status=status.HTTP_200_OK)
         else:
             # Save
-            post.saves_count += 1
-            post.save()
+            saves_count = change_counter(post, 'saves_count', 1)
             return Response({
                 'success': True,
                 'message': 'Post saved',
                 'saved': True,
-                'saves_count': post.saves_count
+                'saves_count': saves_count
             }, status=status.HTTP_201_CREATED)
 
 
@@ -460,20 +670,20 @@ class PostShareView(APIView):
         PostShare.objects.create(post=post, user=request.user)
         
         # Increment share count
-        post.shares_count += 1
-        post.save()
+        shares_count = change_counter(post, 'shares_count', 1)
         
         return Response({
             'success': True,
             'message': 'Post shared successfully',
-            'shares_count': post.shares_count
+            'shares_count': shares_count
         }, status=status.HTTP_201_CREATED)
 
 
 class PostRatingView(APIView):
-    """POST: Rate a post (1-5 stars) - COSTS CREDITS"""
+    """POST: Rate a post (1-5 stars) - COSTS CREDITS (honours Idempotency-Key)"""
     permission_classes = [IsAuthenticated]
     
+    @idempotent
     @transaction.atomic
     def post(self, request, pk):
         post = get_object_or_404(Post, pk=pk, is_deleted=False, is_active=True)
@@ -485,18 +695,16 @@ class PostRatingView(APIView):
                 'success': False,
                 'error': 'Rating must be between 1 and 5'
             }, status=status.HTTP_400_BAD_REQUEST)
+        rating_value = int(rating_value)
         
         # Get credit costs
-        credit_costs = CreditCostsModel.objects.first()
+        credit_costs = get_credit_costs()
         if not credit_costs or not credit_costs.star_rating_cost:
             return Response({
                 'success': False,
                 'error': 'Rating cost not configured'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-        # Get user's credit vault
-        vault, _ = UserCreditVault.objects.get_or_create(user=request.user)
-        
         # Check if user already rated this post
         existing_rating = PostRating.objects.filter(post=post, user=request.user).first()
         
@@ -506,14 +714,11 @@ class PostRatingView(APIView):
             existing_rating.rating = rating_value
             existing_rating.save()
             
-            # Recalculate average
-            post.average_rating = PostRating.objects.filter(post=post).aggregate(
-                avg=models.Avg('rating')
-            )['avg'] or 0
-            post.save()
+            # Move the rating between histogram buckets (no rescan of the post's ratings)
+            record_rating(post, rating_value, previous=old_rating)
             
             # 🔔 SEND NOTIFICATION FOR UPDATED RATING
-            if post.user.fcm_token and post.user.notifications_enabled:
+            if getattr(post.user, 'fcm_token', None) and getattr(post.user, 'notifications_enabled', True):
                 if post.user != request.user:  # Don't notify if rating own post
                     send_push_notification(
                         fcm_token=post.user.fcm_token,
@@ -534,45 +739,31 @@ class PostRatingView(APIView):
                 'message': f'Rating updated from {old_rating}⭐ to {rating_value}⭐',
                 'rating': rating_value,
                 'average_rating': float(post.average_rating),
+                'rating_histogram': rating_histogram(post),
                 'credits_used': 0
             }, status=status.HTTP_200_OK)
         
-        # Check if user has enough credits for NEW rating
+        # Deduct credits for a NEW rating (conditional UPDATE + log, see credit_ledger)
         required_credits = int(credit_costs.star_rating_cost)
-        if vault.total_credits < required_credits:
-            return Response({
-                'success': False,
-                'error': f'Insufficient credits. Need {required_credits}, have {vault.total_credits}',
-                'required_credits': required_credits,
-                'available_credits': vault.total_credits
-            }, status=status.HTTP_402_PAYMENT_REQUIRED)
-        
-        # Deduct credits
-        vault.total_credits -= required_credits
-        vault.spent_credits += required_credits
-        vault.save()
-        
-        # Create transaction log
-        CreditTransactionLog.objects.create(
-            user=request.user,
-            transaction_type='Rating',
-            credits_changed=-required_credits,
-            value_changed=-credit_costs.star_rating_cost,
-            description=f'Rated post {post.post_id} with {rating_value} stars'
-        )
+        try:
+            remaining_credits = CreditLedger.spend(
+                request.user,
+                required_credits,
+                f'Rated post {post.post_id} with {rating_value} stars',
+                transaction_type='Rating',
+                value=credit_costs.star_rating_cost
+            )
+        except InsufficientCredits as e:
+            return _insufficient_credits_response(e)
         
         # Create rating
         PostRating.objects.create(post=post, user=request.user, rating=rating_value)
         
-        # Update post stats
-        post.rating_count += 1
-        post.average_rating = PostRating.objects.filter(post=post).aggregate(
-            avg=models.Avg('rating')
-        )['avg'] or 0
-        post.save()
+        # Update post stats (running sum/count/histogram, see post_counters)
+        record_rating(post, rating_value)
         
         # 🔔 SEND NOTIFICATION FOR NEW RATING
-        if post.user.fcm_token and post.user.notifications_enabled:
+        if getattr(post.user, 'fcm_token', None) and getattr(post.user, 'notifications_enabled', True):
             if post.user != request.user:  # Don't notify if rating own post
                 send_push_notification(
                     fcm_token=post.user.fcm_token,
@@ -592,15 +783,17 @@ class PostRatingView(APIView):
             'message': f'Post rated {rating_value}⭐ successfully',
             'rating': rating_value,
             'average_rating': float(post.average_rating),
+            'rating_histogram': rating_histogram(post),
             'credits_used': required_credits,
-            'remaining_credits': vault.total_credits
+            'remaining_credits': remaining_credits
         }, status=status.HTTP_201_CREATED)
 
 # Update PostLikeView to use credits
 class PostLikeView(APIView):
-    """POST: Like or unlike a post - COSTS CREDITS"""
+    """POST: Like or unlike a post - COSTS CREDITS (honours Idempotency-Key)"""
     permission_classes = [IsAuthenticated]
     
+    @idempotent
     @transaction.atomic
     def post(self, request, pk):
         post = get_object_or_404(Post, pk=pk, is_deleted=False, is_active=True)
@@ -611,62 +804,46 @@ class PostLikeView(APIView):
         if existing_like:
             # Unlike (FREE - no credit refund)
             existing_like.delete()
-            post.likes_count = max(0, post.likes_count - 1)
-            post.save()
+            likes_count = change_counter(post, 'likes_count', -1)
             return Response({
                 'success': True,
                 'message': 'Post unliked',
                 'liked': False,
-                'likes_count': post.likes_count
+                'likes_count': likes_count
             }, status=status.HTTP_200_OK)
         
         # Get credit costs
-        credit_costs = CreditCostsModel.objects.first()
+        credit_costs = get_credit_costs()
         if not credit_costs or not credit_costs.post_liking_cost:
             return Response({
                 'success': False,
                 'error': 'Like cost not configured'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-        # Get user's credit vault
-        vault, _ = UserCreditVault.objects.get_or_create(user=request.user)
-        
-        # Check credits
+        # Deduct credits (conditional UPDATE + log, see credit_ledger)
         required_credits = int(credit_costs.post_liking_cost)
-        if vault.total_credits < required_credits:
-            return Response({
-                'success': False,
-                'error': f'Insufficient credits. Need {required_credits}, have {vault.total_credits}',
-                'required_credits': required_credits,
-                'available_credits': vault.total_credits
-            }, status=status.HTTP_402_PAYMENT_REQUIRED)
-        
-        # Deduct credits
-        vault.total_credits -= required_credits
-        vault.spent_credits += required_credits
-        vault.save()
-        
-        # Log transaction
-        CreditTransactionLog.objects.create(
-            user=request.user,
-            transaction_type='Like',
-            credits_changed=-required_credits,
-            value_changed=-credit_costs.post_liking_cost,
-            description=f'Liked post {post.post_id}'
-        )
+        try:
+            remaining_credits = CreditLedger.spend(
+                request.user,
+                required_credits,
+                f'Liked post {post.post_id}',
+                transaction_type='Like',
+                value=credit_costs.post_liking_cost
+            )
+        except InsufficientCredits as e:
+            return _insufficient_credits_response(e)
         
         # Create like
         PostLike.objects.create(post=post, user=request.user)
-        post.likes_count += 1
-        post.save()
+        likes_count = change_counter(post, 'likes_count', 1)
         
         return Response({
             'success': True,
             'message': 'Post liked',
             'liked': True,
-            'likes_count': post.likes_count,
+            'likes_count': likes_count,
             'credits_used': required_credits,
-            'remaining_credits': vault.total_credits
+            'remaining_credits': remaining_credits
         }, status=status.HTTP_201_CREATED)
     
 
@@ -674,10 +851,14 @@ class PostLikeView(APIView):
 @permission_classes([IsAuthenticated])
 def saved_posts(request):
     """Get all saved posts by the current user"""
-    saved = PostSave.objects.filter(user=request.user).select_related('post')
-    posts = [s.post for s in saved if not s.post.is_deleted and s.post.is_active]
+    posts = Post.objects.filter(
+        saves__user=request.user,
+        is_deleted=False,
+        is_active=True
+    ).select_related('user').prefetch_related('images').order_by('-saves__created_at')
+    posts = list(with_comment_preview(with_viewer_state(posts, request.user)))
     
-    serializer = PostSerializer(posts, many=True, context={'request': request})
+    serializer = PostListSerializer(posts, many=True, context={'request': request})
     return Response({
         'success': True,
         'count': len(posts),
@@ -722,4 +903,14 @@ def update_device_token(request):
     return Response({
         'success': True,
         'message': 'Device token saved successfully'
-    }, status=status.HTTP_200_OK)
\ No newline at end of file
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def moderation_metrics(request):
+    """NudeNet detector load-time and session-reuse metrics for this worker process"""
+    return Response({
+        'success': True,
+        'detector': get_detector_metrics()
+    }, status=status.HTTP_200_OK)
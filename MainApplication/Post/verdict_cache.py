@@ -0,0 +1,216 @@
+# MainApplication/Post/verdict_cache.py
+"""
+Persistent moderation verdict cache.
+
+Every moderated upload is recorded in ModerationVerdict under its SHA-256
+(and, for images, a 64-bit dHash) together with a version string for the
+model, threshold and label set, so a model or threshold change never reuses
+old verdicts.
+
+Lookups:
+    - exact:      same SHA-256 -> reuse the verdict (approved or rejected)
+    - perceptual: dHash within PHASH_MAX_DISTANCE of a *rejected* image ->
+                  reject (re-encoded / resized / recompressed re-uploads).
+                  Near-duplicates of approved images are still checked, a
+                  small edit can add exactly the content we look for.
+
+Approved verdicts live for CONTENT_MODERATION_VERDICT_TTL_DAYS, rejected
+ones never expire.
+"""
+
+import hashlib
+import logging
+from datetime import timedelta
+from functools import lru_cache
+from importlib.metadata import PackageNotFoundError, version
+
+import cv2
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .post_models import ModerationVerdict
+
+logger = logging.getLogger(__name__)
+
+
+VERDICT_CACHE_ENABLED = getattr(settings, 'CONTENT_MODERATION_VERDICT_CACHE', True)
+APPROVED_TTL = timedelta(days=getattr(settings, 'CONTENT_MODERATION_VERDICT_TTL_DAYS', 30))
+
+PHASH_CHUNKS = 4
+PHASH_CHUNK_BITS = 16
+# Multi-index hashing only guarantees a shared chunk up to PHASH_CHUNKS - 1 bits apart
+PHASH_MAX_DISTANCE = min(
+    getattr(settings, 'CONTENT_MODERATION_PHASH_DISTANCE', 3),
+    PHASH_CHUNKS - 1
+)
+
+SHA_CHUNK_SIZE = 64 * 1024
+
+
+@lru_cache(maxsize=1)
+def _nudenet_version():
+    try:
+        return version('nudenet')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def verdict_version(threshold, labels, *extra):
+    """Cache key part for the model, threshold, label set and any sampling options"""
+    labels_digest = hashlib.sha1(','.join(sorted(labels)).encode()).hexdigest()[:8]
+    parts = [f"nudenet-{_nudenet_version()}", f"t{threshold}", labels_digest]
+    parts += [str(e) for e in extra]
+    return ':'.join(parts)
+
+
+# ---------------------------------------------------------------------------
+# Hashing
+# ---------------------------------------------------------------------------
+
+def file_sha256(media_file):
+    """SHA-256 of an upload or stored file, read in chunks"""
+    precomputed = getattr(media_file, 'sha256', None)
+    if isinstance(precomputed, str):
+        # Chunked uploads hash while the bytes arrive (see chunked_upload)
+        return precomputed
+
+    if hasattr(media_file, 'seek'):
+        media_file.seek(0)
+
+    digest = hashlib.sha256()
+    if hasattr(media_file, 'chunks'):
+        for chunk in media_file.chunks(SHA_CHUNK_SIZE):
+            digest.update(chunk)
+    else:
+        for chunk in iter(lambda: media_file.read(SHA_CHUNK_SIZE), b''):
+            digest.update(chunk)
+
+    if hasattr(media_file, 'seek'):
+        media_file.seek(0)
+    return digest.hexdigest()
+
+
+def dhash(image):
+    """64-bit difference hash of a decoded BGR image (unsigned int)"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _phash_chunks(phash):
+    mask = (1 << PHASH_CHUNK_BITS) - 1
+    return [(phash >> (i * PHASH_CHUNK_BITS)) & mask for i in range(PHASH_CHUNKS)]
+
+
+def _to_signed(phash):
+    """Store the unsigned 64-bit hash in a signed BigIntegerField"""
+    return phash - (1 << 64) if phash >= (1 << 63) else phash
+
+
+def _to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+# ---------------------------------------------------------------------------
+# Lookup / store
+# ---------------------------------------------------------------------------
+
+def _live(queryset):
+    return queryset.filter(Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()))
+
+
+def _hit(verdict, match, distance=0):
+    """Count the hit and return the cached verdict as a dict"""
+    ModerationVerdict.objects.filter(pk=verdict.pk).update(hits=F('hits') + 1)
+    logger.info(f"♻️ Verdict cache {match} hit: {verdict}")
+    return {
+        'is_safe': verdict.is_safe,
+        'result': verdict.result,
+        'match': match,
+        'distance': distance,
+    }
+
+
+def lookup_verdict(media_type, sha256, model_version):
+    """Exact match on content hash. Returns a cached verdict dict or None"""
+    if not VERDICT_CACHE_ENABLED:
+        return None
+
+    verdict = _live(ModerationVerdict.objects.filter(
+        media_type=media_type,
+        sha256=sha256,
+        model_version=model_version
+    )).first()
+    return _hit(verdict, 'exact') if verdict is not None else None
+
+
+def lookup_similar_rejection(phash, model_version):
+    """Closest rejected image within PHASH_MAX_DISTANCE, or None"""
+    if not VERDICT_CACHE_ENABLED:
+        return None
+
+    # Multi-index hashing: candidates share at least one 16-bit chunk
+    chunk_filter = Q()
+    for i, chunk in enumerate(_phash_chunks(phash)):
+        chunk_filter |= Q(**{f'phash_{i}': chunk})
+
+    candidates = _live(ModerationVerdict.objects.filter(
+        chunk_filter,
+        media_type='image',
+        model_version=model_version,
+        is_safe=False
+    ))
+
+    best, best_distance = None, None
+    for candidate in candidates:
+        distance = hamming_distance(phash, _to_unsigned(candidate.phash))
+        if distance <= PHASH_MAX_DISTANCE and (best is None or distance < best_distance):
+            best, best_distance = candidate, distance
+
+    return _hit(best, 'perceptual', best_distance) if best is not None else None
+
+
+def verdict_expiry(is_safe):
+    """expires_at for a verdict: approvals live APPROVED_TTL, rejections never expire"""
+    return timezone.now() + APPROVED_TTL if is_safe else None
+
+
+def record_verdict(media_type, sha256, model_version, is_safe, result, phash=None):
+    """Store (or refresh) the verdict for a piece of media"""
+    if not VERDICT_CACHE_ENABLED:
+        return
+
+    fields = {
+        'is_safe': is_safe,
+        'result': result,
+        'expires_at': verdict_expiry(is_safe),
+    }
+    if phash is not None:
+        fields['phash'] = _to_signed(phash)
+        for i, chunk in enumerate(_phash_chunks(phash)):
+            fields[f'phash_{i}'] = chunk
+
+    try:
+        ModerationVerdict.objects.update_or_create(
+            media_type=media_type,
+            sha256=sha256,
+            model_version=model_version,
+            defaults=fields
+        )
+    except IntegrityError:
+        # Same upload recorded concurrently by another request/worker
+        pass
+
+
+def prune_expired_verdicts():
+    """Delete approved verdicts past their TTL"""
+    deleted, _ = ModerationVerdict.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
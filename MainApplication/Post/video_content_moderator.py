@@ -7,16 +7,26 @@ Extracts frames from videos and checks them for NSFW content
 
 import os
 import tempfile
-import shutil
 import logging
 import cv2
 from django.conf import settings
 from django.core.files.uploadedfile import InMemoryUploadedFile
-from .post_content_moderator import NudeNetContentModerator
+from .post_content_moderator import NudeNetContentModerator, analyze_detections, detect_batch
+from .video_frame_sampler import SequentialFrameSampler, open_video, plan_frame_numbers
+from .verdict_cache import VERDICT_CACHE_ENABLED, file_sha256, lookup_verdict, record_verdict, verdict_version
 
 logger = logging.getLogger(__name__)
 
 
+FRAME_UNSAFE_LABELS = {
+    'FEMALE_GENITALIA_EXPOSED', 'MALE_GENITALIA_EXPOSED',
+    'FEMALE_BREAST_EXPOSED', 'BUTTOCKS_EXPOSED', 'ANUS_EXPOSED',
+    'EXPOSED_GENITALIA_F', 'EXPOSED_GENITALIA_M',
+    'EXPOSED_BREAST_F', 'EXPOSED_BUTTOCKS', 'EXPOSED_ANUS',
+    'MALE_BREAST_EXPOSED', 'BELLY_EXPOSED',
+}
+
+
 class VideoValidator:
     """Basic video file validation"""
     
@@ -94,19 +104,27 @@ class NudeNetVideoModerator:
     DEFAULT_FRAME_INTERVAL = 2  # Extract 1 frame every N seconds
     MAX_FRAMES = 30             # Maximum frames to analyze
     MIN_FRAMES = 5              # Minimum frames to analyze
+    MAX_FRAME_SIDE = 640        # Frames are kept in memory at most this size
+    CHUNK_SIZE = 8              # Frames per detector call in short-circuit mode
+    MAX_REFINE_FRAMES = 20      # Extra frames the fine passes may add
+    REFINE_MARGIN = 0.15        # Scores within this of the threshold are near misses
     
     def __init__(self):
         self.enabled = getattr(settings, 'CONTENT_MODERATION_ENABLED', True)
+        self.sampling_mode = getattr(settings, 'CONTENT_MODERATION_FRAME_SAMPLING', 'interval')
+        self.short_circuit = getattr(settings, 'CONTENT_MODERATION_VIDEO_SHORT_CIRCUIT', True)
         self.image_moderator = NudeNetContentModerator()
         logger.info("🎬 NudeNetVideoModerator initialized")
     
-    def check_video(self, video_file, frame_interval=None):
+    def check_video(self, video_file, frame_interval=None, frame_sink=None):
         """
         Check video for NSFW content by extracting and analyzing frames
         
         Args:
             video_file: Uploaded video file
             frame_interval: Seconds between frame extractions (default: 2)
+            frame_sink: Optional list that receives (frame_number, frame) of
+                        every safe frame checked (poster selection)
         
         Returns:
             dict with is_safe, message, confidence, and details
@@ -124,7 +142,6 @@ class NudeNetVideoModerator:
             frame_interval = self.DEFAULT_FRAME_INTERVAL
         
         temp_video_path = None
-        temp_frames_dir = None
         
         try:
             # Reset file pointer
@@ -136,13 +153,17 @@ class NudeNetVideoModerator:
             logger.info(f"🎬 Checking video: {filename}")
             logger.info("=" * 60)
             
-            # Save video to temp file
-            temp_video_path = self._save_temp_video(video_file)
-            logger.info(f"💾 Temp video: {temp_video_path}")
+            # OpenCV needs a path: reuse the one the upload already has on disk
+            video_path = self._get_video_path(video_file)
+            if video_path is None:
+                video_path = temp_video_path = self._save_temp_video(video_file)
+                logger.info(f"💾 Temp video: {temp_video_path}")
             
-            # Extract frames
+            # Coarse pass: frames are checked in chunks while the video is decoded,
+            # so short-circuit mode can stop decoding at the first unsafe frame
             logger.info(f"🎞️ Extracting frames (interval: {frame_interval}s)...")
-            extraction_result = self._extract_frames(temp_video_path, frame_interval)
+            scan = _FrameScan(self, short_circuit=self.short_circuit)
+            extraction_result = self._extract_frames(video_path, frame_interval, on_frame=scan.add)
             
             if not extraction_result['success']:
                 return {
@@ -152,32 +173,47 @@ class NudeNetVideoModerator:
                     'details': extraction_result
                 }
             
-            frame_paths = extraction_result['frames']
-            temp_frames_dir = extraction_result['temp_dir']
+            scan.flush()
             duration = extraction_result.get('duration', 0)
+            coarse_count = len(scan.checked)
             
-            logger.info(f"✅ Extracted {len(frame_paths)} frames")
+            logger.info(f"✅ Checked {coarse_count} frames")
             logger.info(f"📊 Video duration: {duration:.2f}s")
             
-            # Analyze each frame
-            logger.info("🔍 Analyzing frames...")
+            # Fine passes: densify sampling around near-miss frames only
+            spacing = self._coarse_spacing(extraction_result['frame_numbers'])
+            while not scan.stopped and len(scan.checked) - coarse_count < self.MAX_REFINE_FRAMES:
+                spacing //= 2
+                targets = self._refine_targets(scan, spacing, extraction_result['total_frames'])
+                if not targets:
+                    break
+                logger.info(f"🔬 Refining around {len(scan.near_misses)} near-miss frame(s): {len(targets)} more frames")
+                scan.near_misses = []
+                refine_result = self._extract_frames(
+                    video_path, frame_interval, on_frame=scan.add, targets=targets
+                )
+                if not refine_result['success']:
+                    break
+                scan.flush()
+            
+            checked = scan.checked
             unsafe_frames = []
+            
+            if frame_sink is not None:
+                frame_sink.extend(
+                    (sampled.frame_number, sampled.image) for sampled, result in checked if result['is_safe']
+                )
             max_unsafe_score = 0.0
             
-            for idx, frame_path in enumerate(frame_paths):
-                frame_num = extraction_result['frame_numbers'][idx]
-                timestamp = extraction_result['timestamps'][idx]
-                
-                # Check frame with image moderator
-                result = self._check_frame(frame_path)
-                
-                unsafe_score = result.get('confidence', {}).get('unsafe', 0)
+            for idx, (sampled, result) in enumerate(checked):
+                timestamp = sampled.timestamp
+                unsafe_score = (result.get('confidence') or {}).get('unsafe', 0)
                 max_unsafe_score = max(max_unsafe_score, unsafe_score)
                 
                 if not result['is_safe']:
                     unsafe_frames.append({
                         'frame_index': idx,
-                        'frame_number': frame_num,
+                        'frame_number': sampled.frame_number,
                         'timestamp': round(timestamp, 2),
                         'unsafe_score': unsafe_score,
                         'details': result.get('details', {})
@@ -192,9 +228,11 @@ class NudeNetVideoModerator:
             
             logger.info("=" * 60)
             logger.info(f"📊 Video Analysis Results:")
-            logger.info(f"   Frames checked:   {len(frame_paths)}")
+            logger.info(f"   Frames checked:   {len(checked)} ({len(checked) - coarse_count} refined)")
             logger.info(f"   Unsafe frames:    {len(unsafe_frames)}")
             logger.info(f"   Max unsafe score: {max_unsafe_score:.4f}")
+            if scan.stopped:
+                logger.info(f"   ⏹️ Stopped at the first unsafe frame")
             
             if is_safe:
                 logger.info(f"✅ VIDEO APPROVED")
@@ -215,7 +253,17 @@ class NudeNetVideoModerator:
                 },
                 'details': {
                     'duration': round(duration, 2),
-                    'frames_checked': len(frame_paths),
+                    'frames_checked': len(checked),
+                    'refined_frames': len(checked) - coarse_count,
+                    'checked_frames': [
+                        {
+                            'frame_number': sampled.frame_number,
+                            'timestamp': round(sampled.timestamp, 2),
+                            'peak_score': result.get('details', {}).get('peak_score', 0)
+                        }
+                        for sampled, result in sorted(checked, key=lambda item: item[0].frame_number)
+                    ],
+                    'short_circuited': scan.stopped,
                     'unsafe_frames_count': len(unsafe_frames),
                     'unsafe_frames': unsafe_frames,
                     'frame_interval': frame_interval,
@@ -245,10 +293,34 @@ class NudeNetVideoModerator:
                     pass
             
             # Cleanup temp files
-            self._cleanup(temp_video_path, temp_frames_dir)
+            self._cleanup(temp_video_path)
+    
+    def verdict_version(self, frame_interval=None):
+        """Verdict cache version: model, threshold, labels and how frames are sampled"""
+        return verdict_version(
+            self.image_moderator.unsafe_threshold, FRAME_UNSAFE_LABELS,
+            self.sampling_mode, frame_interval or self.DEFAULT_FRAME_INTERVAL, self.MAX_FRAMES
+        )
+    
+    @property
+    def is_cacheable(self):
+        return VERDICT_CACHE_ENABLED and self.enabled and self.image_moderator.detector is not None
+    
+    def _get_video_path(self, video_file):
+        """
+        Path of an upload that is already on disk, or None.
+        Covers TemporaryUploadedFile (large uploads) and stored FieldFiles.
+        """
+        if hasattr(video_file, 'temporary_file_path'):
+            return video_file.temporary_file_path()
+        try:
+            path = video_file.path
+        except (AttributeError, NotImplementedError, ValueError):
+            return None
+        return path if path and os.path.exists(path) else None
     
     def _save_temp_video(self, video_file):
-        """Save uploaded video to temporary file"""
+        """Save uploaded video to temporary file (in-memory uploads only)"""
         if hasattr(video_file, 'seek'):
             video_file.seek(0)
         
@@ -274,66 +346,55 @@ class NudeNetVideoModerator:
             logger.error(f"❌ Error saving temp video: {e}")
             raise
     
-    def _extract_frames(self, video_path, interval_seconds):
-        """Extract frames from video at specified intervals"""
-        temp_dir = tempfile.mkdtemp(prefix='video_mod_')
-        frame_paths = []
+    def _extract_frames(self, video_path, interval_seconds, on_frame=None, targets=None):
+        """
+        Extract frames from video at specified intervals, as BGR numpy arrays.
+        The video is decoded forward once (see video_frame_sampler); decoding
+        stops early when on_frame(sampled_frame) returns True.
+        If targets (frame numbers) are given exactly those frames are extracted.
+        """
+        frames = []
         frame_numbers = []
         timestamps = []
         
         try:
-            cap = cv2.VideoCapture(video_path)
+            cap, info = open_video(video_path)
             
-            if not cap.isOpened():
+            if cap is None:
                 return {
                     'success': False,
                     'message': 'Failed to open video file',
-                    'frames': [],
-                    'temp_dir': temp_dir
+                    'frames': []
                 }
             
-            # Get video properties
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            duration = total_frames / fps if fps > 0 else 0
+            fps = info.fps
+            total_frames = info.total_frames
+            duration = info.duration
             
             logger.info(f"   📹 {duration:.2f}s | {fps:.2f}fps | {total_frames} total frames")
             
             # Calculate which frames to extract
-            frame_interval = max(1, int(fps * interval_seconds))
-            frames_to_extract = list(range(0, total_frames, frame_interval))
-            
-            # Limit frames
-            if len(frames_to_extract) > self.MAX_FRAMES:
-                step = len(frames_to_extract) // self.MAX_FRAMES
-                frames_to_extract = frames_to_extract[::step][:self.MAX_FRAMES]
-            
-            # Ensure minimum
-            if len(frames_to_extract) < self.MIN_FRAMES and total_frames >= self.MIN_FRAMES:
-                step = max(1, total_frames // self.MIN_FRAMES)
-                frames_to_extract = list(range(0, total_frames, step))[:self.MIN_FRAMES]
+            if targets is None:
+                frames_to_extract = plan_frame_numbers(info, interval_seconds, self.MAX_FRAMES, self.MIN_FRAMES)
+                mode = self.sampling_mode
+            else:
+                frames_to_extract, mode = targets, 'interval'
             
             # Extract frames
-            for idx, frame_num in enumerate(frames_to_extract):
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-                ret, frame = cap.read()
-                
-                if ret:
-                    frame_path = os.path.join(temp_dir, f'frame_{idx:04d}.jpg')
-                    cv2.imwrite(frame_path, frame)
-                    
-                    frame_paths.append(frame_path)
-                    frame_numbers.append(frame_num)
-                    timestamps.append(frame_num / fps if fps > 0 else 0)
-            
-            cap.release()
+            sampler = SequentialFrameSampler(mode=mode, transform=self._shrink_frame)
+            try:
+                for sampled in sampler.sample(cap, info, frames_to_extract, on_frame=on_frame):
+                    frames.append(sampled.image)
+                    frame_numbers.append(sampled.frame_number)
+                    timestamps.append(sampled.timestamp)
+            finally:
+                cap.release()
             
             return {
                 'success': True,
-                'frames': frame_paths,
+                'frames': frames,
                 'frame_numbers': frame_numbers,
                 'timestamps': timestamps,
-                'temp_dir': temp_dir,
                 'duration': duration,
                 'fps': fps,
                 'total_frames': total_frames
@@ -344,80 +405,166 @@ class NudeNetVideoModerator:
             return {
                 'success': False,
                 'message': f'Frame extraction failed: {str(e)}',
-                'frames': [],
-                'temp_dir': temp_dir
+                'frames': []
             }
     
-    def _check_frame(self, frame_path):
+    def _shrink_frame(self, frame):
+        """
+        Downscale a frame so its longest side is at most MAX_FRAME_SIDE.
+        NudeNet resizes to 320px anyway; this bounds memory for HD videos.
+        """
+        height, width = frame.shape[:2]
+        longest = max(height, width)
+        if longest <= self.MAX_FRAME_SIDE:
+            return frame
+        scale = self.MAX_FRAME_SIDE / longest
+        return cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    
+    def _coarse_spacing(self, frame_numbers):
+        """Smallest gap between the coarse samples"""
+        gaps = [b - a for a, b in zip(frame_numbers, frame_numbers[1:])]
+        return min(gaps) if gaps else 0
+    
+    def _refine_targets(self, scan, spacing, total_frames):
+        """Unchecked frames `spacing` before and after every near miss of the last pass"""
+        if spacing < 1:
+            return []
+        checked_numbers = {sampled.frame_number for sampled, _ in scan.checked}
+        budget = self.MAX_REFINE_FRAMES - (len(checked_numbers) - len(scan.coarse_numbers))
+        
+        targets = []
+        for frame_number in sorted(scan.near_misses):
+            for candidate in (frame_number - spacing, frame_number + spacing):
+                if 0 <= candidate < total_frames and candidate not in checked_numbers and candidate not in targets:
+                    targets.append(candidate)
+        return sorted(targets[:max(0, budget)])
+    
+    def _check_frame(self, frame):
         """Check a single frame using the image moderator"""
+        return self._check_frames([frame])[0]
+    
+    def _check_frames(self, frames):
+        """
+        Check several frames with one batched NudeNet inference.
+        Returns one result per frame, in order.
+        """
+        if self.image_moderator.detector is None:
+            return [{
+                'is_safe': False,
+                'message': 'Detector not initialized',
+                'confidence': None,
+                'details': {}
+            } for _ in frames]
+        
         try:
-            if self.image_moderator.detector is None:
-                return {
-                    'is_safe': False,
-                    'message': 'Detector not initialized',
-                    'confidence': None,
-                    'details': {}
-                }
-            
-            detections = self.image_moderator.detector.detect(frame_path)
-            
-            UNSAFE_LABELS = {
-                'FEMALE_GENITALIA_EXPOSED', 'MALE_GENITALIA_EXPOSED',
-                'FEMALE_BREAST_EXPOSED', 'BUTTOCKS_EXPOSED', 'ANUS_EXPOSED',
-                'EXPOSED_GENITALIA_F', 'EXPOSED_GENITALIA_M',
-                'EXPOSED_BREAST_F', 'EXPOSED_BUTTOCKS', 'EXPOSED_ANUS',
-                'MALE_BREAST_EXPOSED', 'BELLY_EXPOSED',
-            }
-            
-            unsafe_parts = []
-            max_score = 0.0
-            
-            for det in detections:
-                label = det.get('class') or det.get('label', '')
-                score = det.get('score', 0.0)
-                
-                if label in UNSAFE_LABELS and score >= self.image_moderator.unsafe_threshold:
-                    unsafe_parts.append({'label': label, 'score': score})
-                    max_score = max(max_score, score)
-            
-            is_safe = len(unsafe_parts) == 0
-            
-            return {
-                'is_safe': is_safe,
+            batch_detections = detect_batch(self.image_moderator.detector, frames)
+        except Exception as e:
+            logger.error(f"❌ Frame check error: {e}")
+            return [{
+                'is_safe': False,
+                'message': f'Check failed: {str(e)}',
+                'confidence': None,
+                'details': {'error': str(e)}
+            } for _ in frames]
+        
+        results = []
+        for detections in batch_detections:
+            unsafe_detections, max_score, _ = analyze_detections(
+                detections, FRAME_UNSAFE_LABELS, self.image_moderator.unsafe_threshold
+            )
+            unsafe_parts = [{'label': d['label'], 'score': d['score']} for d in unsafe_detections]
+            # Highest unsafe-label score even below the threshold (near-miss refinement)
+            peak_score = max(
+                [d.get('score', 0.0) for d in detections
+                 if (d.get('class') or d.get('label')) in FRAME_UNSAFE_LABELS] or [0.0]
+            )
+            
+            results.append({
+                'is_safe': len(unsafe_parts) == 0,
                 'message': 'Frame checked',
                 'confidence': {
                     'safe': round(1.0 - max_score, 4),
                     'unsafe': round(max_score, 4)
                 },
                 'details': {
-                    'unsafe_parts': unsafe_parts
+                    'unsafe_parts': unsafe_parts,
+                    'peak_score': round(peak_score, 4)
                 }
-            }
-            
-        except Exception as e:
-            logger.error(f"❌ Frame check error: {e}")
-            return {
-                'is_safe': False,
-                'message': f'Check failed: {str(e)}',
-                'confidence': None,
-                'details': {'error': str(e)}
-            }
+            })
+        
+        return results
     
-    def _cleanup(self, video_path, frames_dir):
-        """Clean up temporary files"""
+    def _cleanup(self, video_path):
+        """Clean up the temporary video copy, if one was made"""
         try:
             if video_path and os.path.exists(video_path):
                 os.remove(video_path)
                 logger.debug(f"🗑️ Removed: {video_path}")
         except Exception as e:
             logger.warning(f"⚠️ Cleanup video failed: {e}")
+
+
+class _FrameScan:
+    """
+    Collects sampled frames and checks them in chunks while the video is
+    still being decoded. In short-circuit mode add() returns True (stop
+    decoding) once a chunk contains an unsafe frame.
+    """
+    
+    def __init__(self, moderator, short_circuit):
+        self.moderator = moderator
+        self.short_circuit = short_circuit
+        self.chunk_size = moderator.CHUNK_SIZE if short_circuit else moderator.MAX_FRAMES
+        self.near_miss_floor = moderator.image_moderator.unsafe_threshold - moderator.REFINE_MARGIN
+        self.pending = []
+        self.checked = []           # (SampledFrame, frame result) in check order
+        self.near_misses = []       # frame numbers scored just under the threshold
+        self.coarse_numbers = None
+        self.stopped = False
+    
+    def add(self, sampled):
+        self.pending.append(sampled)
+        if len(self.pending) >= self.chunk_size:
+            self._check_pending()
+        return self.stopped
+    
+    def flush(self):
+        """Check what is left of the current pass"""
+        self._check_pending()
+        if self.coarse_numbers is None:
+            self.coarse_numbers = {sampled.frame_number for sampled, _ in self.checked}
+    
+    def _check_pending(self):
+        if not self.pending or self.stopped:
+            self.pending = []
+            return
         
-        try:
-            if frames_dir and os.path.exists(frames_dir):
-                shutil.rmtree(frames_dir)
-                logger.debug(f"🗑️ Removed: {frames_dir}")
-        except Exception as e:
-            logger.warning(f"⚠️ Cleanup frames failed: {e}")
+        results = self.moderator._check_frames([sampled.image for sampled in self.pending])
+        for sampled, result in zip(self.pending, results):
+            self.checked.append((sampled, result))
+            peak_score = result.get('details', {}).get('peak_score', 0)
+            if not result['is_safe']:
+                self.stopped = self.short_circuit
+            elif peak_score >= self.near_miss_floor:
+                self.near_misses.append(sampled.frame_number)
+        self.pending = []
+
+
+def validate_video_upload(video_file):
+    """
+    Validation stage only (no NSFW detection), shaped like
+    VideoModerationService.check_video. Used at upload time when NudeNet
+    runs later in the moderation worker.
+    """
+    validation = VideoValidator.validate_video(video_file)
+    
+    return {
+        'is_safe': validation['is_valid'],
+        'message': validation['message'],
+        'stage': 'validation' if not validation['is_valid'] else 'completed',
+        'validation': validation,
+        'moderation': None
+    }
 
 
 class VideoModerationService:
@@ -428,7 +575,7 @@ class VideoModerationService:
         self.moderator = NudeNetVideoModerator()
         logger.info("🚀 VideoModerationService initialized")
     
-    def check_video(self, video_file, frame_interval=None):
+    def check_video(self, video_file, frame_interval=None, frame_sink=None):
         """Complete video check: validation + NSFW detection"""
         if hasattr(video_file, 'seek'):
             video_file.seek(0)
@@ -453,9 +600,23 @@ class VideoModerationService:
         
         logger.info("✅ Validation passed\n")
         
-        # Step 2: NSFW Detection
+        # Step 2: NSFW Detection (or a cached verdict for the same file)
         logger.info("🤖 Step 2: NSFW Detection")
-        moderation = self.moderator.check_video(video_file, frame_interval)
+        sha256 = None
+        moderation = None
+        if self.moderator.is_cacheable:
+            version = self.moderator.verdict_version(frame_interval)
+            sha256 = file_sha256(video_file)
+            cached = lookup_verdict('video', sha256, version)
+            if cached is not None:
+                moderation = dict(cached['result'], is_safe=cached['is_safe'], cache={'match': cached['match'], 'distance': 0})
+        
+        if moderation is None:
+            moderation = self.moderator.check_video(video_file, frame_interval, frame_sink=frame_sink)
+            
+            # Errors are not verdicts, only store decided results
+            if sha256 and moderation.get('details', {}).get('decision'):
+                record_verdict('video', sha256, version, moderation['is_safe'], moderation)
         
         if not moderation['is_safe']:
             logger.warning(f"❌ Moderation failed: {moderation['message']}")
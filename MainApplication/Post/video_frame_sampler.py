@@ -0,0 +1,211 @@
+# MainApplication/Post/video_frame_sampler.py
+"""
+Frame samplers for video moderation.
+
+SequentialFrameSampler decodes the video forward: frames are grab()-ed
+(demux + decode, no colour conversion) and only the sampled ones are
+retrieve()-d. The old approach of cap.set(CAP_PROP_POS_FRAMES, n) before every
+read makes FFmpeg seek back to the previous keyframe and re-decode up to n for
+each sample, which is what SeekingFrameSampler still does (kept for
+`manage.py benchmark_frame_sampler`).
+
+Decoding forward is only cheaper while the next sample is closer than a
+keyframe interval, so the sampler measures the keyframe spacing as it goes
+and still seeks over gaps longer than that (short-GOP encodes, long videos
+with sparse samples). Long-GOP phone videos and dense sampling are read in a
+single forward pass.
+
+Sampling modes:
+    - 'interval': the planned frame numbers
+    - 'keyframe': a keyframe inside the window before a planned frame is
+                  taken instead of it (keyframes are the cleanest pictures)
+    - 'scene':    the frame with the largest visual change inside the window
+                  is taken instead, if the change is above scene_threshold
+
+Both samplers stop decoding as soon as the on_frame callback returns True.
+"""
+
+import logging
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+SAMPLING_MODES = ('interval', 'keyframe', 'scene')
+DEFAULT_SCENE_THRESHOLD = 30.0
+SCENE_THUMB_SIZE = (32, 32)
+
+
+@dataclass
+class VideoInfo:
+    fps: float
+    total_frames: int
+
+    @property
+    def duration(self):
+        return self.total_frames / self.fps if self.fps > 0 else 0
+
+
+@dataclass
+class SampledFrame:
+    frame_number: int
+    timestamp: float
+    image: np.ndarray
+
+
+def plan_frame_numbers(info, interval_seconds, max_frames, min_frames):
+    """Frame numbers to sample: one every interval_seconds, within [min_frames, max_frames]"""
+    fps = info.fps
+    total_frames = info.total_frames
+
+    frame_interval = max(1, int(fps * interval_seconds))
+    frames_to_extract = list(range(0, total_frames, frame_interval))
+
+    # Limit frames
+    if len(frames_to_extract) > max_frames:
+        step = len(frames_to_extract) // max_frames
+        frames_to_extract = frames_to_extract[::step][:max_frames]
+
+    # Ensure minimum
+    if len(frames_to_extract) < min_frames and total_frames >= min_frames:
+        step = max(1, total_frames // min_frames)
+        frames_to_extract = list(range(0, total_frames, step))[:min_frames]
+
+    return frames_to_extract
+
+
+def open_video(video_path):
+    """Open a capture and read fps / frame count. Returns (cap, VideoInfo) or (None, None)"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        cap.release()
+        return None, None
+    info = VideoInfo(
+        fps=cap.get(cv2.CAP_PROP_FPS),
+        total_frames=int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    )
+    return cap, info
+
+
+def _scene_thumb(frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, SCENE_THUMB_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+class SequentialFrameSampler:
+    """Decode forward once, retrieve only the frames that are sampled"""
+
+    def __init__(self, mode='interval', window=None, scene_threshold=DEFAULT_SCENE_THRESHOLD, transform=None):
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unknown sampling mode: {mode}")
+        self.mode = mode
+        self.window = window
+        self.scene_threshold = scene_threshold
+        self.transform = transform
+
+    def sample(self, cap, info, frame_numbers, on_frame=None):
+        """
+        Yield a SampledFrame for every planned frame number, in order.
+        In 'keyframe' / 'scene' mode a nearby frame may stand in for it.
+        """
+        targets = sorted(set(frame_numbers))
+        if not targets:
+            return
+
+        window = self.window
+        if window is None:
+            # Half the gap between samples, so windows never overlap
+            gaps = [b - a for a, b in zip(targets, targets[1:])] or [targets[0] or 1]
+            window = max(0, min(gaps) // 2)
+
+        target_iter = iter(targets)
+        target = next(target_iter)
+        position = 0
+        last_keyframe = None
+        keyframe_gap = None     # largest keyframe spacing seen so far
+        candidate = None        # (frame_number, image) picked inside the window
+        best_change = 0.0
+        previous_thumb = None
+
+        while True:
+            start = target - window if self.mode != 'interval' else target
+            if keyframe_gap and start - position > keyframe_gap:
+                # Cheaper to seek (decode from the keyframe before start) than to decode the gap
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+                position = start
+                last_keyframe = None
+
+            if not cap.grab():
+                break
+
+            if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                if last_keyframe is not None:
+                    keyframe_gap = max(keyframe_gap or 0, position - last_keyframe)
+                last_keyframe = position
+
+            in_window = self.mode != 'interval' and target - window <= position < target
+
+            if in_window and self.mode == 'keyframe' and candidate is None:
+                if last_keyframe == position:
+                    ok, image = cap.retrieve()
+                    if ok:
+                        candidate = (position, image)
+
+            elif in_window and self.mode == 'scene':
+                ok, image = cap.retrieve()
+                if ok:
+                    thumb = _scene_thumb(image)
+                    if previous_thumb is not None:
+                        change = float(np.mean(np.abs(thumb - previous_thumb)))
+                        if change > self.scene_threshold and change > best_change:
+                            candidate, best_change = (position, image), change
+                    previous_thumb = thumb
+
+            if position == target:
+                if candidate is not None:
+                    frame_number, image = candidate
+                else:
+                    frame_number = position
+                    ok, image = cap.retrieve()
+                    if not ok:
+                        image = None
+
+                if image is not None:
+                    sampled = self._build(info, frame_number, image)
+                    yield sampled
+                    if on_frame is not None and on_frame(sampled):
+                        return
+
+                candidate, best_change, previous_thumb = None, 0.0, None
+                target = next(target_iter, None)
+                if target is None:
+                    return
+
+            position += 1
+
+    def _build(self, info, frame_number, image):
+        if self.transform is not None:
+            image = self.transform(image)
+        timestamp = frame_number / info.fps if info.fps > 0 else 0
+        return SampledFrame(frame_number=frame_number, timestamp=timestamp, image=image)
+
+
+class SeekingFrameSampler(SequentialFrameSampler):
+    """Previous strategy: seek to every planned frame and read it (benchmark baseline)"""
+
+    def __init__(self, transform=None):
+        super().__init__(mode='interval', transform=transform)
+
+    def sample(self, cap, info, frame_numbers, on_frame=None):
+        for frame_number in frame_numbers:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            ok, image = cap.read()
+            if not ok:
+                continue
+            sampled = self._build(info, frame_number, image)
+            yield sampled
+            if on_frame is not None and on_frame(sampled):
+                return
@@ -0,0 +1,327 @@
+# MainApplication/Post/video_transcoder.py
+"""
+Poster frames and HLS renditions for video posts.
+
+Poster: chosen from the frames NudeNetVideoModerator already decoded for
+moderation (sharpest, well-exposed frame), then re-read at full resolution
+with a single seek and stored in Post.video_poster.
+
+HLS: approved video posts get video_stream_status='queued'; the offline
+stage (manage.py transcode_videos) turns the upload into 2-3 H.264/AAC
+renditions with ffmpeg and stores them under posts/videos/hls/<post_id>/:
+
+    master.m3u8
+    v0/index.m3u8, v0/seg_000.ts, ...
+    v1/...
+
+Post.video_stream = {'manifest': '<storage name of master.m3u8>', 'renditions': [...]}
+"""
+
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+import cv2
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from .post_models import Post
+from .video_frame_sampler import open_video
+
+logger = logging.getLogger(__name__)
+
+
+FFMPEG_BINARY = getattr(settings, 'FFMPEG_BINARY', 'ffmpeg')
+FFPROBE_BINARY = getattr(settings, 'FFPROBE_BINARY', 'ffprobe')
+
+# (height, video kbps); the top MAX_RENDITIONS that fit the source are used
+RENDITION_LADDER = [
+    (1080, 5000),
+    (720, 2800),
+    (480, 1400),
+    (360, 800),
+]
+MAX_RENDITIONS = 3
+AUDIO_KBPS = 128
+SEGMENT_SECONDS = 4
+TRANSCODE_TIMEOUT = getattr(settings, 'VIDEO_TRANSCODE_TIMEOUT', 15 * 60)
+
+HLS_DIR = 'posts/videos/hls'
+POSTER_MAX_SIDE = 1280
+POSTER_JPEG_QUALITY = 85
+POSTER_SAMPLE_FRAMES = 8
+
+
+def ffmpeg_available():
+    return shutil.which(FFMPEG_BINARY) is not None and shutil.which(FFPROBE_BINARY) is not None
+
+
+def _local_video_path(post):
+    try:
+        path = post.video.path
+    except (AttributeError, NotImplementedError, ValueError):
+        return None
+    return path if path and os.path.exists(path) else None
+
+
+# ---------------------------------------------------------------------------
+# Poster
+# ---------------------------------------------------------------------------
+
+def _poster_score(frame, frame_number):
+    """Sharp, well-exposed frames win; the very first frame is often black or a fade-in"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
+    exposure = 1.0 - abs(float(gray.mean()) - 128.0) / 128.0
+    score = sharpness * max(exposure, 0.05)
+    return score * 0.5 if frame_number == 0 else score
+
+
+def select_poster_frame(candidates):
+    """Best (frame_number, frame) out of (frame_number, frame) candidates, or None"""
+    best, best_score = None, None
+    for frame_number, frame in candidates:
+        score = _poster_score(frame, frame_number)
+        if best is None or score > best_score:
+            best, best_score = (frame_number, frame), score
+    return best
+
+
+def _read_frame(video_path, frame_number):
+    """One frame at full resolution (single seek), or None"""
+    cap, _ = open_video(video_path)
+    if cap is None:
+        return None
+    try:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        ok, frame = cap.read()
+        return frame if ok else None
+    finally:
+        cap.release()
+
+
+def _sample_candidates(video_path):
+    """Fallback when no moderation frames are available (e.g. verdict cache hit)"""
+    from .video_content_moderator import NudeNetVideoModerator
+
+    cap, info = open_video(video_path)
+    if cap is None:
+        return []
+    cap.release()
+
+    interval = max(info.duration / POSTER_SAMPLE_FRAMES, 0.5)
+    extraction = NudeNetVideoModerator()._extract_frames(video_path, interval)
+    if not extraction['success']:
+        return []
+    return list(zip(extraction['frame_numbers'], extraction['frames']))
+
+
+def create_poster(post, candidates=None):
+    """
+    Store a poster JPEG for a video post.
+    candidates: (frame_number, BGR frame) pairs already decoded during
+    moderation; sampled from the video when not given.
+    """
+    video_path = _local_video_path(post)
+    if video_path is None:
+        logger.warning(f"⚠️ No local video for post {post.post_id}, poster skipped")
+        return None
+
+    candidates = list(candidates or []) or _sample_candidates(video_path)
+    best = select_poster_frame(candidates)
+    if best is None:
+        logger.warning(f"⚠️ No frames for the poster of post {post.post_id}")
+        return None
+
+    frame_number, frame = best
+    # Moderation frames are downscaled; re-read the chosen one at full size
+    full = _read_frame(video_path, frame_number)
+    if full is not None:
+        frame = full
+
+    height, width = frame.shape[:2]
+    if max(height, width) > POSTER_MAX_SIDE:
+        scale = POSTER_MAX_SIDE / max(height, width)
+        frame = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+    ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, POSTER_JPEG_QUALITY])
+    if not ok:
+        return None
+
+    if post.video_poster:
+        post.video_poster.delete(save=False)
+    post.video_poster.save(f"{post.post_id}.jpg", ContentFile(encoded.tobytes()), save=False)
+    post.save(update_fields=['video_poster'])
+
+    logger.info(f"🖼️ Poster for post {post.post_id} from frame {frame_number}")
+    return post.video_poster
+
+
+# ---------------------------------------------------------------------------
+# HLS
+# ---------------------------------------------------------------------------
+
+def probe_video(video_path):
+    """(width, height, has_audio) from ffprobe"""
+    output = subprocess.run(
+        [FFPROBE_BINARY, '-v', 'error', '-show_entries', 'stream=codec_type,width,height', '-of', 'json', video_path],
+        capture_output=True, text=True, check=True, timeout=60
+    ).stdout
+    streams = json.loads(output or '{}').get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'), None)
+    if video is None:
+        raise ValueError('No video stream')
+    has_audio = any(s.get('codec_type') == 'audio' for s in streams)
+    return int(video['width']), int(video['height']), has_audio
+
+
+def choose_renditions(source_height):
+    """Ladder rungs that don't upscale (at least the smallest one)"""
+    rungs = [(height, kbps) for height, kbps in RENDITION_LADDER if height <= source_height]
+    if not rungs:
+        rungs = [(source_height - source_height % 2, RENDITION_LADDER[-1][1])]
+    return rungs[:MAX_RENDITIONS]
+
+
+def build_hls_command(video_path, output_dir, renditions, has_audio):
+    """ffmpeg arguments for one pass producing every rendition and the master playlist"""
+    count = len(renditions)
+    split = f"[0:v]split={count}" + ''.join(f"[v{i}]" for i in range(count))
+    scales = [f"[v{i}]scale=-2:{height}[v{i}out]" for i, (height, _) in enumerate(renditions)]
+
+    command = [
+        FFMPEG_BINARY, '-hide_banner', '-loglevel', 'error', '-y', '-i', video_path,
+        '-filter_complex', ';'.join([split] + scales),
+    ]
+
+    for i, (height, kbps) in enumerate(renditions):
+        command += [
+            '-map', f'[v{i}out]',
+            f'-c:v:{i}', 'libx264', f'-b:v:{i}', f'{kbps}k',
+            f'-maxrate:v:{i}', f'{int(kbps * 1.07)}k', f'-bufsize:v:{i}', f'{kbps * 2}k',
+        ]
+        if has_audio:
+            command += ['-map', 'a:0', f'-c:a:{i}', 'aac', f'-b:a:{i}', f'{AUDIO_KBPS}k', '-ac', '2']
+
+    stream_map = ' '.join(
+        f"v:{i},a:{i}" if has_audio else f"v:{i}"
+        for i in range(count)
+    )
+    command += [
+        '-preset', 'veryfast', '-profile:v', 'main', '-pix_fmt', 'yuv420p',
+        # Keyframe at every segment boundary
+        '-force_key_frames', f'expr:gte(t,n_forced*{SEGMENT_SECONDS})', '-sc_threshold', '0',
+        '-f', 'hls', '-hls_time', str(SEGMENT_SECONDS), '-hls_playlist_type', 'vod',
+        '-hls_segment_filename', os.path.join(output_dir, 'v%v', 'seg_%03d.ts'),
+        '-master_pl_name', 'master.m3u8',
+        '-var_stream_map', stream_map,
+        os.path.join(output_dir, 'v%v', 'index.m3u8'),
+    ]
+    return command
+
+
+def transcode_to_hls(post):
+    """Transcode one post and store the renditions. Returns the video_stream dict"""
+    video_path = _local_video_path(post)
+    if video_path is None:
+        raise ValueError('Video file is not available locally')
+
+    width, height, has_audio = probe_video(video_path)
+    renditions = choose_renditions(height)
+
+    output_dir = tempfile.mkdtemp(prefix='hls-')
+    try:
+        logger.info(f"🎞️ Transcoding post {post.post_id}: {width}x{height} -> {[h for h, _ in renditions]}p")
+        subprocess.run(
+            build_hls_command(video_path, output_dir, renditions, has_audio),
+            capture_output=True, text=True, check=True, timeout=TRANSCODE_TIMEOUT
+        )
+
+        storage = post.video.storage
+        prefix = f"{HLS_DIR}/{post.post_id}"
+        for root, _, files in os.walk(output_dir):
+            for filename in files:
+                local = os.path.join(root, filename)
+                name = f"{prefix}/{os.path.relpath(local, output_dir).replace(os.sep, '/')}"
+                if storage.exists(name):
+                    storage.delete(name)
+                with open(local, 'rb') as f:
+                    storage.save(name, ContentFile(f.read()))
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    return {
+        'manifest': f"{prefix}/master.m3u8",
+        'renditions': [
+            {'height': rendition_height, 'video_kbps': kbps, 'audio_kbps': AUDIO_KBPS if has_audio else None}
+            for rendition_height, kbps in renditions
+        ],
+        'source': {'width': width, 'height': height},
+        'transcoded_at': timezone.now().isoformat(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Queue (Post.video_stream_status)
+# ---------------------------------------------------------------------------
+
+def queue_transcode(post):
+    """Mark an approved video post for the transcode stage"""
+    post.video_stream_status = 'queued'
+    post.save(update_fields=['video_stream_status'])
+
+
+def claim_next_transcode():
+    """Atomically take the oldest queued video (conditional UPDATE, like claim_next_job)"""
+    candidates = Post.objects.filter(
+        video_stream_status='queued',
+        content_status='approved',
+        is_deleted=False
+    ).order_by('created_at').values_list('id', flat=True)[:10]
+
+    for post_id in candidates:
+        claimed = Post.objects.filter(id=post_id, video_stream_status='queued').update(
+            video_stream_status='processing'
+        )
+        if claimed:
+            return Post.objects.get(id=post_id)
+    return None
+
+
+def process_transcode(post):
+    """Transcode a claimed post and record the outcome"""
+    try:
+        stream = transcode_to_hls(post)
+    except Exception as e:
+        error = e.stderr.strip()[-500:] if isinstance(e, subprocess.CalledProcessError) and e.stderr else str(e)
+        logger.error(f"❌ Transcode failed for post {post.post_id}: {error}")
+        post.video_stream_status = 'failed'
+        post.video_stream = {'error': error}
+        post.save(update_fields=['video_stream_status', 'video_stream'])
+        return False
+
+    post.video_stream_status = 'ready'
+    post.video_stream = stream
+    post.save(update_fields=['video_stream_status', 'video_stream'])
+    logger.info(f"✅ HLS ready for post {post.post_id}")
+    return True
+
+
+def requeue_interrupted_transcodes():
+    """Videos left in 'processing' by a transcoder that died"""
+    return Post.objects.filter(video_stream_status='processing').update(video_stream_status='queued')
+
+
+def prepare_video_post(post, candidates=None):
+    """Poster + transcode queue entry for an approved video post; failures are logged, not raised"""
+    if post.post_type != 'video' or not post.video:
+        return
+    try:
+        create_poster(post, candidates)
+    except Exception as e:
+        logger.error(f"❌ Poster failed for post {post.post_id}: {e}")
+    queue_transcode(post)
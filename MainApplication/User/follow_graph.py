@@ -0,0 +1,113 @@
+# MainApplication/User/follow_graph.py
+"""
+Follow graph: UserFollowingModel edges and the followers_count /
+following_count counters on UserProfileModel.
+
+An edge flips between active and inactive with a conditional UPDATE
+(WHERE followed = <old state>), so of two concurrent follows (or unfollows)
+of the same pair exactly one changes the edge, and only that one moves the
+counters, with F() updates in the same transaction. Counts are therefore
+read from the profile row instead of COUNT(*) over the edges.
+
+manage.py reconcile_follow_counts recomputes the counters from the edges.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import UserFollowingModel, UserProfileModel
+
+
+MAX_STATUS_LOOKUP = 100
+
+
+def _change_counts(profile_pk, target_pk, delta):
+    UserProfileModel.objects.filter(pk=profile_pk).update(following_count=Greatest(F('following_count') + delta, Value(0)))
+    UserProfileModel.objects.filter(pk=target_pk).update(followers_count=Greatest(F('followers_count') + delta, Value(0)))
+
+
+def follow(profile, target):
+    """Make `profile` follow `target`. Returns False if it already did"""
+    with transaction.atomic():
+        changed = UserFollowingModel.objects.filter(
+            user_profile=profile, following=target, followed=False
+        ).update(followed=True, followed_at=timezone.now())
+
+        if not changed:
+            try:
+                with transaction.atomic():
+                    UserFollowingModel.objects.create(user_profile=profile, following=target, followed=True)
+            except IntegrityError:
+                return False  # Edge exists and is already active
+
+        _change_counts(profile.pk, target.pk, 1)
+        return True
+
+
+def unfollow(profile, target):
+    """Make `profile` stop following `target`. Returns False if it did not follow"""
+    with transaction.atomic():
+        changed = UserFollowingModel.objects.filter(
+            user_profile=profile, following=target, followed=True
+        ).update(followed=False)
+        if not changed:
+            return False
+
+        _change_counts(profile.pk, target.pk, -1)
+        return True
+
+
+def followers_of(profile):
+    """Active edges into `profile` (walks follow_active_followers_idx)"""
+    return UserFollowingModel.objects.filter(following=profile, followed=True)
+
+
+def followed_by(profile):
+    """Active edges out of `profile` (walks follow_active_following_idx)"""
+    return UserFollowingModel.objects.filter(user_profile=profile, followed=True)
+
+
+def follow_status(profile, usernames):
+    """{username: True/False} - does `profile` follow each of them. One query"""
+    usernames = list(dict.fromkeys(usernames))[:MAX_STATUS_LOOKUP]
+    followed = set(
+        followed_by(profile).filter(following__user__username__in=usernames)
+        .values_list('following__user__username', flat=True)
+    )
+    return {username: username in followed for username in usernames}
+
+
+def reconcile_follow_counts(queryset=None, dry_run=False):
+    """
+    Recompute followers_count / following_count from the active edges.
+    Returns a list of (profile_pk, {field: (stored, actual)}) for profiles that were off.
+    """
+    queryset = queryset if queryset is not None else UserProfileModel.objects.all()
+
+    def active(field):
+        return Coalesce(Subquery(
+            UserFollowingModel.objects.filter(followed=True, **{field: OuterRef('pk')})
+            .order_by().values(field).annotate(n=Count('pk')).values('n')
+        ), 0)
+
+    drift = []
+    rows = queryset.annotate(
+        actual_followers_count=active('following'),
+        actual_following_count=active('user_profile')
+    ).values('pk', 'followers_count', 'following_count', 'actual_followers_count', 'actual_following_count')
+
+    for row in rows.iterator():
+        wrong = {
+            field: (row[field], row[f'actual_{field}'])
+            for field in ('followers_count', 'following_count')
+            if row[field] != row[f'actual_{field}']
+        }
+        if not wrong:
+            continue
+        drift.append((row['pk'], wrong))
+        if not dry_run:
+            UserProfileModel.objects.filter(pk=row['pk']).update(**{field: actual for field, (_, actual) in wrong.items()})
+
+    return drift
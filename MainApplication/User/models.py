@@ -30,6 +30,10 @@ class UserProfileModel(models.Model):
     is_active = models.BooleanField(default=True)
     is_deleted = models.BooleanField(default=False)
     
+    # Maintained by User/follow_graph.py (F() updates in the follow transaction)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    
     deleted_at = models.DateTimeField(blank=True, null=True)
     
     
@@ -58,26 +62,20 @@ class UserActivityLog(models.Model):
     def __str__(self):
         return f"{self.user_profile.user.username} - {self.activity_type}"
 
-class UserFollowersModel(models.Model):
-    user_profile = models.ForeignKey(UserProfileModel, on_delete=models.CASCADE, related_name='followers')
-    follower = models.OneToOneField(UserProfileModel, on_delete=models.CASCADE, related_name='following_set')
-    followed_at = models.DateTimeField(auto_now_add=True)
-    followed = models.BooleanField(default=True)
-
-    class Meta:
-        unique_together = ('user_profile', 'follower')
-
-    def __str__(self):
-        return f"{self.follower.user.username} follows {self.user_profile.user.username}"
-
 class UserFollowingModel(models.Model):
+    """Follow edge: user_profile follows `following`. followed=False keeps an unfollowed edge for refollows"""
     user_profile = models.ForeignKey(UserProfileModel, on_delete=models.CASCADE, related_name='following')
-    following = models.OneToOneField(UserProfileModel, on_delete=models.CASCADE, related_name='followers_set')
-    followed_at = models.DateTimeField(auto_now_add=True)
+    following = models.ForeignKey(UserProfileModel, on_delete=models.CASCADE, related_name='followers_set')
+    followed_at = models.DateTimeField(auto_now_add=True)  # reset on refollow
     followed = models.BooleanField(default=True)
     
     class Meta:
         unique_together = ('user_profile', 'following')
+        indexes = [
+            # Active edges only: follower lists and counts, following lists
+            models.Index(fields=['following', '-followed_at', '-id'], condition=models.Q(followed=True), name='follow_active_followers_idx'),
+            models.Index(fields=['user_profile', '-followed_at', '-id'], condition=models.Q(followed=True), name='follow_active_following_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user_profile.user.username} follows {self.following.user.username}"
\ No newline at end of file
+        return f"{self.user_profile.user.username} follows {self.following.user.username}"
@@ -10,6 +10,7 @@ from ..Credit.credit_models import UserCreditVault, CreditTransactionLog
 
 class UserCreditVaultSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
+    total_value = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
     class Meta:
         model = UserCreditVault
         fields = "__all__"
@@ -34,10 +35,30 @@ class UserFollowingSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserFollowingModel
         fields = "__all__"
-    
 
-class UserFollowersSerializer(serializers.ModelSerializer):
-    username = serializers.CharField(source='user.username', read_only=True)
+
+class FollowListSerializer(serializers.ModelSerializer):
+    """One row of a follower / following list; context['side'] is the edge end to show"""
+    username = serializers.SerializerMethodField()
+    fullname = serializers.SerializerMethodField()
+    profile_picture = serializers.SerializerMethodField()
+
     class Meta:
-        model = UserFollowersModel
-        fields = "__all__"
\ No newline at end of file
+        model = UserFollowingModel
+        fields = ['username', 'fullname', 'profile_picture', 'followed_at']
+
+    def _profile(self, obj):
+        return getattr(obj, self.context['side'])
+
+    def get_username(self, obj):
+        return self._profile(obj).user.username
+
+    def get_fullname(self, obj):
+        return self._profile(obj).fullname
+
+    def get_profile_picture(self, obj):
+        picture = self._profile(obj).profile_picture
+        if not picture:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(picture.url) if request else picture.url
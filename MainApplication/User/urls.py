@@ -10,6 +10,9 @@ urlpatterns = [
     path('edit/username/', EditUsernameView.as_view(), name="edit-username"),
     path('profile/', UserProfileAPIView.as_view(), name="user-profile"),
     path('follow/', UserFollowingAPIView.as_view(), name="user-follow-unfollow"),
+    path('follow/status/', UserFollowStatusView.as_view(), name="user-follow-status"),
+    path('<str:username>/followers/', UserFollowersListView.as_view(), name="user-followers"),
+    path('<str:username>/following/', UserFollowingListView.as_view(), name="user-following"),
     path('helloworld/', HelloworldView.as_view(), name="hello-world"),
     path('test-redis/', test_redis_view, name='test_redis'),
 
@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
 
+from django.db import transaction
 from django.db.models import Q
 
 import platform
@@ -18,9 +19,14 @@ from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
 
 
 from ..auth_utils import get_user_from_request
+from ..idempotency import idempotent
 from .models import *
 from .serializers import *
-from ..Credit.credit_models import UserCreditVault, CreditTransactionLog, CreditModel, CreditCostsModel
+from ..Credit.credit_config import get_credit_costs
+from ..Credit.credit_ledger import CreditLedger, InsufficientCredits
+from ..Post.post_timeline import add_author_to_timeline, remove_author_from_timeline
+from ..pagination import KeysetPaginator, InvalidCursor
+from .follow_graph import MAX_STATUS_LOOKUP, follow, follow_status, followed_by, followers_of, unfollow
 
 
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -219,6 +225,24 @@ class UserProfileAPIView(APIView):
 
 
 # User Follow/Unfollow API
+FOLLOWING_CACHE_TTL = 600
+
+
+def _following_version_key(user_id):
+    return f"user_following_version:{user_id}"
+
+
+def _invalidate_following_cache(user_id):
+    """
+    Bump the user's following-cache version: every cached list (one per
+    search) is keyed by it, so all go stale with one INCR and expire by TTL
+    """
+    try:
+        r.incr(_following_version_key(user_id))
+    except redis.RedisError:
+        pass  # Stale for at most FOLLOWING_CACHE_TTL
+
+
 class UserFollowingAPIView(APIView):
     def get(self, request):
         try:
@@ -248,8 +272,9 @@ class UserFollowingAPIView(APIView):
             # Handle search
             search = request.query_params.get("search", "").strip()
 
-            # Create a unique Redis key for this query
-            cache_key = f"user_following:{user.id}:{search if search else 'all'}"
+            # Create a unique Redis key for this query (version bumped on follow / unfollow)
+            version = r.get(_following_version_key(user.id)) or '0'
+            cache_key = f"user_following:{user.id}:v{version}:{search if search else 'all'}"
 
             # Try to get data from Redis
             cached_data = r.get(cache_key)
@@ -262,17 +287,16 @@ class UserFollowingAPIView(APIView):
 
             # If not cached, query the database
             if search:
-                following = UserFollowingModel.objects.filter(
-                    user_profile=profile,
+                following = followed_by(profile).filter(
                     following__user__username__icontains=search
                 )
             else:
-                following = UserFollowingModel.objects.filter(user_profile=profile)
+                following = followed_by(profile)
 
             serializer = UserFollowingSerializer(following, many=True, context={'request': request})
 
-            # Cache the data in Redis for 10 minutes (600 seconds)
-            r.setex(cache_key, 600, str(serializer.data))
+            # Cache the data in Redis for 10 minutes (dropped on follow / unfollow)
+            r.setex(cache_key, FOLLOWING_CACHE_TTL, str(serializer.data))
 
             return JsonResponse({
                 "status": "success",
@@ -286,6 +310,7 @@ class UserFollowingAPIView(APIView):
                 "message": str(e)
             })
     
+    @idempotent
     def post(self, request):
         
         # fetch user from request
@@ -294,89 +319,116 @@ class UserFollowingAPIView(APIView):
         # fetch username to follow/unfollow
         following_username = request.data.get("username", "").strip()
         
-        # fetch user's total credits
-        total_credit = UserCreditVault.objects.filter(user=user).first()
-        
-        # fetch user's following cost 
-        following_credit_cost =  CreditCostsModel.objects.first().following_cost
-        
-        # calculate user's total credits
-        user_total_credit = total_credit.total_credits if total_credit else 0
-
-        
         if not user:
             return Response({"detail": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
         
         if not following_username:
             return Response({"detail": "Following username cannot be empty."}, status=status.HTTP_400_BAD_REQUEST)
         
-        user_profile = UserProfileModel.objects.filter(user=user)
-        following_profile = UserProfileModel.objects.filter(user__username=following_username)
-        if not user_profile.exists() or not following_profile.exists():
-            return Response({"detail": "User profile not found."}, status=status.HTTP_404_NOT_FOUND)
-        
-        follow_data = UserFollowingModel.objects.filter(user_profile=user_profile.first(), following=following_profile.first())
+        # fetch user's following cost (cached config, no query)
+        credit_costs = get_credit_costs()
+        if not credit_costs or credit_costs.following_cost is None:
+            return Response({"detail": "Following cost not configured."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        following_credit_cost = int(credit_costs.following_cost)
         
+        user_profile = UserProfileModel.objects.filter(user=user).first()
+        following_profile = UserProfileModel.objects.filter(user__username=following_username).first()
+        if not user_profile or not following_profile:
+            return Response({"detail": "User profile not found."}, status=status.HTTP_404_NOT_FOUND)
         
-        # If already following or unfollowing
-        
-        if follow_data.exists():
-            
-            # Toggle follow/unfollow
-            
-            if follow_data.first().followed == True:
-                
-                # Unfollow
-                
-                follow_data.update(followed=False)
+        with transaction.atomic():
+            # Toggle: each step is a conditional UPDATE on the edge, so concurrent toggles can't double count
+            if unfollow(user_profile, following_profile):
+                remove_author_from_timeline(user, following_profile.user)
+                transaction.on_commit(lambda: _invalidate_following_cache(user.id))
                 return Response({"detail": f"You have unfollowed {following_username}."})
             
-            elif follow_data.first().followed == False:
-                
-                # Refollow
-                
-                if user_total_credit < following_credit_cost:
-                    
-                    return Response({"detail": "Insufficient credits to follow this user."}, status=status.HTTP_400_BAD_REQUEST)
-                
-                follow_data.update(followed=True)
-                total_credit.total_credits = user_total_credit - following_credit_cost
-                total_credit.total_value = total_credit.total_value - (following_credit_cost * (CreditModel.objects.first().value / CreditModel.objects.first().credit))
-                total_credit.save()
-                
-                # credit transaction log
-                CreditTransactionLog.objects.create(
-                    user=user,
-                    transaction_type="Follow User",
-                    credits_changed=-following_credit_cost,
-                    value_changed=-(following_credit_cost * (CreditModel.objects.first().value / CreditModel.objects.first().credit)),
-                    description=f"Followed user {following_username}",
-                )           
-                     
-                return Response({"detail": f"You are now following {following_username}."})
-        else:
-            
-            # New follow
+            # Follow or refollow: the conditional UPDATE rejects it without enough credits
+            try:
+                CreditLedger.spend(
+                    user,
+                    following_credit_cost,
+                    f"Followed user {following_username}",
+                    transaction_type="Follow User"
+                )
+            except InsufficientCredits:
+                return Response({"detail": "Insufficient credits to follow this user."}, status=status.HTTP_400_BAD_REQUEST)
             
-            UserFollowingModel.objects.create(user_profile=user_profile.first(), following=following_profile.first(), followed=True)
+            if not follow(user_profile, following_profile):
+                # A concurrent request followed first; don't charge twice
+                transaction.set_rollback(True)
+                return Response({"detail": f"You are already following {following_username}."})
             
-            total_credit.total_credits = user_total_credit - following_credit_cost
-            total_credit.total_value = total_credit.total_value - (following_credit_cost * (CreditModel.objects.first().value / CreditModel.objects.first().credit))
-            total_credit.save()
-            
-            # credit transaction log
-            CreditTransactionLog.objects.create(
-                user=user,
-                transaction_type="Follow User",
-                credits_changed=-following_credit_cost,
-                value_changed=-(following_credit_cost * (CreditModel.objects.first().value / CreditModel.objects.first().credit)),
-                description=f"Followed user {following_username}",
-            )
+            add_author_to_timeline(user, following_profile.user)
+            transaction.on_commit(lambda: _invalidate_following_cache(user.id))
             
             return Response({"detail": f"You are now following {following_username}."})
+
+
+def _profile_or_404(username):
+    profile = UserProfileModel.objects.filter(user__username=username, is_deleted=False).select_related('user').first()
+    if not profile:
+        return None, Response({"detail": "User profile not found."}, status=status.HTTP_404_NOT_FOUND)
+    return profile, None
+
+
+def _follow_list_response(request, edges, side):
+    """One keyset page (newest follow first) of a follower / following list"""
+    paginator = KeysetPaginator(request, created_field='followed_at')
+    try:
+        page = paginator.paginate_queryset(edges.select_related(f'{side}__user'))
+    except InvalidCursor as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = FollowListSerializer(page, many=True, context={'request': request, 'side': side})
+    return Response({
+        "count": len(page),
+        "users": serializer.data,
+        "next_cursor": paginator.next_cursor,
+        "has_more": paginator.has_more
+    })
+
+
+class UserFollowersListView(APIView):
+    """GET: Who follows <username>, newest first (?cursor=&page_size=)"""
+    def get(self, request, username):
+        if not get_user_from_request(request):
+            return Response({"detail": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
+        profile, error = _profile_or_404(username)
+        if error:
+            return error
+        return _follow_list_response(request, followers_of(profile), side='user_profile')
+
+
+class UserFollowingListView(APIView):
+    """GET: Who <username> follows, newest first (?cursor=&page_size=)"""
+    def get(self, request, username):
+        if not get_user_from_request(request):
+            return Response({"detail": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
+        profile, error = _profile_or_404(username)
+        if error:
+            return error
+        return _follow_list_response(request, followed_by(profile), side='following')
+
+
+class UserFollowStatusView(APIView):
+    """GET: ?usernames=a,b,c -> {"following": {"a": true, ...}} for the current user (one query)"""
+    def get(self, request):
+        user = get_user_from_request(request)
+        if not user:
+            return Response({"detail": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
         
-        return Response({"detail": "Something went wrong."}, status=status.HTTP_400_BAD_REQUEST)
-            
+        usernames = [name.strip() for name in request.query_params.get("usernames", "").split(",") if name.strip()]
+        if not usernames:
+            return Response({"detail": "usernames cannot be empty."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(usernames) > MAX_STATUS_LOOKUP:
+            return Response({"detail": f"At most {MAX_STATUS_LOOKUP} usernames per request."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        profile = UserProfileModel.objects.filter(user=user).first()
+        if not profile:
+            return Response({"detail": "User profile not found."}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({"following": follow_status(profile, usernames)})
         
 
 class HelloworldView(APIView):
@@ -11,7 +11,11 @@ from .models import *
 from .Authentication.models import *
 from .User.models import *
 from .Credit.credit_models import *
-from .Post.post_models import Post, PostImage, PostLike, PostComment  # ← Add this import
+from .Credit.credit_config import with_total_value
+from .Credit.credit_ledger import CreditLedger, InsufficientCredits
+from .Post.post_models import Post, PostImage, PostLike, PostComment, ModerationJob, ModerationVerdict, UploadSession  # ← Add this import
+from .Post.post_moderation import approve_post, retry_jobs
+from .Post.verdict_cache import verdict_expiry
 
 
 # --- Forms ---
@@ -56,6 +60,30 @@ class UserChangeForm(forms.ModelForm):
         return self.initial["password"]
 
 
+class CreditVaultAdjustmentForm(forms.ModelForm):
+    """Vault admin form: balances are read-only, changes go through CreditLedger."""
+    adjustment = forms.IntegerField(
+        required=False,
+        help_text=_("Credits to add (positive) or remove (negative). Logged as an Adjustment.")
+    )
+    adjustment_reason = forms.CharField(required=False, max_length=255)
+
+    class Meta:
+        model = UserCreditVault
+        fields = ("user",)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        adjustment = cleaned_data.get("adjustment")
+        if adjustment:
+            if not cleaned_data.get("adjustment_reason"):
+                self.add_error("adjustment_reason", _("A reason is required for an adjustment."))
+            balance = (self.instance.total_credits or 0) if self.instance.pk else 0
+            if adjustment < 0 and -adjustment > balance:
+                self.add_error("adjustment", _("Cannot remove more credits than the vault holds (%(balance)s).") % {"balance": balance})
+        return cleaned_data
+
+
 # --- Admin ---
 
 class UserAdmin(BaseUserAdmin):
@@ -197,21 +225,28 @@ class CreditCostsModelAdmin(admin.ModelAdmin):
 
 @admin.register(UserCreditVault)
 class UserCreditVaultAdmin(admin.ModelAdmin):
-    list_display = ['user', 'total_credits', 'total_value', 'gained_credits', 'spent_credits', 'purchased_credits', 'updated_at']
+    form = CreditVaultAdjustmentForm
+    list_display = ['user', 'total_credits', 'total_value_display', 'gained_credits', 'spent_credits', 'purchased_credits', 'updated_at']
     search_fields = ['user__username', 'user__email']
     list_filter = ['created_at', 'updated_at']
-    readonly_fields = ['total_value', 'created_at', 'updated_at']
+    # Balances only change through CreditLedger (logged, sequenced): use the adjustment fields
+    readonly_fields = ['total_credits', 'total_value', 'last_sequence',
+                       'gained_credits', 'spent_credits', 'purchased_credits',
+                       'created_at', 'updated_at']
     
     fieldsets = (
         ('User', {
             'fields': ('user',)
         }),
         ('Credit Balance', {
-            'fields': ('total_credits', 'total_value')
+            'fields': ('total_credits', 'total_value', 'last_sequence')
         }),
         ('Credit Breakdown', {
             'fields': ('gained_credits', 'spent_credits', 'purchased_credits')
         }),
+        ('Adjustment', {
+            'fields': ('adjustment', 'adjustment_reason')
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -219,19 +254,51 @@ class UserCreditVaultAdmin(admin.ModelAdmin):
     )
     
     ordering = ['-total_credits']
+    
+    def get_queryset(self, request):
+        # total_value is not stored: computed in SQL at the current credit price
+        return with_total_value(super().get_queryset(request))
+    
+    @admin.display(description='Total value', ordering='annotated_total_value')
+    def total_value_display(self, obj):
+        return obj.annotated_total_value
+    
+    def get_readonly_fields(self, request, obj=None):
+        readonly = list(super().get_readonly_fields(request, obj))
+        return readonly + ['user'] if obj else readonly
+    
+    def save_model(self, request, obj, form, change):
+        if not change:
+            super().save_model(request, obj, form, change)
+        # On change nothing is editable: saving would write stale balances over the ledger's
+        adjustment = form.cleaned_data.get('adjustment')
+        if not adjustment:
+            return
+        
+        reason = f"Admin adjustment by {request.user}: {form.cleaned_data['adjustment_reason']}"
+        try:
+            if adjustment > 0:
+                balance = CreditLedger.grant(obj.user, adjustment, reason, transaction_type='Adjustment')
+            else:
+                balance = CreditLedger.spend(obj.user, -adjustment, reason, transaction_type='Adjustment')
+        except InsufficientCredits as e:
+            messages.error(request, str(e))
+            return
+        obj.refresh_from_db()
+        messages.success(request, f"Adjusted by {adjustment:+d} credits, new balance {balance}.")
 
 
 @admin.register(CreditTransactionLog)
 class CreditTransactionLogAdmin(admin.ModelAdmin):
-    list_display = ['user', 'transaction_type', 'credits_changed', 'value_changed', 'timestamp', 'description']
+    list_display = ['user', 'sequence', 'transaction_type', 'credits_changed', 'value_changed', 'balance_after', 'timestamp', 'description']
     list_filter = ['transaction_type', 'timestamp']
     search_fields = ['user__username', 'description']
-    readonly_fields = ['timestamp']
+    readonly_fields = ['user', 'sequence', 'transaction_type', 'credits_changed', 'value_changed', 'balance_after', 'description', 'timestamp']
     date_hierarchy = 'timestamp'
     
     fieldsets = (
         ('Transaction Info', {
-            'fields': ('user', 'transaction_type', 'credits_changed', 'value_changed')
+            'fields': ('user', 'sequence', 'transaction_type', 'credits_changed', 'value_changed', 'balance_after')
         }),
         ('Details', {
             'fields': ('description', 'timestamp')
@@ -243,7 +310,34 @@ class CreditTransactionLogAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         # Prevent manual creation of transaction logs
         return False
-admin.site.register(UserFollowersModel)
+    
+    def has_delete_permission(self, request, obj=None):
+        # Append-only; old months leave through archive_credit_transactions
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        # Append-only: saving would raise the model's ValidationError
+        return False
+
+
+@admin.register(CreditBalanceSnapshot)
+class CreditBalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['user', 'sequence', 'balance', 'taken_at', 'created_at']
+    search_fields = ['user__username']
+    readonly_fields = ['user', 'sequence', 'balance', 'taken_at', 'created_at']
+    ordering = ['-taken_at']
+
+
+@admin.register(CreditLedgerArchive)
+class CreditLedgerArchiveAdmin(admin.ModelAdmin):
+    list_display = ['month', 'row_count', 'path', 'sha256', 'created_at']
+    readonly_fields = ['month', 'path', 'row_count', 'sha256', 'created_at']
+    ordering = ['-month']
+    
+    def has_add_permission(self, request):
+        return False
+
+
 admin.site.register(UserFollowingModel)
 
 
@@ -263,6 +357,7 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'caption', 'post_id']
     readonly_fields = ['post_id', 'created_at', 'updated_at']
     inlines = [PostImageInline]
+    actions = ['approve_posts']
     
     fieldsets = (
         ('Post Info', {
@@ -281,6 +376,29 @@ class PostAdmin(admin.ModelAdmin):
             'fields': ('is_active', 'is_deleted', 'created_at', 'updated_at', 'deleted_at')
         }),
     )
+    
+    @admin.action(description='Approve and publish selected posts')
+    def approve_posts(self, request, queryset):
+        approved = 0
+        for post in queryset.exclude(content_status='approved').select_related('user'):
+            try:
+                approve_post(post)
+                approved += 1
+            except Exception as e:
+                messages.error(request, f"Post {post.post_id} could not be published: {e}")
+        messages.success(request, f"Approved {approved} post(s).")
+    
+    def save_model(self, request, obj, form, change):
+        # Approval goes through approve_post: derivatives, poster, timeline fan-out
+        approving = change and 'content_status' in form.changed_data and obj.content_status == 'approved'
+        if approving:
+            obj.content_status = form.initial['content_status']
+        super().save_model(request, obj, form, change)
+        if approving:
+            try:
+                approve_post(obj)
+            except Exception as e:
+                messages.error(request, f"Post {obj.post_id} could not be published: {e}")
 
 
 @admin.register(PostImage)
@@ -303,4 +421,41 @@ class PostCommentAdmin(admin.ModelAdmin):
     list_display = ['comment_id', 'user', 'post', 'text', 'created_at']
     list_filter = ['created_at']
     search_fields = ['user__username', 'text', 'post__post_id']
-    readonly_fields = ['comment_id', 'created_at', 'updated_at']
\ No newline at end of file
+    readonly_fields = ['comment_id', 'created_at', 'updated_at']
+
+
+@admin.register(ModerationJob)
+class ModerationJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'post', 'status', 'attempts', 'created_at', 'started_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['post__post_id']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'last_error']
+    actions = ['retry_failed_jobs']
+    
+    @admin.action(description='Retry failed jobs')
+    def retry_failed_jobs(self, request, queryset):
+        count = retry_jobs(queryset)
+        messages.success(request, f"Requeued {count} failed job(s).")
+
+
+@admin.register(ModerationVerdict)
+class ModerationVerdictAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'media_type', 'is_safe', 'hits', 'model_version', 'created_at', 'expires_at']
+    list_filter = ['media_type', 'is_safe', 'model_version']
+    search_fields = ['sha256']
+    readonly_fields = ['sha256', 'phash', 'model_version', 'result', 'hits', 'created_at']
+    exclude = ['phash_0', 'phash_1', 'phash_2', 'phash_3']
+    
+    def save_model(self, request, obj, form, change):
+        # A flipped verdict expires like one recorded with that outcome
+        if 'is_safe' in form.changed_data:
+            obj.expires_at = verdict_expiry(obj.is_safe)
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['upload_id', 'user', 'media_type', 'filename', 'offset', 'size', 'status', 'updated_at']
+    list_filter = ['media_type', 'status']
+    search_fields = ['upload_id', 'filename', 'user__email']
+    readonly_fields = ['upload_id', 'sha256', 'moderation_result', 'created_at', 'updated_at']
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class MainapplicationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'MainApplication'
+
+    def ready(self):
+        # post_save / post_delete receivers that invalidate the cached credit config
+        from .Credit import credit_config  # noqa: F401
+        
+        # Load the NudeNet model at startup instead of on the first upload
+        if getattr(settings, 'CONTENT_MODERATION_PRELOAD', False) and getattr(settings, 'CONTENT_MODERATION_ENABLED', True):
+            from .Post.detector_registry import warm_up_in_background
+            warm_up_in_background()
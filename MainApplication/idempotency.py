@@ -0,0 +1,179 @@
+# MainApplication/idempotency.py
+"""
+Idempotency-Key support for endpoints that charge credits.
+
+A client sends the same `Idempotency-Key` header when it retries a request.
+The first request stores a 'processing' IdempotencyRecord (committed at
+once, so it acts as a lock), runs the view and saves the response in the
+same transaction as the view's own writes. Then:
+
+  - a retry after completion gets the stored response back
+    (header Idempotent-Replayed: true) without running the view again;
+  - a concurrent duplicate waits up to IDEMPOTENCY_LOCK_TIMEOUT seconds for
+    the first one to finish, then replays it (409 if it is still running);
+  - the same key with a different request body / path is rejected (422).
+
+5xx responses and exceptions are not stored, so a retry runs the view again.
+A 'processing' record older than IDEMPOTENCY_LOCK_TTL (the request died)
+is taken over by the next retry. Records expire after
+IDEMPOTENCY_KEY_TTL_HOURS and are pruned by the moderation worker.
+
+Usage (above @transaction.atomic):
+
+    class PostLikeView(APIView):
+        @idempotent
+        @transaction.atomic
+        def post(self, request, pk): ...
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .auth_utils import get_user_from_request
+from .models import IdempotencyRecord
+
+logger = logging.getLogger(__name__)
+
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+KEY_TTL = timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', 24))
+LOCK_TIMEOUT = getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 10)
+LOCK_TTL = timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LOCK_TTL', 60))
+POLL_INTERVAL = 0.1
+
+
+def request_fingerprint(request):
+    """sha256 of what makes two requests "the same": method, path and body"""
+    try:
+        body = json.dumps(request.data, sort_keys=True, cls=JSONEncoder)
+    except (TypeError, ValueError):
+        body = repr(request.data)
+    raw = f"{request.method}|{request.path}|{body}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _error(message, code):
+    return Response({'success': False, 'error': message}, status=code)
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.response_status)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _in_progress():
+    response = _error('A request with this Idempotency-Key is still being processed', status.HTTP_409_CONFLICT)
+    response['Retry-After'] = '1'
+    return response
+
+
+def _acquire(user, key, fingerprint):
+    """
+    Returns ('owner', record) when this request should run the view, or
+    ('done', response) when it must not (replay, conflict, mismatch).
+    """
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                record = IdempotencyRecord.objects.create(
+                    user=user, key=key, fingerprint=fingerprint,
+                    locked_at=now, expires_at=now + KEY_TTL
+                )
+            return 'owner', record
+        except IntegrityError:
+            pass
+
+        record = IdempotencyRecord.objects.filter(user=user, key=key).first()
+        if record is None:
+            # The previous attempt failed and released the key: insert again after a pause
+            if time.monotonic() >= deadline:
+                return 'done', _in_progress()
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        if record.expires_at <= now:
+            IdempotencyRecord.objects.filter(pk=record.pk, expires_at__lte=now).delete()
+            continue
+
+        if record.fingerprint != fingerprint:
+            return 'done', _error(
+                f'{HEADER} was already used for a different request',
+                status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+
+        if record.status == 'completed':
+            return 'done', _replay(record)
+
+        # Take over a lock whose request died
+        claimed = IdempotencyRecord.objects.filter(
+            pk=record.pk, status='processing', locked_at__lt=now - LOCK_TTL
+        ).update(locked_at=now)
+        if claimed:
+            record.locked_at = now
+            return 'owner', record
+
+        if time.monotonic() >= deadline:
+            return 'done', _in_progress()
+        time.sleep(POLL_INTERVAL)
+
+
+def idempotent(view_method):
+    """Make an APIView handler honour the Idempotency-Key header (optional for clients)"""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER, '').strip()
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return _error(f'{HEADER} must be at most {MAX_KEY_LENGTH} characters', status.HTTP_400_BAD_REQUEST)
+
+        user = request.user if request.user.is_authenticated else get_user_from_request(request)
+        if not user:
+            return view_method(self, request, *args, **kwargs)  # The view answers 401
+
+        outcome, result = _acquire(user, key, request_fingerprint(request))
+        if outcome == 'done':
+            return result
+        record = result
+
+        try:
+            with transaction.atomic():
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code < 500:
+                    # Stored with the view's writes: both commit or neither does
+                    IdempotencyRecord.objects.filter(pk=record.pk).update(
+                        status='completed',
+                        response_status=response.status_code,
+                        response_body=json.loads(json.dumps(response.data, cls=JSONEncoder))
+                    )
+        except Exception:
+            IdempotencyRecord.objects.filter(pk=record.pk, status='processing').delete()
+            raise
+
+        if response.status_code >= 500:
+            IdempotencyRecord.objects.filter(pk=record.pk, status='processing').delete()
+        return response
+
+    return wrapper
+
+
+def prune_expired_keys():
+    """Delete expired idempotency records. Returns the number deleted"""
+    deleted, _ = IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
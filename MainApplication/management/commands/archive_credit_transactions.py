@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from MainApplication.Credit.credit_archive import RETENTION_MONTHS, archivable_months, archive_month
+
+
+class Command(BaseCommand):
+    help = "Move credit transactions older than the retention window to monthly archive files (run monthly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-months', type=int, default=RETENTION_MONTHS, help='Months kept in the live table')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the months that would be archived')
+
+    def handle(self, *args, **options):
+        months = archivable_months(options['keep_months'])
+        if options['dry_run']:
+            for month in months:
+                self.stdout.write(f"   {month:%Y-%m}")
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(months)} month(s) would be archived"))
+            return
+
+        archived = 0
+        for month in months:
+            archive = archive_month(month)
+            if archive is None:
+                continue
+            archived += 1
+            self.stdout.write(f"   {month:%Y-%m}: {archive.row_count} transaction(s) -> {archive.path}")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {archived} month(s) archived"))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from MainApplication.models import User
+from MainApplication.Post.post_timeline import rebuild_timeline
+
+
+class Command(BaseCommand):
+    help = "Rebuild precomputed home timelines (TimelineEntry) from the follow graph"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='Only rebuild this user\'s timeline')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True).order_by('id')
+        if options['username']:
+            users = users.filter(username=options['username'])
+
+        rebuilt = 0
+        for user in users.iterator():
+            rebuild_timeline(user)
+            rebuilt += 1
+            if rebuilt % 1000 == 0:
+                self.stdout.write(f"  {rebuilt} timelines rebuilt...")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {rebuilt} timeline(s)"))
@@ -0,0 +1,110 @@
+import os
+import time
+import shutil
+import tempfile
+
+import cv2
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from MainApplication.Post.video_content_moderator import NudeNetVideoModerator
+from MainApplication.Post.video_frame_sampler import (
+    SAMPLING_MODES, SeekingFrameSampler, SequentialFrameSampler, open_video, plan_frame_numbers
+)
+
+
+# (extension, fourcc) of the generated fixture set
+FIXTURE_FORMATS = [('.mp4', 'mp4v'), ('.webm', 'VP80'), ('.mkv', 'XVID')]
+
+
+class Command(BaseCommand):
+    help = "Compare the seeking frame extractor with the sequential-decode sampler on mp4/webm/mkv videos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('videos', nargs='*', help='Video files to benchmark (default: generated fixtures)')
+        parser.add_argument('--seconds', type=int, default=60, help='Length of generated fixtures')
+        parser.add_argument('--fps', type=int, default=30, help='Frame rate of generated fixtures')
+        parser.add_argument('--size', default='640x360', help='Resolution of generated fixtures')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per sampler, the best one is reported')
+        parser.add_argument('--stop-after', type=int, default=None,
+                            help='Simulate an unsafe frame: stop after this many samples')
+
+    def handle(self, *args, **options):
+        fixture_dir = None
+        videos = options['videos']
+
+        if not videos:
+            fixture_dir = tempfile.mkdtemp(prefix='sampler-bench-')
+            width, height = (int(v) for v in options['size'].lower().split('x'))
+            self.stdout.write(f"🎞️ Generating fixtures in {fixture_dir}...")
+            videos = [
+                self._make_fixture(os.path.join(fixture_dir, f'fixture{ext}'), fourcc,
+                                   options['seconds'], options['fps'], (width, height))
+                for ext, fourcc in FIXTURE_FORMATS
+            ]
+
+        try:
+            for video_path in videos:
+                self._benchmark(video_path, options['repeat'], options['stop_after'])
+        finally:
+            if fixture_dir:
+                shutil.rmtree(fixture_dir, ignore_errors=True)
+
+    def _benchmark(self, video_path, repeat, stop_after):
+        cap, info = open_video(video_path)
+        if cap is None:
+            self.stdout.write(self.style.ERROR(f"❌ Cannot open {video_path}"))
+            return
+        cap.release()
+
+        frame_numbers = plan_frame_numbers(
+            info, NudeNetVideoModerator.DEFAULT_FRAME_INTERVAL,
+            NudeNetVideoModerator.MAX_FRAMES, NudeNetVideoModerator.MIN_FRAMES
+        )
+        self.stdout.write(
+            f"\n📹 {os.path.basename(video_path)}: {info.duration:.1f}s, {info.total_frames} frames, "
+            f"{len(frame_numbers)} samples"
+        )
+
+        samplers = [('seek', SeekingFrameSampler())]
+        samplers += [(mode, SequentialFrameSampler(mode=mode)) for mode in SAMPLING_MODES]
+
+        baseline = None
+        for name, sampler in samplers:
+            best, sampled = None, 0
+            for _ in range(max(1, repeat)):
+                elapsed, sampled = self._run(video_path, sampler, frame_numbers, stop_after)
+                best = elapsed if best is None else min(best, elapsed)
+            baseline = baseline or best
+            self.stdout.write(
+                f"   {name:<9} {best * 1000:8.1f} ms  {sampled:3d} frames  x{baseline / best:.2f}"
+            )
+
+    def _run(self, video_path, sampler, frame_numbers, stop_after):
+        on_frame = None
+        if stop_after:
+            counter = {'n': 0}
+
+            def on_frame(_sampled):
+                counter['n'] += 1
+                return counter['n'] >= stop_after
+
+        started = time.perf_counter()
+        cap, info = open_video(video_path)
+        try:
+            sampled = sum(1 for _ in sampler.sample(cap, info, frame_numbers, on_frame=on_frame))
+        finally:
+            cap.release()
+        return time.perf_counter() - started, sampled
+
+    def _make_fixture(self, path, fourcc, seconds, fps, size):
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+        gradient = np.linspace(0, 255, size[0], dtype=np.uint8)
+        background = np.dstack([np.tile(gradient, (size[1], 1))] * 3)
+        for i in range(seconds * fps):
+            # A new "scene" every 3 seconds, moving text in between
+            frame = np.roll(background, (i // (3 * fps)) * 97, axis=1).copy()
+            cv2.putText(frame, str(i), (20 + i % 200, size[1] // 2), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 4)
+            writer.write(frame)
+        writer.release()
+        return path
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from MainApplication.Post.post_counters import flush_pending_counters
+
+
+class Command(BaseCommand):
+    help = "Apply the like/comment/share/save deltas buffered in Redis (ENGAGEMENT_COUNTERS_WRITE_BEHIND)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between flushes')
+        parser.add_argument('--once', action='store_true', help='Flush once and exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            flushed = flush_pending_counters()
+            self.stdout.write(self.style.SUCCESS(f"✅ Flushed counters of {flushed} post(s)"))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"🚀 Flushing engagement counters every {options['interval']}s"))
+        while True:
+            close_old_connections()
+            flushed = flush_pending_counters()
+            if flushed:
+                self.stdout.write(f"💾 Flushed counters of {flushed} post(s)")
+            time.sleep(options['interval'])
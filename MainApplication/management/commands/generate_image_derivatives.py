@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from MainApplication.Post.image_derivatives import available_formats, generate_derivatives
+from MainApplication.Post.post_models import PostImage
+
+
+class Command(BaseCommand):
+    help = "Create WebP/AVIF variants and BlurHash placeholders for approved post images"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate images that already have derivatives')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many images')
+
+    def handle(self, *args, **options):
+        images = PostImage.objects.filter(
+            post__content_status='approved',
+            post__is_deleted=False
+        ).order_by('id')
+        if not options['all']:
+            images = images.filter(derivatives__isnull=True)
+        if options['limit']:
+            images = images[:options['limit']]
+
+        self.stdout.write(f"🖼️ Formats: {', '.join(available_formats()) or 'none'}")
+
+        generated = failed = 0
+        for post_image in images.iterator():
+            try:
+                generate_derivatives(post_image)
+                generated += 1
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"❌ {post_image.image_id}: {e}"))
+            if generated and generated % 100 == 0:
+                self.stdout.write(f"  {generated} images done...")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Generated derivatives for {generated} image(s), {failed} failed"))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from MainApplication.Credit.credit_grants import CHUNK_SIZE, apply_grants, read_grants
+
+
+class Command(BaseCommand):
+    help = "Grant or sell credits to many users from a CSV (user,credits,reason[,key][,value]) or JSONL file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='.csv with a header line, or .jsonl')
+        parser.add_argument('--key-prefix', help='Batch key; rows without a key use <prefix>:<row number>')
+        parser.add_argument('--purchase', action='store_true', help='Count as purchased instead of gained credits')
+        parser.add_argument('--transaction-type', help='Log type (default: Gain, or Purchase with --purchase)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file and resolve users only')
+
+    def handle(self, *args, **options):
+        try:
+            rows = read_grants(options['path'])
+            summary = apply_grants(
+                rows,
+                transaction_type=options['transaction_type'] or ('Purchase' if options['purchase'] else 'Gain'),
+                purchased=options['purchase'],
+                key_prefix=options['key_prefix'],
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run']
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+
+        for error in summary['errors'][:50]:
+            self.stdout.write(self.style.WARNING(f"   {error}"))
+        if len(summary['errors']) > 50:
+            self.stdout.write(self.style.WARNING(f"   ... {len(summary['errors']) - 50} more"))
+
+        verb = 'would be granted' if options['dry_run'] else 'granted'
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {summary['granted']} row(s) {verb} ({summary['credits']} credits), "
+            f"{summary['skipped']} already applied, {len(summary['errors'])} error(s)"
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from MainApplication.User.follow_graph import reconcile_follow_counts
+from MainApplication.User.models import UserProfileModel
+
+
+class Command(BaseCommand):
+    help = "Recompute followers_count/following_count from the active follow edges (run nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', action='append', help='Only this user (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        queryset = UserProfileModel.objects.all()
+        if options['username']:
+            queryset = queryset.filter(user__username__in=options['username'])
+
+        drift = reconcile_follow_counts(queryset, dry_run=options['dry_run'])
+        for profile_pk, wrong in drift:
+            changes = ', '.join(f"{field} {stored} -> {actual}" for field, (stored, actual) in wrong.items())
+            self.stdout.write(f"   Profile {profile_pk}: {changes}")
+
+        verb = 'would be fixed' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(drift)} profile(s) {verb}"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from MainApplication.Post.post_counters import WRITE_BEHIND, flush_pending_counters, reconcile_counters
+from MainApplication.Post.post_models import Post
+
+
+class Command(BaseCommand):
+    help = "Recompute likes/comments/shares/saves counters from PostLike/PostComment/PostShare/PostSave"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--post', type=int, action='append', help='Only this post id (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        if WRITE_BEHIND and not options['dry_run']:
+            # Buffered deltas would otherwise be applied on top of the recomputed values
+            flushed = flush_pending_counters()
+            self.stdout.write(f"💾 Flushed buffered counters of {flushed} post(s)")
+
+        queryset = Post.objects.all()
+        if options['post']:
+            queryset = queryset.filter(pk__in=options['post'])
+
+        drift = reconcile_counters(queryset, dry_run=options['dry_run'])
+        for post_pk, wrong in drift:
+            changes = ', '.join(f"{field} {stored} -> {actual}" for field, (stored, actual) in wrong.items())
+            self.stdout.write(f"   Post {post_pk}: {changes}")
+
+        verb = 'would be fixed' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(drift)} post(s) {verb}"))
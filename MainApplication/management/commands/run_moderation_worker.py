@@ -0,0 +1,92 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from MainApplication.Post.post_moderation import STALE_JOB_AFTER, claim_next_job, process_job, requeue_stale_jobs
+from MainApplication.Post.verdict_cache import prune_expired_verdicts
+from MainApplication.Post.chunked_upload import prune_stale_uploads
+from MainApplication.idempotency import prune_expired_keys
+
+
+HOUSEKEEPING_INTERVAL = STALE_JOB_AFTER.total_seconds()
+
+
+class Command(BaseCommand):
+    help = "Run the content moderation worker pool over queued ModerationJob rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Number of worker threads')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit')
+
+    def handle(self, *args, **options):
+        self._housekeeping_lock = threading.Lock()
+        self._next_housekeeping = 0
+        self._housekeeping()
+
+        workers = max(1, options['workers'])
+        self.stdout.write(self.style.SUCCESS(f"🚀 Moderation worker started with {workers} thread(s)"))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(self._work, options['poll_interval'], options['once'])
+                for _ in range(workers)
+            ]
+            processed = sum(f.result() for f in futures)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Processed {processed} job(s)"))
+
+    def _housekeeping(self):
+        """
+        Requeue jobs of dead workers and prune expired rows and files, at most
+        once per HOUSEKEEPING_INTERVAL across all threads
+        """
+        with self._housekeeping_lock:
+            if time.monotonic() < self._next_housekeeping:
+                return
+            self._next_housekeeping = time.monotonic() + HOUSEKEEPING_INTERVAL
+
+        try:
+            requeued = requeue_stale_jobs()
+            if requeued:
+                self.stdout.write(f"♻️  Requeued {requeued} stale job(s)")
+
+            pruned = prune_expired_verdicts()
+            if pruned:
+                self.stdout.write(f"🧹 Pruned {pruned} expired verdict(s)")
+
+            stale_uploads = prune_stale_uploads()
+            if stale_uploads:
+                self.stdout.write(f"🧹 Pruned {stale_uploads} stale upload session(s)")
+
+            expired_keys = prune_expired_keys()
+            if expired_keys:
+                self.stdout.write(f"🧹 Pruned {expired_keys} expired idempotency key(s)")
+        except Exception as e:
+            # Tried again next interval; never stops the worker
+            self.stderr.write(f"❌ Housekeeping failed: {e}")
+
+    def _work(self, poll_interval, once):
+        processed = 0
+        try:
+            while True:
+                close_old_connections()
+                self._housekeeping()
+                job = claim_next_job()
+                if job is None:
+                    if once:
+                        return processed
+                    time.sleep(poll_interval)
+                    continue
+                try:
+                    process_job(job)
+                except Exception as e:
+                    # The job stays 'running' and is requeued once stale; keep this thread alive
+                    self.stderr.write(f"❌ Moderation job {job.id} crashed: {e}")
+                    continue
+                processed += 1
+        finally:
+            connection.close()
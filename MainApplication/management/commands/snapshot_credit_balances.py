@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from MainApplication.Credit.credit_ledger import SNAPSHOT_EVERY, take_snapshot, users_due_for_snapshot
+from MainApplication.Credit.credit_models import UserCreditVault
+
+
+class Command(BaseCommand):
+    help = "Checkpoint credit balances rebuilt from the transaction log and report vaults that drifted (run nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=SNAPSHOT_EVERY, help='Only users with at least this many entries since their last snapshot')
+        parser.add_argument('--all', action='store_true', help='Snapshot every user with entries')
+        parser.add_argument('--fix-vaults', action='store_true', help='Set drifted vault balances to the balance from the log')
+
+    def handle(self, *args, **options):
+        vaults = UserCreditVault.objects.select_related('user') if options['all'] else users_due_for_snapshot(options['every'])
+
+        taken = drifted = 0
+        for vault in vaults.iterator():
+            snapshot, vault_balance = take_snapshot(vault.user)
+            if snapshot is None:
+                continue
+            taken += 1
+
+            if snapshot.sequence == vault.last_sequence and snapshot.balance != vault_balance:
+                drifted += 1
+                self.stdout.write(f"   {vault.user.username}: vault {vault_balance}, log {snapshot.balance}")
+                if options['fix_vaults']:
+                    # Only if no entry was added since the snapshot
+                    UserCreditVault.objects.filter(pk=vault.pk, last_sequence=snapshot.sequence).update(
+                        total_credits=snapshot.balance
+                    )
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {taken} snapshot(s), {drifted} drifted vault(s)"))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from MainApplication.Post.video_transcoder import (
+    claim_next_transcode, ffmpeg_available, process_transcode, requeue_interrupted_transcodes
+)
+
+
+class Command(BaseCommand):
+    help = "Transcode approved video posts into HLS renditions (requires ffmpeg)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=10.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many videos')
+        parser.add_argument('--requeue-processing', action='store_true',
+                            help="Requeue videos stuck in 'processing' (only when no other transcoder runs)")
+
+    def handle(self, *args, **options):
+        if not ffmpeg_available():
+            raise CommandError("ffmpeg/ffprobe not found on PATH (see FFMPEG_BINARY / FFPROBE_BINARY)")
+
+        if options['requeue_processing']:
+            requeued = requeue_interrupted_transcodes()
+            if requeued:
+                self.stdout.write(f"♻️  Requeued {requeued} interrupted transcode(s)")
+
+        self.stdout.write(self.style.SUCCESS("🚀 Video transcoder started"))
+
+        processed = failed = 0
+        limit = options['limit']
+        while limit is None or processed < limit:
+            close_old_connections()
+            post = claim_next_transcode()
+            if post is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+            if not process_transcode(post):
+                failed += 1
+            processed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Transcoded {processed - failed} video(s), {failed} failed"))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApplication', '0005_post_average_rating_post_rating_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='postcomment',
+            index=models.Index(fields=['post', '-created_at'], name='MainApplica_post_id_1e5686_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApplication', '0006_postcomment_post_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_created_at', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='MainApplication.post')),
+            ],
+            options={
+                'verbose_name': 'Timeline Entry',
+                'verbose_name_plural': 'Timeline Entries',
+                'indexes': [models.Index(fields=['owner', '-post_created_at', '-post'], name='MainApplica_owner_i_9bdc81_idx'), models.Index(fields=['owner', 'author'], name='MainApplica_owner_i_607990_idx')],
+                'unique_together': {('owner', 'post')},
+            },
+        ),
+    ]
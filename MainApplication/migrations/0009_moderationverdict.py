@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApplication', '0008_moderationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationVerdict',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('media_type', models.CharField(choices=[('image', 'Image'), ('video', 'Video')], max_length=10)),
+                ('sha256', models.CharField(max_length=64)),
+                ('model_version', models.CharField(max_length=100)),
+                ('phash', models.BigIntegerField(blank=True, null=True)),
+                ('phash_0', models.PositiveIntegerField(blank=True, null=True)),
+                ('phash_1', models.PositiveIntegerField(blank=True, null=True)),
+                ('phash_2', models.PositiveIntegerField(blank=True, null=True)),
+                ('phash_3', models.PositiveIntegerField(blank=True, null=True)),
+                ('is_safe', models.BooleanField()),
+                ('result', models.JSONField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Moderation Verdict',
+                'verbose_name_plural': 'Moderation Verdicts',
+                'indexes': [models.Index(fields=['model_version', 'phash_0'], name='MainApplica_model_v_3a232d_idx'), models.Index(fields=['model_version', 'phash_1'], name='MainApplica_model_v_73654f_idx'), models.Index(fields=['model_version', 'phash_2'], name='MainApplica_model_v_98d5f8_idx'), models.Index(fields=['model_version', 'phash_3'], name='MainApplica_model_v_4a5d6c_idx')],
+                'unique_together': {('media_type', 'sha256', 'model_version')},
+            },
+        ),
+    ]
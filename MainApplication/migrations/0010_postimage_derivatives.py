@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApplication', '0009_moderationverdict'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postimage',
+            name='blurhash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='postimage',
+            name='derivatives',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApplication', '0010_postimage_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='video_poster',
+            field=models.ImageField(blank=True, null=True, upload_to='posts/videos/posters/%Y/%m/%d/'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='video_stream',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='video_stream_status',
+            field=models.CharField(blank=True, choices=[('queued', 'Queued'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], db_index=True, max_length=12, null=True),
+        ),
+    ]
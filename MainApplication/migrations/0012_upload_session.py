@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:58
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApplication', '0011_post_video_stream'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('upload_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('media_type', models.CharField(choices=[('image', 'Image'), ('video', 'Video')], max_length=10)),
+                ('filename', models.CharField(max_length=255)),
+                ('content_type', models.CharField(blank=True, default='', max_length=100)),
+                ('size', models.PositiveBigIntegerField()),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, max_length=64, null=True)),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('complete', 'Complete'), ('committed', 'Committed'), ('aborted', 'Aborted')], default='uploading', max_length=10)),
+                ('moderation_result', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Upload Session',
+                'verbose_name_plural': 'Upload Sessions',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='MainApplica_status_55afbe_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:02
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+
+
+def backfill_rating_totals(apps, schema_editor):
+    """Sum, histogram, count and average of the ratings given before the running totals"""
+    Post = apps.get_model('MainApplication', 'Post')
+    PostRating = apps.get_model('MainApplication', 'PostRating')
+
+    totals = PostRating.objects.order_by().values('post').annotate(
+        count=Count('pk'),
+        total=Sum('rating'),
+        **{f'stars_{stars}': Count('pk', filter=Q(rating=stars)) for stars in range(1, 6)}
+    )
+    for row in totals.iterator():
+        Post.objects.filter(pk=row['post']).update(
+            rating_sum=row['total'],
+            rating_count=row['count'],
+            average_rating=(Decimal(row['total']) / Decimal(row['count'])).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            **{f'rating_{stars}_count': row[f'stars_{stars}'] for stars in range(1, 6)}
+        )
+
+    Post.objects.filter(~Exists(PostRating.objects.filter(post=OuterRef('pk')))).update(
+        rating_count=0, average_rating=Decimal('0.00')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApplication', '0012_upload_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_totals, migrations.RunPython.noop),
+    ]
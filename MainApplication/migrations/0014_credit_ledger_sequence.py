@@ -0,0 +1,124 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_sequences(apps, schema_editor):
+    """
+    Number each user's existing log rows in time order and derive balance_after
+    backwards from the vault balance, so the log and the vault agree from here on.
+    An opening snapshot per vault marks that point (sequence 0 for vaults with no
+    log rows, so their current balance is not rebuilt as 0).
+    """
+    CreditTransactionLog = apps.get_model('MainApplication', 'CreditTransactionLog')
+    CreditBalanceSnapshot = apps.get_model('MainApplication', 'CreditBalanceSnapshot')
+    UserCreditVault = apps.get_model('MainApplication', 'UserCreditVault')
+
+    # Log rows without a vault: give them one so they are covered below
+    log_user_ids = CreditTransactionLog.objects.order_by().values_list('user_id', flat=True).distinct()
+    for user_id in log_user_ids.iterator():
+        UserCreditVault.objects.get_or_create(user_id=user_id, defaults={'total_credits': 0, 'total_value': 0})
+
+    for vault in UserCreditVault.objects.order_by('pk').iterator():
+        rows = list(CreditTransactionLog.objects.filter(user_id=vault.user_id).order_by('timestamp', 'id'))
+        opening_balance = vault.total_credits or 0
+
+        balance = opening_balance
+        for row in reversed(rows):
+            row.balance_after = balance
+            balance -= row.credits_changed
+        for sequence, row in enumerate(rows, start=1):
+            row.sequence = sequence
+        if rows:
+            CreditTransactionLog.objects.bulk_update(rows, ['sequence', 'balance_after'], batch_size=500)
+
+        UserCreditVault.objects.filter(pk=vault.pk).update(last_sequence=len(rows))
+        CreditBalanceSnapshot.objects.create(
+            user_id=vault.user_id,
+            sequence=len(rows),
+            balance=opening_balance,
+            taken_at=rows[-1].timestamp if rows else vault.updated_at
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApplication', '0013_post_rating_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreditBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveBigIntegerField()),
+                ('balance', models.IntegerField()),
+                ('taken_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Credit Balance Snapshot',
+                'verbose_name_plural': 'Credit Balance Snapshots',
+            },
+        ),
+        migrations.CreateModel(
+            name='CreditLedgerArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('path', models.CharField(max_length=500)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('sha256', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Credit Ledger Archive',
+                'verbose_name_plural': 'Credit Ledger Archives',
+                'ordering': ['month'],
+            },
+        ),
+        migrations.AddField(
+            model_name='credittransactionlog',
+            name='balance_after',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='credittransactionlog',
+            name='sequence',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='usercreditvault',
+            name='last_sequence',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='credittransactionlog',
+            index=models.Index(fields=['user', '-timestamp', '-id'], name='credit_log_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='credittransactionlog',
+            index=models.Index(fields=['timestamp'], name='credit_log_time_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='credittransactionlog',
+            constraint=models.UniqueConstraint(fields=('user', 'sequence'), name='credit_log_user_sequence_uniq'),
+        ),
+        migrations.AddField(
+            model_name='creditbalancesnapshot',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='credit_snapshots', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='creditbalancesnapshot',
+            index=models.Index(fields=['user', '-taken_at'], name='credit_snapshot_user_time_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='creditbalancesnapshot',
+            constraint=models.UniqueConstraint(fields=('user', 'sequence'), name='credit_snapshot_user_sequence_uniq'),
+        ),
+        migrations.RunPython(backfill_sequences, migrations.RunPython.noop),
+    ]
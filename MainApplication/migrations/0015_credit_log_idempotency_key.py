@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApplication', '0014_credit_ledger_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='credittransactionlog',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=150, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='credittransactionlog',
+            constraint=models.UniqueConstraint(fields=('idempotency_key',), name='credit_log_idempotency_key_uniq'),
+        ),
+    ]
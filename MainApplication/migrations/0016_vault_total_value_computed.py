@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:13
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApplication', '0015_credit_log_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='usercreditvault',
+            name='total_value',
+        ),
+    ]
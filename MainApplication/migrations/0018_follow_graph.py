@@ -0,0 +1,85 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def copy_follower_rows(apps, schema_editor):
+    """UserFollowersModel mirrored the edges; keep any edge only it recorded"""
+    UserFollowersModel = apps.get_model('MainApplication', 'UserFollowersModel')
+    UserFollowingModel = apps.get_model('MainApplication', 'UserFollowingModel')
+
+    for row in UserFollowersModel.objects.iterator():
+        UserFollowingModel.objects.get_or_create(
+            user_profile_id=row.follower_id,
+            following_id=row.user_profile_id,
+            defaults={'followed': row.followed}
+        )
+
+
+def backfill_follow_counts(apps, schema_editor):
+    UserProfileModel = apps.get_model('MainApplication', 'UserProfileModel')
+    UserFollowingModel = apps.get_model('MainApplication', 'UserFollowingModel')
+
+    def active(field):
+        return Coalesce(Subquery(
+            UserFollowingModel.objects.filter(followed=True, **{field: OuterRef('pk')})
+            .order_by().values(field).annotate(n=Count('pk')).values('n')
+        ), 0)
+
+    UserProfileModel.objects.update(
+        followers_count=active('following'),
+        following_count=active('user_profile')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApplication', '0017_idempotency_record'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userfollowingmodel',
+            name='following',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='followers_set', to='MainApplication.userprofilemodel'),
+        ),
+        migrations.RunPython(copy_follower_rows, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='userfollowersmodel',
+            unique_together=None,
+        ),
+        migrations.RemoveField(
+            model_name='userfollowersmodel',
+            name='follower',
+        ),
+        migrations.RemoveField(
+            model_name='userfollowersmodel',
+            name='user_profile',
+        ),
+        migrations.DeleteModel(
+            name='UserFollowersModel',
+        ),
+        migrations.AddField(
+            model_name='userprofilemodel',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofilemodel',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_follow_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='userfollowingmodel',
+            index=models.Index(condition=models.Q(('followed', True)), fields=['following', '-followed_at', '-id'], name='follow_active_followers_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userfollowingmodel',
+            index=models.Index(condition=models.Q(('followed', True)), fields=['user_profile', '-followed_at', '-id'], name='follow_active_following_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApplication', '0018_follow_graph'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='content_status',
+            field=models.CharField(choices=[('pending', 'Pending Review'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('review', 'Needs Manual Review')], default='approved', max_length=20),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApplication', '0019_post_content_status_review'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='post',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_sessions', to='MainApplication.post'),
+        ),
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('uploading', 'Uploading'), ('complete', 'Complete'), ('committing', 'Committing'), ('committed', 'Committed'), ('aborted', 'Aborted')], default='uploading', max_length=10),
+        ),
+    ]
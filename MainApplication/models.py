@@ -65,4 +65,32 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 
 
-# ----------------------------------- End of Custom User Model and Manager -------------------------------------------------------------
\ No newline at end of file
+# ----------------------------------- End of Custom User Model and Manager -------------------------------------------------------------
+
+
+# ----------------------------------- Idempotency Keys -------------------------------------------------------------
+
+class IdempotencyRecord(models.Model):
+    """Response of a request sent with an Idempotency-Key header (see MainApplication/idempotency.py)"""
+    STATUS_CHOICES = [
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_records')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # sha256 of method, path and body
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='processing')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    locked_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.key} ({self.status})"
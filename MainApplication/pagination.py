@@ -0,0 +1,110 @@
+# MainApplication/pagination.py
+"""
+Keyset (cursor) pagination helpers.
+
+Pages are walked with a ``(created_at, id) < (last_created_at, last_id)``
+predicate instead of OFFSET, so every page is a single index range scan and
+no COUNT query is ever issued. Cursors are opaque, url-safe base64 tokens.
+"""
+
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def encode_cursor(created_at, pk):
+    """Build an opaque cursor from the last row of a page"""
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the (created_at, pk) position stored in a cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, pk = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+class KeysetPaginator:
+    """
+    Newest-first keyset paginator over a (timestamp, id) pair.
+
+    Usage:
+        paginator = KeysetPaginator(request)
+        page = paginator.paginate_queryset(queryset)   # may raise InvalidCursor
+        ... paginator.next_cursor, paginator.has_more
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, request, page_size=DEFAULT_PAGE_SIZE,
+                 created_field='created_at', id_field='id'):
+        self.request = request
+        self.default_page_size = page_size
+        self.created_field = created_field
+        self.id_field = id_field
+        self.next_cursor = None
+        self.has_more = False
+
+    def get_page_size(self):
+        """Read ?page_size=, clamped to MAX_PAGE_SIZE"""
+        try:
+            page_size = int(self.request.query_params.get(self.page_size_query_param, self.default_page_size))
+        except (TypeError, ValueError):
+            page_size = self.default_page_size
+        return max(1, min(page_size, MAX_PAGE_SIZE))
+
+    def get_position(self):
+        """Decoded position of ?cursor=, or None for the first page"""
+        cursor = self.request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        return decode_cursor(cursor)
+
+    def filter_after(self, queryset, position):
+        """Restrict queryset to rows strictly older than position"""
+        created_at, pk = position
+        return queryset.filter(
+            Q(**{f'{self.created_field}__lt': created_at}) |
+            Q(**{self.created_field: created_at, f'{self.id_field}__lt': pk})
+        )
+
+    def paginate_queryset(self, queryset):
+        """Return one page of rows (a list) and set next_cursor / has_more"""
+        page_size = self.get_page_size()
+        position = self.get_position()
+
+        if position is not None:
+            queryset = self.filter_after(queryset, position)
+
+        queryset = queryset.order_by(f'-{self.created_field}', f'-{self.id_field}')
+
+        # Fetch one extra row to know whether another page exists (no COUNT)
+        rows = list(queryset[:page_size + 1])
+        self.has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if self.has_more and rows:
+            last = rows[-1]
+            self.next_cursor = encode_cursor(
+                getattr(last, self.created_field),
+                getattr(last, self.id_field)
+            )
+        else:
+            self.next_cursor = None
+
+        return rows
@@ -1,3 +1,49 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import User
+from .Post.post_models import Post, PostLike, PostRating, PostSave
+
+
+class PostViewerStateTests(TestCase):
+    """is_liked / is_saved / user_rating are resolved per page, not per post"""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass')
+        self.viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def _create_posts(self, count):
+        posts = [Post.objects.create(user=self.author, post_type='text', caption=f'post {i}') for i in range(count)]
+        for post in posts[::2]:
+            PostLike.objects.create(post=post, user=self.viewer)
+            PostSave.objects.create(post=post, user=self.viewer)
+            PostRating.objects.create(post=post, user=self.viewer, rating=4)
+        return posts
+
+    def _count_queries(self, page_size):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f'/api/posts/user/{self.author.id}/', {'page_size': page_size})
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()
+
+    def test_query_count_is_constant_per_page(self):
+        self._create_posts(20)
+        small_count, small = self._count_queries(2)
+        large_count, large = self._count_queries(20)
+        self.assertEqual(len(small['posts']), 2)
+        self.assertEqual(len(large['posts']), 20)
+        self.assertEqual(small_count, large_count)
+
+    def test_viewer_state_values(self):
+        posts = self._create_posts(4)
+        liked_ids = {str(p.post_id) for p in posts[::2]}
+        _, data = self._count_queries(10)
+        for item in data['posts']:
+            expected = item['post_id'] in liked_ids
+            self.assertEqual(item['is_liked'], expected)
+            self.assertEqual(item['is_saved'], expected)
+            self.assertEqual(item['user_rating'], 4 if expected else None)
@@ -7,5 +7,6 @@ urlpatterns = [
     
     path('user/', include('MainApplication.User.urls')),
     path('posts/', include('MainApplication.Post.post_urls')),
+    path('credits/', include('MainApplication.Credit.credit_urls')),
 
 ]
\ No newline at end of file
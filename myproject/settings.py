@@ -92,10 +92,14 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'upload-offset',
+    'idempotency-key',
 ]
 CORS_ALLOW_CREDENTIALS = True
 CORS_EXPOSE_HEADERS = [
-    'Content-Disposition',''
+    'Content-Disposition','',
+    'idempotent-replayed',
+    'retry-after',
 ]   
 AUTH_USER_MODEL = 'MainApplication.User'
 
@@ -171,13 +175,25 @@ STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-FILE_UPLOAD_MAX_MEMORY_SIZE = 20 * 1024 * 1024  # 20MB
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB, larger multipart uploads spool to disk
 DATA_UPLOAD_MAX_MEMORY_SIZE = 20 * 1024 * 1024  # 20MB
 FILE_UPLOAD_HANDLERS = [
     'django.core.files.uploadhandler.MemoryFileUploadHandler',
     'django.core.files.uploadhandler.TemporaryFileUploadHandler',
 ]
 CONTENT_MODERATION_ENABLED = True  # Set to False to disable NudeNet checks
+CONTENT_MODERATION_ASYNC = True  # Moderate uploads in the background worker (manage.py run_moderation_worker)
+CONTENT_MODERATION_PRELOAD = False  # Load the NudeNet model when the app starts (see Post/detector_registry.py)
+CONTENT_MODERATION_FRAME_SAMPLING = 'interval'  # 'interval', 'keyframe' or 'scene' (see Post/video_frame_sampler.py)
+CONTENT_MODERATION_VIDEO_SHORT_CIRCUIT = True  # Stop checking a video at its first unsafe frame
+CONTENT_MODERATION_VERDICT_CACHE = True  # Reuse verdicts for identical / near-identical uploads (see Post/verdict_cache.py)
+CONTENT_MODERATION_VERDICT_TTL_DAYS = 30  # Approved verdicts expire, rejected ones never do
+CONTENT_MODERATION_THREADS = 4  # Per-process pool for per-image checks
+CONTENT_MODERATION_POST_DEADLINE = 30  # Seconds an upload may spend on image moderation before it is rejected
+CONTENT_MODERATION_ON_UPLOAD = True  # Check each chunked upload as soon as it is complete (see Post/chunked_upload.py)
+CHUNKED_UPLOAD_DIR = os.path.join(BASE_DIR, 'upload_sessions')  # Part files of resumable uploads (not served)
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 5 * 1024 * 1024  # 5MB per PATCH
+CHUNKED_UPLOAD_TTL_HOURS = 24  # Untouched sessions are pruned by the moderation worker
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -234,4 +250,13 @@ GEOIP_PATH = os.path.join(BASE_DIR, "geoip")  # Place GeoLite2-City.mmdb here
 REDIS_HOST = '127.0.0.1'
 REDIS_PORT = 6379
 REDIS_DB = 0
+CREDIT_CONFIG_CHECK_INTERVAL = 1.0  # Seconds between checks of the credit config version key (see Credit/credit_config.py)
+CREDIT_CONFIG_FALLBACK_TTL = 30.0  # Reload interval for the credit config when Redis is unavailable
+CREDIT_SNAPSHOT_EVERY = 500  # Snapshot a user's balance after this many ledger entries (manage.py snapshot_credit_balances)
+CREDIT_LEDGER_RETENTION_MONTHS = 12  # Older months are moved to files by manage.py archive_credit_transactions
+CREDIT_LEDGER_ARCHIVE_DIR = os.path.join(BASE_DIR, 'credit_archive')  # Gzipped JSON-lines, one file per month (not served)
+IDEMPOTENCY_KEY_TTL_HOURS = 24  # How long a stored response answers retries with the same Idempotency-Key
+IDEMPOTENCY_LOCK_TIMEOUT = 10  # Seconds a concurrent duplicate waits for the first request before a 409
+IDEMPOTENCY_LOCK_TTL = 60  # A 'processing' key older than this is taken over (its request died)
+ENGAGEMENT_COUNTERS_WRITE_BEHIND = False  # Buffer like/comment/share/save deltas in Redis (run manage.py flush_engagement_counters)
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'